@@ -7,12 +7,141 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL")
+    # Engine async (asyncpg); si no se define se deriva de DATABASE_URL
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+    # Pool de conexiones, por engine y por proceso: con N workers de uvicorn el máximo de
+    # conexiones es N * 2 engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))  # -1 = nunca
+    # Pre-ping: un SELECT 1 en cada checkout; con DB_POOL_RECYCLE_SECONDS suele bastar sin él
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 = sin límite
+    DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "exploratec-backend")
+    # Réplica de solo lectura para analíticas (opcional); si se atrasa más de
+    # READ_REPLICA_MAX_LAG_SECONDS o no responde, se lee del primario
+    READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+    READ_REPLICA_MAX_LAG_SECONDS = float(os.getenv("READ_REPLICA_MAX_LAG_SECONDS", "30"))
+    READ_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("READ_REPLICA_LAG_CHECK_SECONDS", "5"))
     
     # JWT
     SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Costo de bcrypt (los hashes con otro costo se rehacen al iniciar sesión)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Hilos para hashear contraseñas y máximo de hashes en curso (el resto recibe 503)
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+    # Intentos de login por identificador y por IP en la ventana
+    LOGIN_MAX_ATTEMPTS_PER_IDENTIFIER = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IDENTIFIER", "5"))
+    LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "20"))
+    LOGIN_ATTEMPT_WINDOW_SECONDS = int(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", "300"))
+    # Registros por IP en la misma ventana (cada uno hashea una contraseña)
+    REGISTER_MAX_PER_IP = int(os.getenv("REGISTER_MAX_PER_IP", "5"))
+
+    # Caché de usuarios autenticados (por proceso); 0 = consultar la base en cada petición
+    PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+    # LLM (backend: "openai" para cualquier API compatible con OpenAI, "mock" para el simulador en proceso)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL")  # ej. http://localhost:8001/v1 para el servidor simulado
+    LLM_CHAT_MODEL = os.getenv("LLM_CHAT_MODEL", "gpt-4o-mini")
+    LLM_TITLE_MODEL = os.getenv("LLM_TITLE_MODEL", "gpt-4o-mini")
+    LLM_EMBEDDING_MODEL = os.getenv("LLM_EMBEDDING_MODEL", "text-embedding-3-small")
+    LLM_EMBEDDING_DIMENSIONS = int(os.getenv("LLM_EMBEDDING_DIMENSIONS", "1536"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    # Precio por 1K tokens (USD) para estimar el gasto en las analíticas
+    LLM_PROMPT_COST_PER_1K_TOKENS = float(os.getenv("LLM_PROMPT_COST_PER_1K_TOKENS", "0.00015"))
+    LLM_COMPLETION_COST_PER_1K_TOKENS = float(os.getenv("LLM_COMPLETION_COST_PER_1K_TOKENS", "0.0006"))
+
+    # Presupuestos de latencia, hedging y circuit breaker del LLM
+    LLM_LATENCY_BUDGET_MS = float(os.getenv("LLM_LATENCY_BUDGET_MS", "8000"))
+    LLM_TITLE_BUDGET_MS = float(os.getenv("LLM_TITLE_BUDGET_MS", "2000"))
+    LLM_EMBEDDING_BUDGET_MS = float(os.getenv("LLM_EMBEDDING_BUDGET_MS", "3000"))
+    LLM_MAX_CONCURRENT_CALLS = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "32"))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "0"))  # 0 = usar el p95 observado
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+    LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+    LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+    LLM_BREAKER_LATENCY_MS = float(os.getenv("LLM_BREAKER_LATENCY_MS", "6000"))
+    LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+    # Ruta rápida de navegación (sin embeddings ni LLM)
+    NAVIGATION_FAST_PATH_ENABLED = os.getenv("NAVIGATION_FAST_PATH_ENABLED", "true").lower() == "true"
+
+    # Registro de escenas en memoria: recarga periódica para ver cambios de otros procesos
+    SCENE_REGISTRY_TTL_SECONDS = float(os.getenv("SCENE_REGISTRY_TTL_SECONDS", "300"))
+
+    # Resúmenes precalculados por escena para "¿Qué hay aquí?"
+    SCENE_SUMMARIES_ENABLED = os.getenv("SCENE_SUMMARIES_ENABLED", "true").lower() == "true"
+    # Espera mínima entre regeneraciones de una misma escena pedidas desde el chat
+    SCENE_SUMMARY_REFRESH_COOLDOWN_SECONDS = float(os.getenv("SCENE_SUMMARY_REFRESH_COOLDOWN_SECONDS", "300"))
+
+    # Historial de la conversación en el prompt: últimos N mensajes + resumen acumulado del resto
+    CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "3"))
+    CONVERSATION_SUMMARY_ENABLED = os.getenv("CONVERSATION_SUMMARY_ENABLED", "true").lower() == "true"
+    # Mensajes fuera de la ventana que se acumulan antes de actualizar el resumen
+    CONVERSATION_SUMMARY_BATCH = int(os.getenv("CONVERSATION_SUMMARY_BATCH", "4"))
+    CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "200"))
+
+    # Límites de uso del chat
+    RATE_LIMIT_MESSAGES_PER_WINDOW = int(os.getenv("RATE_LIMIT_MESSAGES_PER_WINDOW", "15"))
+    RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "3600"))
+    CONVERSATION_MAX_MESSAGES = int(os.getenv("CONVERSATION_MAX_MESSAGES", "20"))
+    # Mensajes por página en el detalle de una conversación
+    CONVERSATION_PAGE_SIZE = int(os.getenv("CONVERSATION_PAGE_SIZE", "50"))
+    # Filas por lote del cursor del lado del servidor en las exportaciones del admin
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Particiones mensuales de messages y archivo de conversaciones inactivas
+    MESSAGE_PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGE_PARTITION_MONTHS_AHEAD", "2"))
+    ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "6"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+    # "memory" (por proceso) o "shared" (Redis en RATE_LIMIT_REDIS_URL o sustituto local si está vacío)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+    # Tareas en segundo plano (trabajo que no necesita esperar el usuario)
+    BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+    BACKGROUND_QUEUE_SIZE = int(os.getenv("BACKGROUND_QUEUE_SIZE", "1000"))
+    BACKGROUND_MAX_RETRIES = int(os.getenv("BACKGROUND_MAX_RETRIES", "2"))
+    BACKGROUND_RETRY_DELAY_MS = int(os.getenv("BACKGROUND_RETRY_DELAY_MS", "500"))
+    BACKGROUND_DRAIN_TIMEOUT_SECONDS = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT_SECONDS", "10"))
+
+    # Preguntas en lote (/chatbot/batch)
+    CHAT_BATCH_MAX_QUESTIONS = int(os.getenv("CHAT_BATCH_MAX_QUESTIONS", "5"))
+    CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "4"))
+
+    # Simulador de LLM (backend "mock" y servidor local app.utils.mock_llm_server)
+    MOCK_LLM_LATENCY_DISTRIBUTION = os.getenv("MOCK_LLM_LATENCY_DISTRIBUTION", "lognormal")  # fixed | uniform | normal | lognormal
+    MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "400"))  # tiempo medio hasta el primer token
+    MOCK_LLM_LATENCY_STDDEV_MS = float(os.getenv("MOCK_LLM_LATENCY_STDDEV_MS", "150"))
+    MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "60"))
+    MOCK_LLM_TOKENS_PER_SECOND_STDDEV = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND_STDDEV", "15"))
+    MOCK_LLM_COMPLETION_TOKENS = int(os.getenv("MOCK_LLM_COMPLETION_TOKENS", "120"))
+    MOCK_LLM_EMBEDDING_LATENCY_MS = float(os.getenv("MOCK_LLM_EMBEDDING_LATENCY_MS", "60"))
+    MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+    MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED")) if os.getenv("MOCK_LLM_SEED") else None
     
+    @property
+    def async_database_url(self) -> str:
+        """URL del engine async: ASYNC_DATABASE_URL o DATABASE_URL con el driver asyncpg"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.DATABASE_URL or ""
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
+
     # Parse database URL
     @property
     def database_config(self):
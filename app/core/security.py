@@ -1,11 +1,32 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-# Configuración para hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuración para hash de contraseñas. Con min/max iguales al costo configurado,
+# verify_and_update marca para rehash cualquier hash hecho con otro costo.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt tarda cientos de ms de CPU (y libera el GIL): en los endpoints async se ejecuta en
+# un pool propio y acotado para no congelar el event loop ni acaparar el threadpool.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHasherBusy(Exception):
+    """Hay demasiados hashes de contraseña en curso; se rechaza en vez de encolar"""
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña coincide con el hash"""
@@ -15,6 +36,23 @@ def get_password_hash(password: str) -> str:
     """Genera el hash de una contraseña"""
     return pwd_context.hash(password)
 
+async def _run_hash_job(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash fuera del event loop"""
+    return await _run_hash_job(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica la contraseña fuera del event loop; si el hash usa otro costo devuelve
+    también el hash nuevo para guardarlo"""
+    return await _run_hash_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crea un token JWT"""
     to_encode = data.copy()
@@ -27,10 +65,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[dict]:
-    """Verifica y decodifica un token JWT"""
+def _user_claims(user, token_type: str) -> dict:
+    """sub (username), uid, role y ver (token_version) del usuario"""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "role": "admin" if user.is_admin else "user",
+        "ver": user.token_version or 0,
+        "type": token_type,
+    }
+
+def create_user_tokens(user) -> Tuple[str, str]:
+    """Access token (ACCESS_TOKEN_EXPIRE_MINUTES) y refresh token (REFRESH_TOKEN_EXPIRE_DAYS)"""
+    access_token = create_access_token(
+        _user_claims(user, "access"),
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = create_access_token(
+        _user_claims(user, "refresh"),
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return access_token, refresh_token
+
+def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """Verifica y decodifica un token JWT del tipo indicado.
+    Los tokens sin "type" (emitidos antes de los refresh tokens) cuentan como access."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("type", "access") != token_type:
+        return None
+    return payload
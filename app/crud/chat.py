@@ -1,24 +1,45 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import Optional, List
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, desc, case, insert, update
+from typing import Optional, List, Dict
+from datetime import datetime, timedelta
+from app.config import settings
 from app.models.chat import Conversation, Message, MessageFeedback
 from app.models.scene import Scene
+from app.models.user import User
 from app.schemas.chat import (
     ConversationCreate, ConversationUpdate, MessageCreate, 
     MessageFeedbackCreate, MessageFeedbackUpdate, ChatStats, IntentStats
 )
-from app.crud.scene import scene_crud
+from app.services.scene_registry import scene_registry
+from app.utils.pagination import apply_keyset, estimate_count, next_cursor
+
+# Claves de paginación por cursor (deben coincidir con los índices de la migración 0006)
+CONVERSATION_ACTIVITY = func.coalesce(Conversation.updated_at, Conversation.created_at)
 
 class ConversationCRUD:
     def get_conversation(self, db: Session, conversation_id: int) -> Optional[Conversation]:
         """Obtiene una conversación por ID"""
         return db.query(Conversation).filter(Conversation.id == conversation_id).first()
     
-    def get_user_conversations(self, db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Conversation]:
-        """Obtiene las conversaciones de un usuario"""
-        return db.query(Conversation).filter(
-            Conversation.user_id == user_id
-        ).order_by(desc(Conversation.updated_at)).offset(skip).limit(limit).all()
+    def get_user_conversations(
+        self,
+        db: Session,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Conversation]:
+        """Obtiene las conversaciones de un usuario, de la más reciente a la más antigua.
+        Con `cursor` continúa desde la página anterior (se ignora `skip`)."""
+        query = db.query(Conversation).filter(Conversation.user_id == user_id)
+        query = apply_keyset(query, [CONVERSATION_ACTIVITY, Conversation.id], cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def next_cursor(self, conversations: List[Conversation], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente de get_user_conversations"""
+        return next_cursor(conversations, limit, lambda c: (c.updated_at or c.created_at, c.id))
     
     def get_active_conversation(self, db: Session, user_id: int) -> Optional[Conversation]:
         """Obtiene la conversación activa más reciente de un usuario"""
@@ -40,6 +61,41 @@ class ConversationCRUD:
         db.refresh(db_conversation)
         return db_conversation
     
+    def add_to_message_counters(self, db: Session, conversation_id: int, added: int, last_message_at=None):
+        """Suma `added` mensajes a los contadores de la conversación (sin commit: va en la
+        transacción que inserta los mensajes). Devuelve la fila actualizada."""
+        return db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(
+                message_count=Conversation.message_count + added,
+                last_message_at=last_message_at if last_message_at is not None else func.now(),
+                updated_at=func.now()
+            )
+            .returning(Conversation.updated_at, Conversation.message_count, Conversation.last_message_at)
+        ).one()
+
+    def recount_messages(self, db: Session, conversation_ids: Optional[List[int]] = None) -> None:
+        """Recalcula message_count y last_message_at desde la tabla de mensajes (seeder, correcciones)"""
+        count_query = db.query(func.count(Message.id)).filter(
+            Message.conversation_id == Conversation.id
+        ).scalar_subquery()
+        last_query = db.query(func.max(Message.created_at)).filter(
+            Message.conversation_id == Conversation.id
+        ).scalar_subquery()
+        query = db.query(Conversation)
+        if conversation_ids is not None:
+            query = query.filter(Conversation.id.in_(conversation_ids))
+        query.update(
+            {
+                Conversation.message_count: count_query,
+                Conversation.last_message_at: last_query,
+                Conversation.updated_at: Conversation.updated_at
+            },
+            synchronize_session=False
+        )
+        db.commit()
+
     def update_conversation(self, db: Session, conversation_id: int, conversation_update: ConversationUpdate) -> Optional[Conversation]:
         """Actualiza una conversación"""
         db_conversation = self.get_conversation(db, conversation_id)
@@ -69,18 +125,83 @@ class MessageCRUD:
         """Obtiene un mensaje por ID"""
         return db.query(Message).filter(Message.id == message_id).first()
     
-    def get_conversation_messages(self, db: Session, conversation_id: int, skip: int = 0, limit: int = 100) -> List[Message]:
-        """Obtiene los mensajes de una conversación"""
-        return db.query(Message).filter(
-            Message.conversation_id == conversation_id
-        ).order_by(Message.created_at).offset(skip).limit(limit).all()
+    def get_conversation_messages(
+        self,
+        db: Session,
+        conversation_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Message]:
+        """Obtiene los mensajes de una conversación en orden cronológico (con `cursor`, desde la página anterior)"""
+        query = db.query(Message).filter(Message.conversation_id == conversation_id)
+        query = apply_keyset(query, [Message.created_at, Message.id], cursor, descending=False)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def next_cursor(self, messages: List[Message], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente para listados ordenados por (created_at, id)"""
+        return next_cursor(messages, limit, lambda m: (m.created_at, m.id))
     
+    @staticmethod
+    def _since(query, since: Optional[datetime]):
+        """Cota inferior de created_at (inicio del mes de `since`, normalmente la creación de
+        la conversación) para que PostgreSQL descarte las particiones mensuales anteriores"""
+        if since is None:
+            return query
+        return query.filter(
+            Message.created_at >= since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        )
+
+    def get_recent_messages(
+        self,
+        db: Session,
+        conversation_id: int,
+        limit: int,
+        before_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> List[Message]:
+        """Obtiene los últimos `limit` mensajes de una conversación (en orden cronológico)"""
+        query = self._since(db.query(Message).filter(Message.conversation_id == conversation_id), since)
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        recent = query.order_by(desc(Message.id)).limit(limit).all()
+        return list(reversed(recent))
+
+    def get_message_page(
+        self,
+        db: Session,
+        conversation_id: int,
+        limit: int,
+        before_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> tuple:
+        """Página de mensajes más recientes (anteriores a `before_id`) en orden cronológico.
+        Devuelve (mensajes, hay_mas): se pide una fila extra para saber si quedan más antiguos."""
+        recent = self.get_recent_messages(db, conversation_id, limit + 1, before_id=before_id, since=since)
+        has_more = len(recent) > limit
+        return (recent[1:] if has_more else recent), has_more
+
+    def get_messages_after(
+        self,
+        db: Session,
+        conversation_id: int,
+        after_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> List[Message]:
+        """Obtiene los mensajes posteriores a `after_id` (todos si es None)"""
+        query = self._since(db.query(Message).filter(Message.conversation_id == conversation_id), since)
+        if after_id is not None:
+            query = query.filter(Message.id > after_id)
+        return query.order_by(Message.id).all()
+
     def create_message(self, db: Session, message: MessageCreate, conversation_id: int, is_from_user: bool, tokens_used: Optional[int] = None) -> Message:
         """Crea un nuevo mensaje"""
         # Si tenemos un scene_key, obtenemos el scene_id correspondiente
         scene_context_id = None
         if message.scene_context:
-            scene = scene_crud.get_scene_by_key(db, message.scene_context)
+            scene = scene_registry.get_by_key(db, message.scene_context)
             if scene:
                 scene_context_id = scene.id
 
@@ -92,6 +213,7 @@ class MessageCRUD:
             tokens_used=tokens_used
         )
         db.add(db_message)
+        conversation_crud.add_to_message_counters(db, conversation_id, 1)
         db.commit()
         db.refresh(db_message)
         return db_message
@@ -101,10 +223,47 @@ class MessageCRUD:
         message_data = MessageCreate(content=content, scene_context=scene_context)
         return self.create_message(db, message_data, conversation_id, True)  # True = es del usuario
     
-    def create_assistant_message(self, db: Session, content: str, conversation_id: int, scene_context: Optional[str] = None, tokens_used: Optional[int] = None) -> Message:
-        """Crea un mensaje del asistente usando scene_key opcional"""
-        message_data = MessageCreate(content=content, scene_context=scene_context)
-        return self.create_message(db, message_data, conversation_id, False, tokens_used)  # False = es del asistente
+    def create_assistant_message(
+        self,
+        db: Session,
+        content: str,
+        conversation_id: int,
+        scene_context: Optional[str] = None,
+        tokens_used: Optional[int] = None,
+        reply_to_id: Optional[int] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        model_name: Optional[str] = None,
+        response_time_ms: Optional[int] = None,
+        stage_latencies: Optional[Dict] = None,
+        cache_hits: Optional[List[str]] = None
+    ) -> Message:
+        """Crea un mensaje del asistente (scene_key opcional) con sus métricas de tokens y latencia"""
+        scene_context_id = None
+        if scene_context:
+            scene = scene_registry.get_by_key(db, scene_context)
+            if scene:
+                scene_context_id = scene.id
+
+        db_message = Message(
+            conversation_id=conversation_id,
+            content=content,
+            is_from_user=False,
+            scene_context_id=scene_context_id,
+            tokens_used=tokens_used,
+            reply_to_id=reply_to_id,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            model_name=model_name,
+            response_time_ms=response_time_ms,
+            stage_latencies=stage_latencies,
+            cache_hits=cache_hits
+        )
+        db.add(db_message)
+        conversation_crud.add_to_message_counters(db, conversation_id, 1)
+        db.commit()
+        db.refresh(db_message)
+        return db_message
     
     def create_user_message_with_intent(
         self,
@@ -121,7 +280,7 @@ class MessageCRUD:
         # Convertir scene_key a scene_id si existe
         scene_context_id = None
         if scene_context:
-            scene = scene_crud.get_scene_by_key(db, scene_context)
+            scene = scene_registry.get_by_key(db, scene_context)
             if scene:
                 scene_context_id = scene.id
 
@@ -136,6 +295,7 @@ class MessageCRUD:
             requires_clarification=requires_clarification
         )
         db.add(db_message)
+        conversation_crud.add_to_message_counters(db, conversation_id, 1)
         db.commit()
         db.refresh(db_message)
         return db_message
@@ -216,6 +376,94 @@ class MessageFeedbackCRUD:
         return True
 
 class ChatStatsCRUD:
+    def explore_messages(
+        self,
+        db: Session,
+        limit: int = 50,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        exact_total: bool = False,
+        scene_id: Optional[int] = None,
+        intent_category: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        only_user_messages: bool = True
+    ) -> Dict:
+        """Explorador de mensajes del admin: página, total y estadísticas de intención de la
+        página en una sola sentencia (CTEs + funciones de ventana, scene_key con JOIN).
+
+        Sin `exact_total` el total es la estimación del planner (no recorre todas las filas),
+        que cuesta una segunda ida a la base (EXPLAIN); por eso solo se calcula en la primera
+        página (sin `cursor`) y las siguientes devuelven total None.
+        """
+        columns = [
+            Message.id,
+            Message.content,
+            User.username,
+            Conversation.title.label("conversation_title"),
+            Scene.scene_key.label("scene_context"),
+            Message.is_from_user,
+            Message.intent_category,
+            Message.intent_confidence,
+            Message.intent_keywords,
+            Message.requires_clarification,
+            Message.tokens_used,
+            Message.created_at
+        ]
+        if exact_total:
+            # Total de los mensajes filtrados, calculado antes de paginar
+            columns.append(func.count().over().label("total"))
+
+        filtered = db.query(*columns).join(
+            Conversation, Message.conversation_id == Conversation.id
+        ).join(
+            User, Conversation.user_id == User.id
+        ).outerjoin(
+            Scene, Scene.id == Message.scene_context_id
+        )
+        if only_user_messages:
+            filtered = filtered.filter(Message.is_from_user == True)
+        if scene_id is not None:
+            filtered = filtered.filter(Message.scene_context_id == scene_id)
+        if intent_category:
+            filtered = filtered.filter(Message.intent_category == intent_category)
+        if min_confidence is not None:
+            filtered = filtered.filter(Message.intent_confidence >= min_confidence)
+
+        filtered_cte = filtered.cte("filtered")
+        page = apply_keyset(db.query(filtered_cte), [filtered_cte.c.created_at, filtered_cte.c.id], cursor)
+        if skip and not cursor:
+            page = page.offset(skip)
+        page_cte = page.limit(limit).cte("page")
+
+        rows = db.query(
+            page_cte,
+            func.count().over(partition_by=page_cte.c.intent_category).label("intent_count"),
+            func.avg(page_cte.c.intent_confidence).over(partition_by=page_cte.c.intent_category).label("intent_avg_confidence")
+        ).order_by(desc(page_cte.c.created_at), desc(page_cte.c.id)).all()
+
+        if exact_total:
+            total = rows[0].total if rows else (0 if not cursor and not skip else None)
+        elif not cursor:
+            total = estimate_count(db, filtered)
+        else:
+            total = None
+
+        intent_stats = {}
+        for row in rows:
+            if row.intent_category is not None:
+                intent_stats[row.intent_category] = {
+                    "category": row.intent_category,
+                    "count": row.intent_count,
+                    "avg_confidence": round(float(row.intent_avg_confidence or 0), 2)
+                }
+
+        return {
+            "total": total,
+            "rows": rows,
+            "next_cursor": next_cursor(rows, limit, lambda row: (row.created_at, row.id)),
+            "intent_statistics": list(intent_stats.values())
+        }
+
     def get_chat_stats(self, db: Session) -> ChatStats:
         """Obtiene estadísticas generales del chat"""
         
@@ -280,6 +528,120 @@ class ChatStatsCRUD:
             intent_distribution=intent_distribution
         )
 
+    def get_performance_stats(self, db: Session, group_by: str = "day", days: int = 30) -> List[Dict]:
+        """Latencia (p50/p95/p99) y consumo de tokens de las respuestas del asistente.
+
+        `group_by` puede ser "day", "scene" o "intent" (la intención del mensaje del usuario
+        al que responde cada mensaje del asistente).
+        """
+        since = datetime.utcnow() - timedelta(days=days)
+        user_message = aliased(Message)
+
+        if group_by == "scene":
+            group_key = Scene.name
+        elif group_by == "intent":
+            group_key = user_message.intent_category
+        else:
+            group_key = func.date(Message.created_at)
+
+        query = db.query(
+            group_key.label("key"),
+            func.count(Message.id).label("responses"),
+            func.percentile_cont(0.5).within_group(Message.response_time_ms).label("p50_ms"),
+            func.percentile_cont(0.95).within_group(Message.response_time_ms).label("p95_ms"),
+            func.percentile_cont(0.99).within_group(Message.response_time_ms).label("p99_ms"),
+            func.coalesce(func.sum(Message.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(Message.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(Message.tokens_used), 0).label("total_tokens"),
+            func.sum(case((func.json_array_length(Message.cache_hits) > 0, 1), else_=0)).label("cache_hits")
+        ).filter(
+            Message.is_from_user == False,
+            Message.created_at >= since
+        )
+
+        if group_by == "scene":
+            query = query.outerjoin(Scene, Scene.id == Message.scene_context_id)
+        elif group_by == "intent":
+            query = query.outerjoin(user_message, user_message.id == Message.reply_to_id)
+
+        rows = query.group_by(group_key).order_by(group_key).all()
+
+        prompt_price = settings.LLM_PROMPT_COST_PER_1K_TOKENS / 1000.0
+        completion_price = settings.LLM_COMPLETION_COST_PER_1K_TOKENS / 1000.0
+        return [
+            {
+                group_by: str(row.key) if row.key is not None else None,
+                "responses": row.responses,
+                "p50_ms": round(row.p50_ms, 1) if row.p50_ms is not None else None,
+                "p95_ms": round(row.p95_ms, 1) if row.p95_ms is not None else None,
+                "p99_ms": round(row.p99_ms, 1) if row.p99_ms is not None else None,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "total_tokens": row.total_tokens,
+                "estimated_cost_usd": round(
+                    row.prompt_tokens * prompt_price + row.completion_tokens * completion_price, 4
+                ),
+                "cache_hit_rate": round((row.cache_hits or 0) / row.responses, 3) if row.responses else 0.0
+            }
+            for row in rows
+        ]
+
+class ChatTurnUnitOfWork:
+    """Escritura de uno o más turnos de chat en una sola transacción.
+
+    Se acumulan los pares (mensaje del usuario, mensaje del asistente) y al confirmar se
+    insertan con INSERT ... RETURNING (sin refresh), se enlaza cada respuesta con su pregunta
+    (`reply_to_id`) y se actualizan `updated_at`, `message_count` y `last_message_at` de la
+    conversación: un solo commit por turno.
+    """
+
+    def __init__(self, db: Session, conversation_id: int):
+        self.db = db
+        self.conversation_id = conversation_id
+        self.conversation_updated_at = None
+        self.message_count = None
+        self._turns: List[tuple] = []
+
+    def add_turn(self, user_message: Dict, assistant_message: Dict) -> "ChatTurnUnitOfWork":
+        """Agrega un turno; cada dict tiene las columnas de Message (content, scene_context_id, ...)"""
+        self._turns.append((user_message, assistant_message))
+        return self
+
+    def commit(self) -> List[tuple]:
+        """Guarda los turnos. Devuelve [(Message usuario, Message asistente)] con id y created_at"""
+        persisted = []
+        try:
+            for user_values, assistant_values in self._turns:
+                user_message = self._insert(dict(user_values, is_from_user=True))
+                assistant_message = self._insert(
+                    dict(assistant_values, is_from_user=False, reply_to_id=user_message.id)
+                )
+                persisted.append((user_message, assistant_message))
+
+            if persisted:
+                conversation = conversation_crud.add_to_message_counters(
+                    self.db,
+                    self.conversation_id,
+                    2 * len(persisted),
+                    last_message_at=persisted[-1][1].created_at
+                )
+                self.conversation_updated_at = conversation.updated_at
+                self.message_count = conversation.message_count
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._turns = []
+        return persisted
+
+    def _insert(self, values: Dict) -> Message:
+        values = dict(values, conversation_id=self.conversation_id)
+        row = self.db.execute(
+            insert(Message).values(**values).returning(Message.id, Message.created_at)
+        ).one()
+        # Objeto transitorio (fuera de la sesión) con lo necesario para la respuesta
+        return Message(**values, id=row.id, created_at=row.created_at)
+
 # Instancias de los CRUD
 conversation_crud = ConversationCRUD()
 message_crud = MessageCRUD()
@@ -3,6 +3,8 @@ from typing import List, Optional
 from app.models.knowledge import Event
 from app.schemas.event import EventCreate, EventUpdate
 from app.services.embeddings import embed_text
+from app.crud.scene_summary import scene_summary_crud
+from app.utils.pagination import apply_keyset, next_cursor
 
 
 class EventCRUD:
@@ -34,17 +36,24 @@ class EventCRUD:
             print(f"⚠️ Error generando embedding: {e}")
             db.rollback()
         
+        scene_summary_crud.mark_stale(db, [db_event.scene_id])
         return db_event
     
     def get_event(self, db: Session, event_id: int) -> Optional[Event]:
         """Obtener evento por ID"""
         return db.query(Event).filter(Event.id == event_id).first()
     
-    def get_all_events(self, db: Session, skip: int = 0, limit: int = 50) -> List[Event]:
-        """Obtener todos los eventos activos"""
-        return db.query(Event).filter(
-            Event.is_active == True
-        ).order_by(Event.event_date).offset(skip).limit(limit).all()
+    def get_all_events(self, db: Session, skip: int = 0, limit: int = 50, cursor: Optional[str] = None) -> List[Event]:
+        """Obtener todos los eventos activos por fecha (con `cursor`, desde la página anterior)"""
+        query = db.query(Event).filter(Event.is_active == True)
+        query = apply_keyset(query, [Event.event_date, Event.id], cursor, descending=False)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+    
+    def next_cursor(self, events: List[Event], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente de get_all_events"""
+        return next_cursor(events, limit, lambda e: (e.event_date, e.id))
     
     def get_events_by_scene(self, db: Session, scene_id: int) -> List[Event]:
         """Obtener eventos de una escena"""
@@ -60,6 +69,7 @@ class EventCRUD:
             return None
         
         update_data = event_update.model_dump(exclude_unset=True)
+        previous_scene_id = db_event.scene_id
         needs_reembed = 'title' in update_data or 'description' in update_data
         
         for field, value in update_data.items():
@@ -75,6 +85,7 @@ class EventCRUD:
         
         db.commit()
         db.refresh(db_event)
+        scene_summary_crud.mark_stale(db, [previous_scene_id, db_event.scene_id])
         return db_event
     
     def delete_event(self, db: Session, event_id: int) -> bool:
@@ -85,6 +96,7 @@ class EventCRUD:
         
         db_event.is_active = False
         db.commit()
+        scene_summary_crud.mark_stale(db, [db_event.scene_id])
         return True
 
 
@@ -4,6 +4,7 @@ from app.models.knowledge import KnowledgeBase
 from app.schemas.knowledge import KnowledgeBaseCreate, SearchResult
 from app.services.embeddings import embed_text
 from app.services.rag import retrieve_similar_passages
+from app.crud.scene_summary import scene_summary_crud
 
 
 def add_knowledge(db: Session, kb: KnowledgeBaseCreate) -> KnowledgeBase:
@@ -28,6 +29,7 @@ def add_knowledge(db: Session, kb: KnowledgeBaseCreate) -> KnowledgeBase:
     except Exception:
         db.rollback()
 
+    scene_summary_crud.mark_stale(db, [new.scene_id])
     return new
 
 
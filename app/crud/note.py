@@ -3,6 +3,7 @@ from sqlalchemy import func, desc
 from typing import List, Optional
 from app.models.note import Note , Speciality
 from app.schemas.note import NoteCreate, NoteUpdate
+from app.utils.pagination import apply_keyset, estimate_count, next_cursor
 from datetime import date
 
 
@@ -34,15 +35,28 @@ class NoteCRUD:
         """Obtener nota por ID"""
         return db.query(Note).filter(Note.id == note_id).first()
     
-    def get_user_notes(self, db: Session, user_id: int, skip: int = 0, limit: int = 50) -> List[Note]:
-        """Obtener notas de un usuario"""
-        return db.query(Note).filter(
-            Note.User_id == user_id
-        ).order_by(desc(Note.created_at)).offset(skip).limit(limit).all()
+    def get_user_notes(self, db: Session, user_id: int, skip: int = 0, limit: int = 50, cursor: Optional[str] = None) -> List[Note]:
+        """Obtener notas de un usuario (con `cursor`, desde la página anterior)"""
+        query = db.query(Note).filter(Note.User_id == user_id)
+        query = apply_keyset(query, [Note.created_at, Note.id], cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
     
-    def get_all_notes(self, db: Session, skip: int = 0, limit: int = 100) -> List[Note]:
+    def get_all_notes(self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Note]:
         """Obtener todas las notas (admin)"""
-        return db.query(Note).order_by(desc(Note.created_at)).offset(skip).limit(limit).all()
+        query = apply_keyset(db.query(Note), [Note.created_at, Note.id], cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+    
+    def estimate_total(self, db: Session) -> Optional[int]:
+        """Total aproximado de notas (estimación del planner, sin COUNT)"""
+        return estimate_count(db, db.query(Note))
+    
+    def next_cursor(self, notes: List[Note], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente de los listados de notas"""
+        return next_cursor(notes, limit, lambda n: (n.created_at, n.id))
     
     def update_note(self, db: Session, note_id: int, note_update: NoteUpdate) -> Optional[Note]:
         """Actualizar nota (admin)"""
@@ -1,20 +1,31 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.models.scene import Scene
 from app.schemas.scene import SceneCreate, SceneUpdate
+from app.services.scene_registry import scene_registry
+
+# Consultas compartidas por SceneCRUD y AsyncSceneCRUD: cada clase solo las ejecuta con su sesión
+
+def _by_key(scene_key: str):
+    return select(Scene).filter(Scene.scene_key == scene_key).limit(1)
+
+def _page(skip: int, limit: int):
+    return select(Scene).offset(skip).limit(limit)
 
 class SceneCRUD:
     def get_scene(self, db: Session, scene_id: int) -> Optional[Scene]:
         """Obtiene una escena por ID"""
-        return db.query(Scene).filter(Scene.id == scene_id).first()
+        return db.get(Scene, scene_id)
     
     def get_scene_by_key(self, db: Session, scene_key: str) -> Optional[Scene]:
         """Obtiene una escena por su key"""
-        return db.query(Scene).filter(Scene.scene_key == scene_key).first()
+        return db.scalar(_by_key(scene_key))
     
     def get_scenes(self, db: Session, skip: int = 0, limit: int = 100) -> List[Scene]:
         """Obtiene una lista de escenas"""
-        return db.query(Scene).offset(skip).limit(limit).all()
+        return list(db.scalars(_page(skip, limit)).all())
     
     def create_scene(self, db: Session, scene: SceneCreate) -> Scene:
         """Crea una nueva escena"""
@@ -26,6 +37,7 @@ class SceneCRUD:
         db.add(db_scene)
         db.commit()
         db.refresh(db_scene)
+        scene_registry.load(db)
         return db_scene
     
     def update_scene(self, db: Session, scene_id: int, scene_update: SceneUpdate) -> Optional[Scene]:
@@ -40,6 +52,7 @@ class SceneCRUD:
         
         db.commit()
         db.refresh(db_scene)
+        scene_registry.load(db)
         return db_scene
     
     def delete_scene(self, db: Session, scene_id: int) -> bool:
@@ -50,7 +63,24 @@ class SceneCRUD:
         
         db.delete(db_scene)
         db.commit()
+        scene_registry.load(db)
         return True
 
+class AsyncSceneCRUD:
+    """Lecturas de escenas sobre AsyncSession (las escrituras siguen en SceneCRUD)"""
+
+    async def get_scene(self, db: AsyncSession, scene_id: int) -> Optional[Scene]:
+        """Obtiene una escena por ID"""
+        return await db.get(Scene, scene_id)
+
+    async def get_scene_by_key(self, db: AsyncSession, scene_key: str) -> Optional[Scene]:
+        """Obtiene una escena por su key"""
+        return await db.scalar(_by_key(scene_key))
+
+    async def get_scenes(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Scene]:
+        """Obtiene una lista de escenas"""
+        return list((await db.scalars(_page(skip, limit))).all())
+
 # Instancia del CRUD
-scene_crud = SceneCRUD()
\ No newline at end of file
+scene_crud = SceneCRUD()
+async_scene_crud = AsyncSceneCRUD()
\ No newline at end of file
@@ -0,0 +1,58 @@
+from sqlalchemy.orm import Session
+from typing import Optional, List, Iterable
+from app.models.scene import SceneSummary
+
+
+class SceneSummaryCRUD:
+    def get_by_scene(self, db: Session, scene_id: int) -> Optional[SceneSummary]:
+        """Obtiene el resumen de una escena"""
+        return db.query(SceneSummary).filter(SceneSummary.scene_id == scene_id).first()
+
+    def get_all(self, db: Session) -> List[SceneSummary]:
+        """Obtiene todos los resúmenes"""
+        return db.query(SceneSummary).order_by(SceneSummary.scene_id).all()
+
+    def upsert(
+        self,
+        db: Session,
+        scene_id: int,
+        summary: str,
+        source_hash: Optional[str],
+        tokens_used: Optional[int] = None,
+        expires_at=None
+    ) -> SceneSummary:
+        """Crea o reemplaza el resumen de una escena"""
+        db_summary = self.get_by_scene(db, scene_id)
+        if not db_summary:
+            db_summary = SceneSummary(scene_id=scene_id)
+            db.add(db_summary)
+
+        db_summary.summary = summary
+        db_summary.source_hash = source_hash
+        db_summary.tokens_used = tokens_used
+        db_summary.expires_at = expires_at
+        db_summary.is_stale = False
+
+        db.commit()
+        db.refresh(db_summary)
+        return db_summary
+
+    def mark_stale(self, db: Session, scene_ids: Iterable[Optional[int]]) -> int:
+        """Marca como desactualizados los resúmenes de las escenas indicadas"""
+        ids = {scene_id for scene_id in scene_ids if scene_id is not None}
+        if not ids:
+            return 0
+        updated = db.query(SceneSummary).filter(
+            SceneSummary.scene_id.in_(ids)
+        ).update({"is_stale": True}, synchronize_session=False)
+        db.commit()
+        return updated
+
+    def delete_by_scene(self, db: Session, scene_id: int) -> bool:
+        """Elimina el resumen de una escena"""
+        deleted = db.query(SceneSummary).filter(SceneSummary.scene_id == scene_id).delete()
+        db.commit()
+        return deleted > 0
+
+
+scene_summary_crud = SceneSummaryCRUD()
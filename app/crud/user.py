@@ -1,45 +1,108 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, or_, select, update
+from typing import Optional, List, Tuple
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    get_password_hash, get_password_hash_async, verify_and_update_password_async, verify_password
+)
+from app.services.principal_cache import principal_cache
+from app.utils.pagination import apply_keyset, estimate_count, next_cursor
+
+def revokes_tokens(db_user: User, update_data: dict) -> bool:
+    """Cambios que invalidan los tokens ya emitidos (contraseña o estado)"""
+    return "hashed_password" in update_data or (
+        "is_active" in update_data and update_data["is_active"] != db_user.is_active
+    )
+
+# Consultas y cambios compartidos por UserCRUD y AsyncUserCRUD: cada clase solo los ejecuta
+# con su sesión, así una corrección se hace en un solo lugar
+
+def _not_admin_page(skip: int, limit: int, cursor: Optional[str]):
+    query = apply_keyset(select(User).filter(User.is_admin == False), [User.id], cursor, descending=False)
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def _by_email(email: str):
+    return select(User).filter(User.email == email).limit(1)
+
+def _by_username(username: str):
+    return select(User).filter(User.username == username).limit(1)
+
+def _by_username_or_email(identifier: str):
+    return select(User).filter(or_(User.username == identifier, User.email == identifier)).limit(1)
+
+def _page(skip: int, limit: int):
+    return select(User).offset(skip).limit(limit)
+
+def _revoke_statement(user_id: int):
+    return update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
+
+def _new_user(user: UserCreate, hashed_password: str, is_admin: bool = False) -> User:
+    return User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password,
+        is_active=user.is_active,
+        is_admin=is_admin,
+    )
+
+def _split_password(user_update: UserUpdate) -> Tuple[dict, Optional[str]]:
+    """Campos a actualizar y contraseña en claro (si viene), que cada variante hashea a su modo"""
+    update_data = user_update.dict(exclude_unset=True)
+    return update_data, update_data.pop("password", None)
+
+def _apply_update(db_user: User, update_data: dict, hashed_password: Optional[str] = None):
+    """Aplica los cambios y sube token_version si revocan los tokens emitidos"""
+    if hashed_password is not None:
+        update_data["hashed_password"] = hashed_password
+    if revokes_tokens(db_user, update_data):
+        db_user.token_version = (db_user.token_version or 0) + 1
+    for field, value in update_data.items():
+        setattr(db_user, field, value)
+
+def _apply_admin(db_user: User, is_admin: bool):
+    db_user.is_admin = is_admin
+    db_user.token_version = (db_user.token_version or 0) + 1
 
 class UserCRUD:
     def get_user(self, db: Session, user_id: int) -> Optional[User]:
         """Obtiene un usuario por ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return db.get(User, user_id)
     
-    def get_user_not_admin(self, db: Session, skip: int = 0, limit: int = 100):
-        return db.query(User).filter(User.is_admin == False).offset(skip).limit(limit).all()
+    def get_user_not_admin(self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
+        """Usuarios no admin por id (con `cursor`, desde la página anterior)"""
+        return list(db.scalars(_not_admin_page(skip, limit, cursor)).all())
+
+    def estimate_not_admin_total(self, db: Session) -> Optional[int]:
+        """Total aproximado de usuarios no admin (estimación del planner, sin COUNT)"""
+        return estimate_count(db, db.query(User).filter(User.is_admin == False))
+
+    def next_cursor(self, users: List[User], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente de get_user_not_admin"""
+        return next_cursor(users, limit, lambda u: (u.id,))
     
     def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
         """Obtiene un usuario por email"""
-        return db.query(User).filter(User.email == email).first()
+        return db.scalar(_by_email(email))
     
     def get_user_by_username(self, db: Session, username: str) -> Optional[User]:
         """Obtiene un usuario por username"""
-        return db.query(User).filter(User.username == username).first()
+        return db.scalar(_by_username(username))
     
     def get_user_by_username_or_email(self, db: Session, identifier: str) -> Optional[User]:
         """Obtiene un usuario por username o email"""
-        return db.query(User).filter(
-            or_(User.username == identifier, User.email == identifier)
-        ).first()
+        return db.scalar(_by_username_or_email(identifier))
     
     def get_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Obtiene una lista de usuarios"""
-        return db.query(User).offset(skip).limit(limit).all()
+        return list(db.scalars(_page(skip, limit)).all())
     
     def create_user(self, db: Session, user: UserCreate) -> User:
         """Crea un nuevo usuario"""
-        hashed_password = get_password_hash(user.password)
-        db_user = User(
-            email=user.email,
-            username=user.username,
-            hashed_password=hashed_password,
-            is_active=user.is_active,
-        )
+        db_user = _new_user(user, get_password_hash(user.password))
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
@@ -47,14 +110,7 @@ class UserCRUD:
     
     def create_admin_user(self, db: Session, user: UserCreate) -> User:
         """Crea un nuevo usuario administrador"""
-        hashed_password = get_password_hash(user.password)
-        db_user = User(
-            email=user.email,
-            username=user.username,
-            hashed_password=hashed_password,
-            is_active=user.is_active,
-            is_admin=True,
-        )
+        db_user = _new_user(user, get_password_hash(user.password), is_admin=True)
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
@@ -66,16 +122,32 @@ class UserCRUD:
         if not db_user:
             return None
         
-        update_data = user_update.dict(exclude_unset=True)
-        if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
-        
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        update_data, password = _split_password(user_update)
+        _apply_update(db_user, update_data, get_password_hash(password) if password is not None else None)
         
         db.commit()
+        principal_cache.invalidate(user_id)
         db.refresh(db_user)
         return db_user
+
+    def set_admin(self, db: Session, user_id: int, is_admin: bool) -> Optional[User]:
+        """Otorga o quita permisos de administrador (UserUpdate no expone is_admin)"""
+        db_user = self.get_user(db, user_id)
+        if not db_user:
+            return None
+
+        _apply_admin(db_user, is_admin)
+        db.commit()
+        principal_cache.invalidate(user_id)
+        db.refresh(db_user)
+        return db_user
+
+    def revoke_tokens(self, db: Session, user_id: int) -> bool:
+        """Invalida todos los tokens emitidos hasta ahora (access y refresh)"""
+        result = db.execute(_revoke_statement(user_id))
+        db.commit()
+        principal_cache.invalidate(user_id)
+        return result.rowcount > 0
     
     def delete_user(self, db: Session, user_id: int) -> bool:
         """Elimina un usuario"""
@@ -85,6 +157,7 @@ class UserCRUD:
         
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate(user_id)
         return True
     
     def authenticate_user(self, db: Session, identifier: str, password: str) -> Optional[User]:
@@ -94,4 +167,104 @@ class UserCRUD:
             return None
         return user
 
-user_crud = UserCRUD()
\ No newline at end of file
+
+class AsyncUserCRUD:
+    """Mismas operaciones que UserCRUD sobre AsyncSession, para los endpoints async.
+    UserCRUD se mantiene para el seeder, los scripts y los endpoints síncronos."""
+
+    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Obtiene un usuario por ID"""
+        return await db.get(User, user_id)
+
+    async def get_user_not_admin(self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
+        """Usuarios no admin por id (con `cursor`, desde la página anterior)"""
+        return list((await db.scalars(_not_admin_page(skip, limit, cursor))).all())
+
+    async def estimate_not_admin_total(self, db: AsyncSession) -> Optional[int]:
+        """Total aproximado de usuarios no admin (estimación del planner, sin COUNT)"""
+        return await db.run_sync(user_crud.estimate_not_admin_total)
+
+    def next_cursor(self, users: List[User], limit: int) -> Optional[str]:
+        return user_crud.next_cursor(users, limit)
+
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        """Obtiene un usuario por email"""
+        return await db.scalar(_by_email(email))
+
+    async def get_user_by_username(self, db: AsyncSession, username: str) -> Optional[User]:
+        """Obtiene un usuario por username"""
+        return await db.scalar(_by_username(username))
+
+    async def get_user_by_username_or_email(self, db: AsyncSession, identifier: str) -> Optional[User]:
+        """Obtiene un usuario por username o email"""
+        return await db.scalar(_by_username_or_email(identifier))
+
+    async def create_user(self, db: AsyncSession, user: UserCreate) -> User:
+        """Crea un nuevo usuario"""
+        db_user = _new_user(user, await get_password_hash_async(user.password))
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    async def update_user(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+        """Actualiza un usuario"""
+        db_user = await self.get_user(db, user_id)
+        if not db_user:
+            return None
+
+        update_data, password = _split_password(user_update)
+        _apply_update(db_user, update_data, await get_password_hash_async(password) if password is not None else None)
+
+        await db.commit()
+        principal_cache.invalidate(user_id)
+        await db.refresh(db_user)
+        return db_user
+
+    async def set_admin(self, db: AsyncSession, user_id: int, is_admin: bool) -> Optional[User]:
+        """Otorga o quita permisos de administrador (UserUpdate no expone is_admin)"""
+        db_user = await self.get_user(db, user_id)
+        if not db_user:
+            return None
+
+        _apply_admin(db_user, is_admin)
+        await db.commit()
+        principal_cache.invalidate(user_id)
+        await db.refresh(db_user)
+        return db_user
+
+    async def revoke_tokens(self, db: AsyncSession, user_id: int) -> bool:
+        """Invalida todos los tokens emitidos hasta ahora (access y refresh)"""
+        result = await db.execute(_revoke_statement(user_id))
+        await db.commit()
+        principal_cache.invalidate(user_id)
+        return result.rowcount > 0
+
+    async def delete_user(self, db: AsyncSession, user_id: int) -> bool:
+        """Elimina un usuario"""
+        db_user = await self.get_user(db, user_id)
+        if not db_user:
+            return False
+
+        # DELETE directo: db.delete() cargaría las relaciones (lazy load no disponible en async)
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+        principal_cache.invalidate(user_id)
+        return True
+
+    async def authenticate_user(self, db: AsyncSession, identifier: str, password: str) -> Optional[User]:
+        """Autentica un usuario"""
+        user = await self.get_user_by_username_or_email(db, identifier)
+        if not user:
+            return None
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            # Hash con otro costo de bcrypt: se reemplaza aprovechando la contraseña en claro
+            user.hashed_password = new_hash
+            await db.commit()
+        return user
+
+user_crud = UserCRUD()
+async_user_crud = AsyncUserCRUD()
\ No newline at end of file
@@ -1,18 +1,63 @@
+import threading
+import time
+from typing import Optional
+
+from fastapi import Response
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.db_pool import (
+    InstrumentedAsyncQueuePool, InstrumentedQueuePool, asyncpg_connect_args,
+    pool_options, pool_snapshot, psycopg2_connect_args
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Crear el engine de la base de datos
+# Crear el engine de la base de datos (pool configurable e instrumentado, ver DB_POOL_*)
 engine = create_engine(settings.DATABASE_URL,
-                       pool_pre_ping=True,)
+                       poolclass=InstrumentedQueuePool,
+                       connect_args=psycopg2_connect_args(),
+                       **pool_options())
 
 # Crear la sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Réplica de solo lectura opcional (READ_DATABASE_URL) para analíticas y consultas pesadas
+# del admin; sin réplica, get_read_db usa el primario.
+read_engine = create_engine(settings.READ_DATABASE_URL,
+                            poolclass=InstrumentedQueuePool,
+                            connect_args=psycopg2_connect_args(),
+                            **pool_options()) if settings.READ_DATABASE_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine is not None else None
+
+READ_SOURCE_HEADER = "X-Read-Source"
+REPLICA_LAG_HEADER = "X-Replica-Lag"
+
+# Retraso de replicación: 0 si no está en recovery o ya aplicó todo lo recibido
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_replica_lag = {"checked_at": float("-inf"), "seconds": None}
+_replica_lag_lock = threading.Lock()
+
+# Engine y sesiones async (asyncpg) para los endpoints async: no bloquean el event loop.
+# expire_on_commit=False para poder leer los objetos después del commit sin otra consulta.
+async_engine = create_async_engine(settings.async_database_url,
+                                   poolclass=InstrumentedAsyncQueuePool,
+                                   connect_args=asyncpg_connect_args(),
+                                   **pool_options())
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Crear la base para los modelos
 Base = declarative_base()
 
@@ -42,9 +87,67 @@ def drop_all_tables():
             logger.error(f"Error: {e2}")
             raise
 
+def pool_metrics():
+    """Estado de los pools de este proceso (cada worker de uvicorn tiene los suyos)"""
+    return {
+        "sync": pool_snapshot(engine.pool),
+        "async": pool_snapshot(async_engine.sync_engine.pool),
+        "read": pool_snapshot(read_engine.pool) if read_engine is not None else None,
+    }
+
+def replica_lag_seconds() -> Optional[float]:
+    """Retraso de la réplica en segundos, consultado como máximo cada
+    READ_REPLICA_LAG_CHECK_SECONDS. None si no hay réplica o no responde."""
+    if read_engine is None:
+        return None
+    now = time.monotonic()
+    with _replica_lag_lock:
+        if now - _replica_lag["checked_at"] < settings.READ_REPLICA_LAG_CHECK_SECONDS:
+            return _replica_lag["seconds"]
+    try:
+        with read_engine.connect() as conn:
+            lag = float(conn.execute(text(REPLICA_LAG_SQL)).scalar() or 0.0)
+    except Exception as e:
+        logger.warning(f"Réplica de lectura no disponible, se usa el primario: {e}")
+        lag = None
+    with _replica_lag_lock:
+        _replica_lag.update(checked_at=now, seconds=lag)
+    return lag
+
+def read_db(max_lag_seconds: Optional[float] = None):
+    """Dependencia de sesión de solo lectura.
+
+    Usa la réplica si está configurada, responde y su retraso no supera `max_lag_seconds`
+    (READ_REPLICA_MAX_LAG_SECONDS por defecto); si no, el primario. El origen y el retraso
+    quedan en `db.info` ("read_source", "replica_lag_seconds") y en los headers
+    X-Read-Source / X-Replica-Lag. Una ruta que necesite datos más frescos declara su
+    propio límite: `Depends(read_db(max_lag_seconds=5))`.
+    """
+    def dependency(response: Response):
+        max_lag = settings.READ_REPLICA_MAX_LAG_SECONDS if max_lag_seconds is None else max_lag_seconds
+        lag = replica_lag_seconds()
+        use_replica = lag is not None and lag <= max_lag
+        db = ReadSessionLocal() if use_replica else SessionLocal()
+        db.info["read_source"] = "replica" if use_replica else "primary"
+        db.info["replica_lag_seconds"] = lag
+        response.headers[READ_SOURCE_HEADER] = db.info["read_source"]
+        if lag is not None:
+            response.headers[REPLICA_LAG_HEADER] = f"{lag:.1f}"
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+get_read_db = read_db()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,19 +1,22 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.core.security import verify_token
-from app.crud.user import user_crud
-from app.models.user import User
+from app.crud.user import async_user_crud
+from app.services.principal_cache import UserPrincipal, principal_cache
 
 # Configuración del bearer token
 security = HTTPBearer()
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtiene el usuario actual desde el token JWT"""
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UserPrincipal:
+    """Obtiene el usuario actual desde el token JWT.
+
+    Devuelve un UserPrincipal (id, username, email, is_active, is_admin, current_scene_id)
+    desde la caché; solo abre una sesión cuando el usuario no está en caché o expiró. El
+    claim "ver" debe coincidir con el token_version del usuario.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
@@ -30,20 +33,37 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    # Buscar el usuario en la base de datos
-    user = user_crud.get_user_by_username(db, username=username)
-    if user is None:
+    # uid/ver en los tokens nuevos; los anteriores solo traen el username
+    user_id = payload.get("uid")
+    token_version = payload.get("ver", 0)
+    subject = f"uid:{user_id}" if user_id is not None else username
+
+    principal = principal_cache.get(subject)
+    if principal is None or principal.token_version < token_version:
+        # No está en caché, o la versión cambió en otro proceso después de cachearla
+        async with AsyncSessionLocal() as db:
+            if user_id is not None:
+                user = await async_user_crud.get_user(db, user_id=user_id)
+            else:
+                user = await async_user_crud.get_user_by_username(db, username=username)
+        if user is None:
+            raise credentials_exception
+        principal = UserPrincipal.from_user(user)
+        principal_cache.put(subject, principal)
+
+    # Token emitido antes de un cambio de contraseña, estado o rol: revocado
+    if principal.token_version != token_version:
         raise credentials_exception
-    
-    return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+    return principal
+
+async def get_current_active_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Obtiene el usuario actual activo"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
-async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_admin_user(current_user: UserPrincipal = Depends(get_current_active_user)) -> UserPrincipal:
     """Obtiene el usuario actual si es administrador"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
@@ -6,7 +7,13 @@ import uvicorn
 
 from app.routers import auth, users, admin, chatbot, user_scenes, suggestions, notes, events
 from app.dependencies import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.services.principal_cache import UserPrincipal
+from app.config import settings
+from app.core.security import PasswordHasherBusy
+from app.services.background import background_runner
+from app.services.scene_registry import scene_registry
+from app.services.message_partitions import ensure_message_partitions
+from app.database import SessionLocal, async_engine
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -17,12 +24,21 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Iniciando aplicación...")
     try:
-        pass
+        await background_runner.start()
+        # Particiones de messages para el mes actual y los siguientes
+        background_runner.submit(ensure_message_partitions)
+        db = SessionLocal()
+        try:
+            logger.info(f"Registro de escenas cargado ({scene_registry.load(db)} escenas)")
+        finally:
+            db.close()
     except Exception as e:
         logger.error(f"Error en el procedimiento de inicio: {e}")
     
     yield
     logger.info("Cerrando aplicación...")
+    await background_runner.stop(drain_timeout=settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    await async_engine.dispose()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -39,8 +55,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Estimate", "X-Read-Source", "X-Replica-Lag"],
 )
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Demasiados hashes de contraseña en curso: el cliente debe reintentar"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
+
 # Incluir routers
 for router in [auth, users, admin, chatbot, user_scenes, suggestions, notes, events]:
     app.include_router(router.router)
@@ -56,7 +82,7 @@ async def root():
         }
 
 @app.get("/protected")
-async def protected_route(current_user: User = Depends(get_current_active_user)):
+async def protected_route(current_user: UserPrincipal = Depends(get_current_active_user)):
     """Ruta protegida que requiere autenticación"""
     return {
         "message": f"¡Hola {current_user.username}! Esta es una ruta protegida.",
@@ -69,7 +95,7 @@ async def protected_route(current_user: User = Depends(get_current_active_user))
     }
 
 @app.get("/admin-only")
-async def admin_only_route(current_admin: User = Depends(get_current_admin_user)):
+async def admin_only_route(current_admin: UserPrincipal = Depends(get_current_admin_user)):
     """Ruta que solo pueden acceder los administradores"""
     return {
         "message": f"¡Hola {current_admin.username}! Eres un administrador.",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -13,6 +13,12 @@ class Conversation(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Resumen acumulado de los mensajes que ya no entran en la ventana del prompt
+    summary = Column(Text, nullable=True)
+    summary_message_id = Column(Integer, nullable=True)
+    # Contadores desnormalizados: se actualizan en la misma transacción que inserta los mensajes
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
     
     user = relationship("User", back_populates="conversations")
     scene = relationship("Scene")
@@ -23,22 +29,41 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    # Particionada por mes sobre created_at (migración 0009); la PK debe incluir la clave
+    # de partición y las particiones se crean con app.services.message_partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
     content = Column(Text, nullable=False)
     is_from_user = Column(Boolean, nullable=False, default=True)
     scene_context_id = Column(Integer, ForeignKey("scenes.id"), nullable=True)
     tokens_used = Column(Integer, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     intent_category = Column(String(50), nullable=True)
     intent_confidence = Column(Float, nullable=True)
     intent_keywords = Column(JSON, nullable=True)
     requires_clarification = Column(Boolean, default=False)
+
+    # Métricas de las respuestas del asistente
+    reply_to_id = Column(Integer, nullable=True)  # mensaje del usuario al que responde
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    model_name = Column(String(100), nullable=True)
+    response_time_ms = Column(Integer, nullable=True)
+    stage_latencies = Column(JSON, nullable=True)  # {"retrieval_ms": ..., "llm_ms": ...}
+    cache_hits = Column(JSON, nullable=True)  # ["scene_summary"], ["navigation_fast_path"], []
     
     conversation = relationship("Conversation", back_populates="messages")
     scene_context = relationship("Scene")
-    feedback = relationship("MessageFeedback", back_populates="message", uselist=False)
+    # Sin FK en la BD (la PK de messages es (id, created_at)): el join se declara aquí
+    feedback = relationship(
+        "MessageFeedback",
+        primaryjoin="Message.id == foreign(MessageFeedback.message_id)",
+        back_populates="message",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
     
     def __repr__(self):
         msg_type = "user" if self.is_from_user else "assistant"
@@ -48,15 +73,60 @@ class MessageFeedback(Base):
     __tablename__ = "message_feedback"
     
     id = Column(Integer, primary_key=True, index=True)
-    message_id = Column(Integer, ForeignKey("messages.id"), nullable=False, unique=True)
+    message_id = Column(Integer, nullable=False, unique=True)  # messages.id (sin FK, ver Message.feedback)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_positive = Column(Boolean, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    message = relationship("Message", back_populates="feedback")
+    message = relationship(
+        "Message",
+        primaryjoin="foreign(MessageFeedback.message_id) == Message.id",
+        back_populates="feedback"
+    )
     user = relationship("User")
     
     def __repr__(self):
         feedback_type = "like" if self.is_positive else "dislike"
-        return f"<MessageFeedback(id={self.id}, message_id={self.message_id}, type={feedback_type})>"
\ No newline at end of file
+        return f"<MessageFeedback(id={self.id}, message_id={self.message_id}, type={feedback_type})>"
+
+class ConversationArchive(Base):
+    """Conversación archivada: una fila compacta con todos sus mensajes en JSON.
+
+    Las conversaciones inactivas por ARCHIVE_AFTER_MONTHS se mueven aquí para que `messages`
+    solo conserve las particiones recientes.
+    """
+    __tablename__ = "conversation_archive"
+
+    id = Column(Integer, primary_key=True)  # mismo id que tenía en conversations
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    title = Column(String(255), nullable=True)
+    scene_id = Column(Integer, nullable=True)
+    summary = Column(Text, nullable=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    messages = Column(JSON, nullable=False)  # [{id, is_from_user, content, created_at, ...}]
+
+    def __repr__(self):
+        return f"<ConversationArchive(id={self.id}, user_id={self.user_id}, messages={self.message_count})>"
+
+# Índices de la paginación por cursor (migración 0006)
+Index(
+    "ix_conversations_user_activity",
+    Conversation.user_id,
+    func.coalesce(Conversation.updated_at, Conversation.created_at),
+    Conversation.id
+)
+Index("ix_messages_conversation_created", Message.conversation_id, Message.created_at, Message.id)
+Index("ix_messages_created_id", Message.created_at, Message.id)
+
+# Índices de los filtros del explorador de mensajes del admin (migración 0007)
+Index("ix_messages_intent_created", Message.intent_category, Message.created_at, Message.id)
+Index("ix_messages_scene_created", Message.scene_context_id, Message.created_at, Message.id)
+Index("ix_messages_intent_confidence", Message.intent_confidence)
+
+# Índices de las consultas calientes del chat (migración 0008)
+Index("ix_messages_conversation_id_id", Message.conversation_id, Message.id)
+Index("ix_message_feedback_is_positive", MessageFeedback.is_positive, MessageFeedback.message_id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
@@ -48,4 +48,12 @@ class Event(Base):
     scene = relationship("Scene")
 
     def __repr__(self):
-        return f"<Event(id={self.id}, title='{self.title}', date={self.event_date}, modalidad={self.modalidad})>"
\ No newline at end of file
+        return f"<Event(id={self.id}, title='{self.title}', date={self.event_date}, modalidad={self.modalidad})>"
+
+# Índice de la paginación por cursor de eventos activos (migración 0006)
+Index(
+    "ix_events_active_date",
+    Event.event_date,
+    Event.id,
+    postgresql_where=Event.is_active == True
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, BigInteger, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -34,4 +34,8 @@ class Note(Base):
     
     # Relaciones
     user = relationship("User", back_populates="notes")
-    speciality = relationship("Speciality", back_populates="notes")
\ No newline at end of file
+    speciality = relationship("Speciality", back_populates="notes")
+
+# Índices de la paginación por cursor (migración 0006)
+Index("ix_notes_user_created", Note.User_id, Note.created_at, Note.id)
+Index("ix_notes_created_id", Note.created_at, Note.id)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, DateTime
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.database import Base
 
 
@@ -12,4 +13,25 @@ class Scene(Base):
     is_relevant = Column(Boolean, default=False, index=True)
 
     def __repr__(self):
-        return f"<Scene(id={self.id}, key='{self.scene_key}', name='{self.name}', relevant={self.is_relevant})>"
\ No newline at end of file
+        return f"<Scene(id={self.id}, key='{self.scene_key}', name='{self.name}', relevant={self.is_relevant})>"
+
+
+class SceneSummary(Base):
+    """Resumen precalculado de una escena para responder "¿Qué hay aquí?" sin RAG ni LLM"""
+    __tablename__ = "scene_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scene_id = Column(Integer, ForeignKey("scenes.id", ondelete="CASCADE"), unique=True, nullable=False)
+    summary = Column(Text, nullable=False)
+    source_hash = Column(String(64), nullable=True)
+    is_stale = Column(Boolean, default=False, nullable=False)
+    tokens_used = Column(Integer, nullable=True)
+    # Fecha del próximo evento incluido en el resumen: a partir de ahí deja de ser válido
+    expires_at = Column(DateTime, nullable=True)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    scene = relationship("Scene")
+
+    def __repr__(self):
+        return f"<SceneSummary(scene_id={self.scene_id}, stale={self.is_stale})>"
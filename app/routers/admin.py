@@ -1,59 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.dependencies import get_current_admin_user
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
-from app.crud.user import user_crud
-from app.models.user import User
+from app.crud.user import async_user_crud
+from app.utils.pagination import set_pagination_headers
+from app.services.principal_cache import UserPrincipal
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.get("/users", response_model=List[UserSchema])
 async def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Obtiene todos los usuarios (solo admin)"""
-    users = user_crud.get_user_not_admin(db, skip=skip, limit=limit)
+    """Obtiene todos los usuarios (solo admin). Siguiente página con el cursor de `X-Next-Cursor`"""
+    users = await async_user_crud.get_user_not_admin(db, skip=skip, limit=limit, cursor=cursor)
+    total = await async_user_crud.estimate_not_admin_total(db) if include_total else None
+    set_pagination_headers(response, async_user_crud.next_cursor(users, limit), total)
     return users
 
 @router.post("/users", response_model=UserSchema)
 async def create_user(
     user: UserCreate,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Crea un nuevo usuario (solo admin)"""
     
     # Verificar si el usuario ya existe
-    if user_crud.get_user_by_email(db, email=user.email):
+    if await async_user_crud.get_user_by_email(db, email=user.email):
         raise HTTPException(
             status_code=400,
             detail="El email ya está registrado"
         )
     
-    if user_crud.get_user_by_username(db, username=user.username):
+    if await async_user_crud.get_user_by_username(db, username=user.username):
         raise HTTPException(
             status_code=400,
             detail="El username ya está en uso"
         )
     
     # Crear el usuario
-    db_user = user_crud.create_user(db=db, user=user)
+    db_user = await async_user_crud.create_user(db=db, user=user)
     return db_user
 
 @router.get("/users/{user_id}", response_model=UserSchema)
 async def read_user(
     user_id: int,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene un usuario específico (solo admin)"""
-    user = user_crud.get_user(db, user_id=user_id)
+    user = await async_user_crud.get_user(db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
@@ -62,19 +68,19 @@ async def read_user(
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualiza un usuario (solo admin)"""
     
     # Verificar que el usuario existe
-    existing_user = user_crud.get_user(db, user_id=user_id)
+    existing_user = await async_user_crud.get_user(db, user_id=user_id)
     if not existing_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
     # Verificar que el email no esté en uso por otro usuario
     if user_update.email:
-        email_user = user_crud.get_user_by_email(db, email=user_update.email)
+        email_user = await async_user_crud.get_user_by_email(db, email=user_update.email)
         if email_user and email_user.id != user_id:
             raise HTTPException(
                 status_code=400,
@@ -82,7 +88,7 @@ async def update_user(
             )
     
     if user_update.username:
-        username_user = user_crud.get_user_by_username(db, username=user_update.username)
+        username_user = await async_user_crud.get_user_by_username(db, username=user_update.username)
         if username_user and username_user.id != user_id:
             raise HTTPException(
                 status_code=400,
@@ -90,14 +96,14 @@ async def update_user(
             )
     
     # Actualizar usuario
-    updated_user = user_crud.update_user(db, user_id, user_update)
+    updated_user = await async_user_crud.update_user(db, user_id, user_update)
     return updated_user
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Elimina un usuario (solo admin)"""
     
@@ -109,7 +115,7 @@ async def delete_user(
         )
     
     # Eliminar usuario
-    deleted = user_crud.delete_user(db, user_id)
+    deleted = await async_user_crud.delete_user(db, user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
@@ -118,13 +124,13 @@ async def delete_user(
 @router.put("/users/{user_id}/toggle-admin")
 async def toggle_admin_status(
     user_id: int,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cambia el estado de administrador de un usuario (solo admin)"""
     
     # Obtener el usuario
-    user = user_crud.get_user(db, user_id=user_id)
+    user = await async_user_crud.get_user(db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
@@ -136,8 +142,7 @@ async def toggle_admin_status(
         )
     
     # Cambiar estado de admin
-    user_update = UserUpdate(is_admin=not user.is_admin)
-    updated_user = user_crud.update_user(db, user_id, user_update)
+    updated_user = await async_user_crud.set_admin(db, user_id, is_admin=not user.is_admin)
     
     status_message = "promovido a" if updated_user.is_admin else "removido de"
     return {
@@ -1,45 +1,92 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas.token import Token
+from app.database import get_async_db
+from app.schemas.token import RefreshRequest, Token
 from app.schemas.user import UserLogin, UserCreate, User as UserSchema
-from app.crud.user import user_crud
-from app.core.security import create_access_token
+from app.crud.user import async_user_crud
+from app.core.security import create_user_tokens, verify_token
+from app.dependencies import get_current_user
+from app.services.principal_cache import UserPrincipal
 from app.config import settings
+from app.services.rate_limit import rate_limiter
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def _login_throttle_keys(request: Request, identifier: str):
+    return (
+        (f"login:id:{identifier.strip().lower()}", settings.LOGIN_MAX_ATTEMPTS_PER_IDENTIFIER),
+        (f"login:ip:{_client_ip(request)}", settings.LOGIN_MAX_ATTEMPTS_PER_IP),
+    )
+
+def _throttle(keys, detail: str):
+    window = settings.LOGIN_ATTEMPT_WINDOW_SECONDS
+    for key, limit in keys:
+        allowed, _ = rate_limiter.hit(key, limit, window_seconds=window)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=detail,
+                headers={"Retry-After": str(window)},
+            )
+
+def check_login_throttle(request: Request, identifier: str):
+    """Cuenta el intento y rechaza con 429 si el identificador o la IP superaron su límite.
+    Se evalúa antes de verificar la contraseña: los intentos bloqueados no gastan bcrypt."""
+    _throttle(
+        _login_throttle_keys(request, identifier),
+        "Demasiados intentos de inicio de sesión. Intenta más tarde.",
+    )
+
+def check_register_throttle(request: Request):
+    """Igual que el login para los registros por IP: cada registro hashea una contraseña en el
+    pool acotado, y una ráfaga de altas no debe dejar sin hilos (503) a los logins."""
+    _throttle(
+        ((f"register:ip:{_client_ip(request)}", settings.REGISTER_MAX_PER_IP),),
+        "Demasiados registros desde esta dirección. Intenta más tarde.",
+    )
+
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Registro de nuevos usuarios"""
     
+    check_register_throttle(request)
+
     # Verificar si el usuario ya existe
-    if user_crud.get_user_by_email(db, email=user.email):
+    if await async_user_crud.get_user_by_email(db, email=user.email):
         raise HTTPException(
             status_code=400,
             detail="El email ya está registrado"
         )
     
-    if user_crud.get_user_by_username(db, username=user.username):
+    if await async_user_crud.get_user_by_username(db, username=user.username):
         raise HTTPException(
             status_code=400,
             detail="El username ya está en uso"
         )
     
     # Crear el usuario
-    db_user = user_crud.create_user(db=db, user=user)
+    db_user = await async_user_crud.create_user(db=db, user=user)
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(
+    user_credentials: UserLogin,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
     
     """Login de usuarios"""
     
+    check_login_throttle(request, user_credentials.username)
+
     # Autenticar usuario
-    user = user_crud.authenticate_user(
+    user = await async_user_crud.authenticate_user(
         db, user_credentials.username, user_credentials.password
     )
     
@@ -56,19 +103,49 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Usuario inactivo"
         )
     
-    # Crear token de acceso
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    # Login correcto: se liberan los intentos del identificador (los de la IP siguen contando)
+    rate_limiter.reset(_login_throttle_keys(request, user_credentials.username)[0][0])
+
+    return _token_response(user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_token(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Emite un access token nuevo a partir de un refresh token (sin contraseña ni bcrypt)"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o revocado",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    
+    payload = verify_token(body.refresh_token, token_type="refresh")
+    if payload is None or payload.get("uid") is None:
+        raise credentials_exception
+
+    user = await async_user_crud.get_user(db, user_id=payload["uid"])
+    if not user or not user.is_active or (user.token_version or 0) != payload.get("ver", 0):
+        raise credentials_exception
+
+    return _token_response(user)
+
+@router.post("/logout-all")
+async def logout_all(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoca todos los tokens (access y refresh) emitidos para el usuario actual"""
+    await async_user_crud.revoke_tokens(db, current_user.id)
+    return {"message": "Sesiones cerradas correctamente"}
+
+def _token_response(user) -> dict:
+    # Claims firmados: sub, uid, role y ver (token_version) para revocar por versión
+    access_token, refresh_token = create_user_tokens(user)
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "refresh_token": refresh_token,
         "user": {
             "id": user.id,
             "username": user.username,
             "email": user.email,
             "is_admin": user.is_admin
         }
-    }
\ No newline at end of file
+    }
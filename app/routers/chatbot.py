@@ -1,39 +1,64 @@
+import os
 import time
+from datetime import datetime
 from typing import List, Optional
 import re
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func, case
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db, pool_metrics
 from app.models.user import User
+from app.services.principal_cache import UserPrincipal
 from app.models.chat import Conversation, Message
 
 from app.schemas.chat import (
     Conversation as ConversationSchema, ConversationSimple, ConversationCreate, ConversationUpdate,
     ChatMessage, ChatResponse, MessageFeedbackCreate, MessageFeedback,
-    ChatStats
+    ChatStats, ChatBatchRequest, ChatBatchResponse
 )
 from app.crud.chat import conversation_crud, message_crud, feedback_crud, stats_crud
 from app.crud.user import user_crud
-from app.crud.scene import scene_crud
+from app.services.scene_registry import scene_registry
+from app.utils.pagination import set_pagination_headers
+from app.services.message_partitions import (
+    archive_inactive_conversations, ensure_message_partitions, list_message_partitions
+)
+from app.services.exports import (
+    CONVERSATION_EXPORT_FIELDS, MESSAGE_EXPORT_FIELDS, conversation_export_query,
+    message_export_query, stream_export_rows, to_csv, to_ndjson
+)
+from app.crud.scene_summary import scene_summary_crud
+from app.schemas.scene import SceneSummary as SceneSummarySchema
 
 from app.services.chatbot import (
     validate_message_content, check_rate_limit, generate_ai_response,
     get_or_create_conversation, handle_clarification_response, retrieve_knowledge_context,
-    get_scene_context, get_conversation_history, handle_navigation_if_needed
+    get_scene_context, get_conversation_history, handle_navigation_if_needed,
+    resolve_navigation_fast_path, handle_direct_response,
+    build_user_message_values, persist_chat_turn, build_conversation_page
+)
+from app.services.scene_summaries import (
+    should_serve_scene_summary, get_servable_summary, regenerate_scene_summaries,
+    request_scene_summary_refresh
 )
 from app.services.intent_detector import IntentDetector
+from app.services.chat_batch import answer_question_batch
+from app.services.conversation_summaries import update_conversation_summary
+from app.services.background import background_runner
+from app.services.resilience import auxiliary_breaker, chat_breaker, embedding_breaker
 from app.dependencies import get_current_active_user, get_current_admin_user
 
 router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
 
 # API ENDPOINTS
 @router.post("/message", response_model=ChatResponse, response_model_exclude_none=True)
-async def send_message(
+def send_message(
     message: ChatMessage,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -50,12 +75,36 @@ async def send_message(
     if not rate_ok:
         raise HTTPException(status_code=429, detail=rate_msg) 
     
+    scene_id = None
+    if message.scene_context:
+        scene = scene_registry.get_by_key(db, message.scene_context)
+        if scene:
+            scene_id = scene.id
+
+    # Ruta rápida: navegación pura resuelta con el grafo de escenas, sin embeddings ni LLM
+    fast_path = resolve_navigation_fast_path(db, message.content, message.scene_context)
+
     conversation, is_new_conversation = get_or_create_conversation(
         db=db,
         message=message,
-        current_user=current_user
+        current_user=current_user,
+        title=fast_path["title"] if fast_path else None
     )
 
+    if fast_path:
+        return handle_direct_response(
+            db=db,
+            conversation=conversation,
+            user_values=build_user_message_values(
+                message.content.strip(), scene_id, dict(fast_path["intent"], requires_clarification=False)
+            ),
+            content=fast_path["content"],
+            is_new_conversation=is_new_conversation,
+            start_time=start_time,
+            navigation_data=fast_path["navigation"],
+            cache_hit="navigation_fast_path"
+        )
+
     intent_result = IntentDetector.detect_intent(message.content)
     try:
         message_text = (message.content or "").strip().lower()
@@ -70,34 +119,37 @@ async def send_message(
     except Exception:
         pass
     
-    # Crear mensaje del usuario
-    user_message = message_crud.create_user_message_with_intent(
-        db=db,
-        content=message.content.strip(),
-        conversation_id=conversation.id,
-        scene_context=message.scene_context,
-        intent_category=intent_result["category"],
-        intent_confidence=intent_result["confidence"],
-        intent_keywords=intent_result["keywords_found"],
-        requires_clarification=intent_result["requires_clarification"]
-    )
+    # Mensaje del usuario: se guarda junto con la respuesta, en una sola transacción
+    user_values = build_user_message_values(message.content.strip(), scene_id, intent_result)
     
     if intent_result["requires_clarification"]:
         return handle_clarification_response(
             db=db,
             conversation=conversation,
-            user_message=user_message,
+            user_values=user_values,
             intent_result=intent_result,
-            message=message,
             is_new_conversation=is_new_conversation,
             start_time=start_time
         )
-    scene_id = None
-    if message.scene_context:
-        scene = scene_crud.get_scene_by_key(db, message.scene_context)
-        if scene:
-            scene_id = scene.id
 
+    # "¿Qué hay aquí?": responder con el resumen precalculado de la escena
+    if should_serve_scene_summary(intent_result, message.content, message.scene_context):
+        scene_summary = get_servable_summary(db, scene_id)
+        if scene_summary:
+            return handle_direct_response(
+                db=db,
+                conversation=conversation,
+                user_values=user_values,
+                content=scene_summary.summary,
+                is_new_conversation=is_new_conversation,
+                start_time=start_time,
+                cache_hit="scene_summary"
+            )
+        if scene_id:
+            # Sin resumen vigente: se responde en vivo y se regenera en segundo plano
+            request_scene_summary_refresh(scene_id)
+
+    stage_start = time.perf_counter()
     retrieved_context = retrieve_knowledge_context(
         db=db,
         query=message.content.strip(),
@@ -112,87 +164,83 @@ async def send_message(
     else:
         retrieved_context_text = retrieved_context
 
+    stage_latencies = {"retrieval_ms": int((time.perf_counter() - stage_start) * 1000)}
+
+    stage_start = time.perf_counter()
     scene_context = get_scene_context(db, scene_id)
-    conversation_history = get_conversation_history(db, conversation.id)
+    conversation_history = get_conversation_history(db, conversation.id, since=conversation.created_at)
+    stage_latencies["history_ms"] = int((time.perf_counter() - stage_start) * 1000)
     
-    bot_response, tokens_used = generate_ai_response(
+    stage_start = time.perf_counter()
+    bot_response, usage = generate_ai_response(
         user_message=message.content.strip(),
         scene_context=scene_context,
         conversation_history=conversation_history,
-        retrieved_context=retrieved_context_text
+        retrieved_context=retrieved_context_text,
+        conversation_summary=conversation.summary if settings.CONVERSATION_SUMMARY_ENABLED else None
     )
-    
-    # Crear mensaje del asistente
-    assistant_message = message_crud.create_assistant_message(
-        db, bot_response, conversation.id, message.scene_context, tokens_used
-    )
-
-    # Obtener scene_id desde scene_context si existe
-    scene_id = None
-    if message.scene_context:
-        scene = scene_crud.get_scene_by_key(db, message.scene_context)
-        if scene:
-            scene_id = scene.id
+    stage_latencies["llm_ms"] = int((time.perf_counter() - stage_start) * 1000)
 
-    navigation_data = handle_navigation_if_needed(
+    navigation_data, bot_response = handle_navigation_if_needed(
         db=db,
         intent_category=intent_result["category"],
         message_content=message.content,
         scene_context=message.scene_context,
-        assistant_message=assistant_message,
+        response_text=bot_response,
         intent_all_matches=intent_result.get("all_matches")
     )
-    
-    conversation_crud.update_conversation(db, conversation.id, ConversationUpdate())
-    response_time_ms = int((time.time() - start_time) * 1000)
-    
-    conversation_simple = ConversationSimple(
-        id=conversation.id,
-        title=conversation.title,
-        scene_id=conversation.scene_id,
-        is_active=conversation.is_active,
-        user_id=conversation.user_id,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at
-    )
-    def _message_to_dict(msg: Message) -> dict:
-        return {
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "content": msg.content,
-            "is_from_user": msg.is_from_user,
-            "scene_context": msg.scene_context.scene_key if getattr(msg, "scene_context", None) else None,
-            "tokens_used": msg.tokens_used,
-            "created_at": msg.created_at,
-            "feedback": None,
-            "intent_category": getattr(msg, "intent_category", None),
-            "intent_confidence": getattr(msg, "intent_confidence", None),
-            "intent_keywords": getattr(msg, "intent_keywords", None),
-            "requires_clarification": getattr(msg, "requires_clarification", None)
-        }
-
-    return ChatResponse(
-        user_message=_message_to_dict(user_message),
-        assistant_message=_message_to_dict(assistant_message),
-        conversation=conversation_simple,
+
+    response = persist_chat_turn(
+        db=db,
+        conversation=conversation,
+        user_values=user_values,
+        assistant_values={
+            "content": bot_response,
+            "scene_context_id": scene_id,
+            "tokens_used": usage.total_tokens if usage else None,
+            "prompt_tokens": usage.prompt_tokens if usage else None,
+            "completion_tokens": usage.completion_tokens if usage else None,
+            "model_name": usage.model if usage else None,
+            "stage_latencies": stage_latencies,
+            "cache_hits": []
+        },
         is_new_conversation=is_new_conversation,
-        navigation=navigation_data,
-        response_time_ms=response_time_ms
+        start_time=start_time,
+        navigation_data=navigation_data
     )
 
+    if settings.CONVERSATION_SUMMARY_ENABLED:
+        background_runner.submit(update_conversation_summary, conversation.id)
+
+    return response
+
+@router.post("/batch", response_model=ChatBatchResponse, response_model_exclude_none=True)
+async def send_batch(
+    request: ChatBatchRequest,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Responder varias preguntas de una escena en una sola petición (kioscos / precarga).
+    Los errores se informan por pregunta en `items[].error`.
+    """
+    return await answer_question_batch(db, request, current_user)
+
 @router.get("/conversations", response_model=List[ConversationSimple])
-async def get_my_conversations(
+def get_my_conversations(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener mis conversaciones"""
-    conversations = conversation_crud.get_user_conversations(db, current_user.id, skip, limit)
+    """Obtener mis conversaciones. La siguiente página se pide con el cursor de `X-Next-Cursor`"""
+    conversations = conversation_crud.get_user_conversations(db, current_user.id, skip, limit, cursor=cursor)
+    set_pagination_headers(response, conversation_crud.next_cursor(conversations, limit))
     
     conversations_simple = []
     for conv in conversations:
-        message_count = len(conv.messages)
         conv_simple = ConversationSimple(
             id=conv.id,
             title=conv.title,
@@ -201,57 +249,35 @@ async def get_my_conversations(
             user_id=conv.user_id,
             created_at=conv.created_at,
             updated_at=conv.updated_at,
-            message_count=message_count
+            message_count=conv.message_count,
+            last_message_at=conv.last_message_at
         )
         conversations_simple.append(conv_simple)
     
     return conversations_simple
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationSchema)
-async def get_conversation_details(
+def get_conversation_details(
     conversation_id: int,
-    current_user: User = Depends(get_current_active_user),
+    before: Optional[int] = None,
+    limit: int = settings.CONVERSATION_PAGE_SIZE,
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener detalles de una conversación específica con todos sus mensajes"""
+    """Obtener una conversación con sus mensajes más recientes.
+    Los anteriores se piden con `?before=<next_before>`."""
     conversation = conversation_crud.get_conversation(db, conversation_id)
     
     if not conversation or conversation.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Conversación no encontrada")
-    def _message_to_dict(msg: Message) -> dict:
-        return {
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "content": msg.content,
-            "is_from_user": msg.is_from_user,
-            "scene_context": msg.scene_context.scene_key if getattr(msg, "scene_context", None) else None,
-            "tokens_used": msg.tokens_used,
-            "created_at": msg.created_at,
-            "feedback": None,
-            "intent_category": getattr(msg, "intent_category", None),
-            "intent_confidence": getattr(msg, "intent_confidence", None),
-            "intent_keywords": getattr(msg, "intent_keywords", None),
-            "requires_clarification": getattr(msg, "requires_clarification", None)
-        }
-
-    conversation_dict = {
-        "id": conversation.id,
-        "title": conversation.title,
-        "scene_id": conversation.scene_id,
-        "is_active": conversation.is_active,
-        "user_id": conversation.user_id,
-        "created_at": conversation.created_at,
-        "updated_at": conversation.updated_at,
-        "messages": [_message_to_dict(m) for m in conversation.messages]
-    }
 
-    return conversation_dict
+    return build_conversation_page(db, conversation, limit, before_id=before)
 
 @router.post("/messages/{message_id}/feedback", response_model=MessageFeedback)
-async def create_message_feedback(
+def create_message_feedback(
     message_id: int,
     feedback: MessageFeedbackCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Dar feedback (like/dislike) a un mensaje del asistente"""
@@ -272,19 +298,128 @@ async def create_message_feedback(
 
 # API ENDPOINTS - ADMIN
 @router.get("/admin/stats", response_model=ChatStats)
-async def get_chat_statistics(
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+def get_chat_statistics(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener estadísticas generales del sistema de chat"""
     return stats_crud.get_chat_stats(db)
 
+@router.get("/admin/analytics/performance")
+def get_performance_analytics(
+    group_by: str = "day",
+    days: int = 30,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
+):
+    """Latencia p50/p95/p99 y tokens/gasto de las respuestas, por día, escena o intención"""
+    if group_by not in ("day", "scene", "intent"):
+        raise HTTPException(status_code=400, detail="group_by debe ser 'day', 'scene' o 'intent'")
+    return {
+        "group_by": group_by,
+        "days": days,
+        "rows": stats_crud.get_performance_stats(db, group_by=group_by, days=days)
+    }
+
+@router.get("/admin/llm/status")
+async def get_llm_status(
+    current_admin: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Estado de los circuit breakers del LLM (chat, títulos/resúmenes y embeddings)"""
+    return {
+        "breakers": [chat_breaker.snapshot(), auxiliary_breaker.snapshot(), embedding_breaker.snapshot()]
+    }
+
+@router.get("/admin/background/status")
+async def get_background_status(
+    current_admin: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Cola y métricas de las tareas en segundo plano"""
+    return background_runner.snapshot()
+
+@router.get("/admin/db/pool")
+async def get_db_pool_status(
+    current_admin: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Conexiones en uso, esperas y overflow de los pools de este worker"""
+    return {
+        "pid": os.getpid(),
+        "application_name": settings.DB_APPLICATION_NAME,
+        "pools": pool_metrics(),
+    }
+
+@router.get("/admin/messages/partitions")
+def get_message_partitions(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Particiones mensuales de `messages` con sus filas estimadas"""
+    return {"partitions": list_message_partitions(db)}
+
+@router.post("/admin/messages/archive")
+def run_message_archive(
+    months: int = settings.ARCHIVE_AFTER_MONTHS,
+    current_admin: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Archivar en segundo plano las conversaciones sin actividad en `months` meses
+    y crear las particiones de los próximos meses"""
+    if months < 1:
+        raise HTTPException(status_code=400, detail="months debe ser al menos 1")
+    queued = background_runner.submit(archive_inactive_conversations, months=months)
+    background_runner.submit(ensure_message_partitions)
+    return {"queued": queued, "months": months}
+
+@router.get("/admin/scene-summaries", response_model=List[SceneSummarySchema])
+def get_scene_summaries(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Resúmenes precalculados de las escenas (respuesta a "¿Qué hay aquí?")"""
+    return [
+        SceneSummarySchema(
+            scene_id=summary.scene_id,
+            scene_key=summary.scene.scene_key,
+            scene_name=summary.scene.name,
+            summary=summary.summary,
+            is_stale=summary.is_stale,
+            tokens_used=summary.tokens_used,
+            expires_at=summary.expires_at,
+            generated_at=summary.generated_at,
+            updated_at=summary.updated_at
+        )
+        for summary in scene_summary_crud.get_all(db)
+    ]
+
+@router.post("/admin/scene-summaries/regenerate")
+def regenerate_scene_summaries_endpoint(
+    scene_key: Optional[str] = None,
+    force: bool = False,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Regenera en segundo plano los resúmenes de escena (todas o una sola con `scene_key`)"""
+    scene_ids = None
+    if scene_key:
+        scene = scene_registry.get_by_key(db, scene_key)
+        if not scene:
+            raise HTTPException(status_code=404, detail="Escena no encontrada")
+        scene_ids = [scene.id]
+
+    background_runner.submit(regenerate_scene_summaries, scene_ids, force=force)
+    return {
+        "message": "Regeneración de resúmenes programada",
+        "scene_key": scene_key,
+        "force": force
+    }
+
 @router.get("/admin/users/{user_id}/conversations", response_model=List[ConversationSimple])
-async def get_user_conversations_admin(
+def get_user_conversations_admin(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_admin: User = Depends(get_current_admin_user),
+    cursor: Optional[str] = None,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Ver todas las conversaciones de un usuario específico (solo admin)"""
@@ -293,11 +428,11 @@ async def get_user_conversations_admin(
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    conversations = conversation_crud.get_user_conversations(db, user_id, skip, limit)
+    conversations = conversation_crud.get_user_conversations(db, user_id, skip, limit, cursor=cursor)
+    set_pagination_headers(response, conversation_crud.next_cursor(conversations, limit))
     
     conversations_simple = []
     for conv in conversations:
-        message_count = len(conv.messages)
         conv_simple = ConversationSimple(
             id=conv.id,
             title=conv.title,
@@ -306,20 +441,23 @@ async def get_user_conversations_admin(
             user_id=conv.user_id,
             created_at=conv.created_at,
             updated_at=conv.updated_at,
-            message_count=message_count
+            message_count=conv.message_count,
+            last_message_at=conv.last_message_at
         )
         conversations_simple.append(conv_simple)
     
     return conversations_simple
 
 @router.get("/admin/users/{user_id}/conversations/{conversation_id}/messages", response_model=ConversationSchema, response_model_exclude_none=True)
-async def get_user_conversation_with_messages(
+def get_user_conversation_with_messages(
     user_id: int,
     conversation_id: int,
-    current_admin: User = Depends(get_current_admin_user),
+    before: Optional[int] = None,
+    limit: int = settings.CONVERSATION_PAGE_SIZE,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Ver conversación específica de un usuario con TODOS sus mensajes (solo admin)."""
+    """Ver conversación específica de un usuario con sus mensajes, paginados con `?before=` (solo admin)."""
     
     user = user_crud.get_user(db, user_id)
     if not user:
@@ -332,39 +470,12 @@ async def get_user_conversation_with_messages(
     if conversation.user_id != user_id:
         raise HTTPException(status_code=400, detail="Esta conversación no pertenece al usuario especificado")
 
-    def _message_to_dict(msg: Message) -> dict:
-        return {
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "content": msg.content,
-            "is_from_user": msg.is_from_user,
-            "scene_context": msg.scene_context.scene_key if getattr(msg, "scene_context", None) else None,
-            "tokens_used": msg.tokens_used,
-            "created_at": msg.created_at,
-            "feedback": None,
-            "intent_category": getattr(msg, "intent_category", None),
-            "intent_confidence": getattr(msg, "intent_confidence", None),
-            "intent_keywords": getattr(msg, "intent_keywords", None),
-            "requires_clarification": getattr(msg, "requires_clarification", None)
-        }
-
-    conversation_dict = {
-        "id": conversation.id,
-        "title": conversation.title,
-        "scene_id": conversation.scene_id,
-        "is_active": conversation.is_active,
-        "user_id": conversation.user_id,
-        "created_at": conversation.created_at,
-        "updated_at": conversation.updated_at,
-        "messages": [_message_to_dict(m) for m in conversation.messages]
-    }
-
-    return conversation_dict
+    return build_conversation_page(db, conversation, limit, before_id=before)
 
 @router.get("/admin/analytics/overview")
-async def get_chat_analytics(
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+def get_chat_analytics(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Analíticas básicas del sistema de chat"""
     
@@ -400,11 +511,11 @@ async def get_chat_analytics(
     }
 
 @router.get("/admin/intents/by-category/{category}")
-async def get_messages_by_intent_category(
+def get_messages_by_intent_category(
     category: str,
     limit: int = 50,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener mensajes filtrados por categoría de intención"""
     
@@ -427,11 +538,11 @@ async def get_messages_by_intent_category(
     }
 
 @router.get("/admin/intents/low-confidence")
-async def get_low_confidence_intents(
+def get_low_confidence_intents(
     threshold: float = 0.6,
     limit: int = 20,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener mensajes con baja confianza en detección"""
     
@@ -458,101 +569,137 @@ async def get_low_confidence_intents(
     }
 
 @router.get("/admin/messages")
-async def get_all_messages_admin(
+def get_all_messages_admin(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     scene_context: Optional[str] = None,
     intent_category: Optional[str] = None,
     min_confidence: Optional[float] = None,
     only_user_messages: bool = True,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtener todos los mensajes con sus intenciones y métricas (admin).
+    Paginación por cursor (`next_cursor` / `X-Next-Cursor`); el total es una estimación del
+    planner (solo en la primera página) salvo que se pida `exact_total=true`.
     """
-    
-    # Consulta base
-    query = db.query(
-        Message,
-        User.username.label('username'),
-        Conversation.title.label('conversation_title')
-    ).join(
-        Conversation, Message.conversation_id == Conversation.id
-    ).join(
-        User, Conversation.user_id == User.id
-    )
-    
-    # Aplicar filtros
-    if only_user_messages:
-        query = query.filter(Message.is_from_user == True)
-    
-    # Filtrar por scene_key si se proporciona
+    # Filtrar por scene_key si se proporciona (una key desconocida no filtra)
+    scene_id = None
     if scene_context is not None:
-        scene = scene_crud.get_scene_by_key(db, scene_context)
+        scene = scene_registry.get_by_key(db, scene_context)
         scene_id = scene.id if scene else None
-        if scene_id is not None:
-            query = query.filter(Message.scene_context_id == scene_id)
-    
-    if intent_category:
-        query = query.filter(Message.intent_category == intent_category)
-    
-    if min_confidence is not None:
-        query = query.filter(Message.intent_confidence >= min_confidence)
-    
-    # Contar total antes de paginar
-    total_count = query.count()
-    
-    # Aplicar ordenamiento y paginación
-    messages = query.order_by(desc(Message.created_at)).offset(skip).limit(limit).all()
-    
-    # Estadísticas de intenciones para los mensajes filtrados
-    intent_stats = db.query(
-        Message.intent_category,
-        func.count(Message.id).label('count'),
-        func.avg(Message.intent_confidence).label('avg_confidence')
-    ).filter(
-        Message.id.in_([msg[0].id for msg in messages]),
-        Message.intent_category.isnot(None)
-    ).group_by(Message.intent_category).all()
+
+    result = stats_crud.explore_messages(
+        db,
+        limit=limit,
+        skip=skip,
+        cursor=cursor,
+        exact_total=exact_total,
+        scene_id=scene_id,
+        intent_category=intent_category,
+        min_confidence=min_confidence,
+        only_user_messages=only_user_messages
+    )
+    messages = result["rows"]
+    set_pagination_headers(response, result["next_cursor"], result["total"])
     
     return {
-        "total_messages": total_count,
+        "total_messages": result["total"],
+        "total_is_estimate": not exact_total,
         "showing": len(messages),
         "skip": skip,
         "limit": limit,
-        "intent_statistics": [
-            {
-                "category": stat[0],
-                "count": stat[1],
-                "avg_confidence": round(float(stat[2] or 0), 2)
-            }
-            for stat in intent_stats
-        ],
+        "next_cursor": result["next_cursor"],
+        "intent_statistics": result["intent_statistics"],
         "messages": [
             {
-                "id": msg[0].id,
-                "content": msg[0].content,
-                "username": msg[1],
-                "conversation_title": msg[2],
-                "scene_context": msg[0].scene_context.scene_key if msg[0].scene_context else None,
-                "is_from_user": msg[0].is_from_user,
-                "intent_category": msg[0].intent_category,
-                "intent_confidence": msg[0].intent_confidence,
-                "intent_keywords": msg[0].intent_keywords,
-                "requires_clarification": msg[0].requires_clarification,
-                "tokens_used": msg[0].tokens_used,
-                "created_at": msg[0].created_at
+                "id": msg.id,
+                "content": msg.content,
+                "username": msg.username,
+                "conversation_title": msg.conversation_title,
+                "scene_context": msg.scene_context,
+                "is_from_user": msg.is_from_user,
+                "intent_category": msg.intent_category,
+                "intent_confidence": msg.intent_confidence,
+                "intent_keywords": msg.intent_keywords,
+                "requires_clarification": msg.requires_clarification,
+                "tokens_used": msg.tokens_used,
+                "created_at": msg.created_at
             }
             for msg in messages
         ]
     }
 
 
-@router.get("/admin/analytics/feedback-overview")
-async def get_feedback_overview(
-    current_admin: User = Depends(get_current_admin_user),
+def _export_response(rows, fields, export_format: str, name: str) -> StreamingResponse:
+    """StreamingResponse NDJSON o CSV para las exportaciones del admin"""
+    if export_format == "csv":
+        return StreamingResponse(
+            to_csv(rows, fields),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{name}.csv"'}
+        )
+    return StreamingResponse(
+        to_ndjson(rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}.ndjson"'}
+    )
+
+
+@router.get("/admin/export/messages")
+def export_messages_admin(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    scene_context: Optional[str] = None,
+    only_user_messages: bool = False,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
+):
+    """
+    Exportar mensajes (con intención, métricas y feedback) como NDJSON o CSV (admin).
+    Se envían en streaming con un cursor del servidor: no hay límite de filas.
+    """
+    scene = scene_registry.get_by_key(db, scene_context)
+    if scene_context and not scene:
+        raise HTTPException(status_code=404, detail="Escena no encontrada")
+    scene_id = scene.id if scene else None
+
+    rows = stream_export_rows(
+        lambda export_db: message_export_query(export_db, start, end, scene_id, only_user_messages)
+    )
+    return _export_response(rows, MESSAGE_EXPORT_FIELDS, export_format, "messages")
+
+
+@router.get("/admin/export/conversations")
+def export_conversations_admin(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    scene_context: Optional[str] = None,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Exportar conversaciones (con contadores de mensajes) como NDJSON o CSV (admin)"""
+    scene = scene_registry.get_by_key(db, scene_context)
+    if scene_context and not scene:
+        raise HTTPException(status_code=404, detail="Escena no encontrada")
+    scene_id = scene.id if scene else None
+
+    rows = stream_export_rows(
+        lambda export_db: conversation_export_query(export_db, start, end, scene_id)
+    )
+    return _export_response(rows, CONVERSATION_EXPORT_FIELDS, export_format, "conversations")
+
+
+@router.get("/admin/analytics/feedback-overview")
+def get_feedback_overview(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """KPIs generales sobre feedback (likes/dislikes)"""
     # Compute using MessageFeedback model
@@ -571,9 +718,9 @@ async def get_feedback_overview(
 
 
 @router.get("/admin/analytics/feedback-by-scene")
-async def get_feedback_by_scene(
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+def get_feedback_by_scene(
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """KPIs: número de feedbacks por escena y tasa positiva por escena"""
     from app.models.chat import MessageFeedback, Message
@@ -614,10 +761,10 @@ async def get_feedback_by_scene(
 
 
 @router.get("/admin/analytics/top-feedback-messages")
-async def get_top_feedback_messages(
+def get_top_feedback_messages(
     limit: int = 10,
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Listar mensajes con más feedback (por ejemplo, favorables o desfavorables).
     Nota: el esquema actual limita un feedback por mensaje. Si cambias eso, esta query funcionará con agregaciones.
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.dependencies import get_current_admin_user
-from app.models.user import User
+from app.services.principal_cache import UserPrincipal
 from app.schemas.event import EventCreate, EventResponse, EventUpdate
 from app.crud.event import event_crud
+from app.utils.pagination import set_pagination_headers
+from app.services.background import background_runner
+from app.services.scene_summaries import regenerate_scene_summaries
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
@@ -14,21 +17,28 @@ router = APIRouter(prefix="/events", tags=["Events"])
 @router.post("/", response_model=EventResponse)
 def create_event(
     event: EventCreate,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Crear evento (admin)"""
-    return event_crud.create_event(db, event)
+    created = event_crud.create_event(db, event)
+    # Los resúmenes de escena afectados quedaron marcados como desactualizados
+    background_runner.submit(regenerate_scene_summaries)
+    return created
 
 
 @router.get("/", response_model=List[EventResponse])
 def get_events(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Obtener todos los eventos"""
-    return event_crud.get_all_events(db, skip, limit)
+    """Obtener todos los eventos (siguiente página con el cursor de `X-Next-Cursor`)"""
+    events = event_crud.get_all_events(db, skip, limit, cursor=cursor)
+    set_pagination_headers(response, event_crud.next_cursor(events, limit))
+    return events
 
 
 @router.get("/{event_id}", response_model=EventResponse)
@@ -47,24 +57,26 @@ def get_event(
 def update_event(
     event_id: int,
     event_update: EventUpdate,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Actualizar evento (admin)"""
     updated = event_crud.update_event(db, event_id, event_update)
     if not updated:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
+    background_runner.submit(regenerate_scene_summaries)
     return updated
 
 
 @router.delete("/{event_id}")
 def delete_event(
     event_id: int,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Eliminar evento (admin)"""
     success = event_crud.delete_event(db, event_id)
     if not success:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
+    background_runner.submit(regenerate_scene_summaries)
     return {"message": "Evento eliminado"}
\ No newline at end of file
@@ -1,19 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.dependencies import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.services.principal_cache import UserPrincipal
 from app.schemas.note import NoteCreate, NoteResponse, NoteUpdate, NoteStats
 from app.crud.note import note_crud
+from app.utils.pagination import set_pagination_headers
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
 @router.post("/", response_model=NoteResponse)
 def create_note(
     note: NoteCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Crear nueva nota/cita"""
@@ -22,19 +23,23 @@ def create_note(
 
 @router.get("/my-notes", response_model=List[NoteResponse])
 def get_my_notes(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener mis notas/citas"""
-    return note_crud.get_user_notes(db, current_user.id, skip, limit)
+    """Obtener mis notas/citas (siguiente página con el cursor de `X-Next-Cursor`)"""
+    notes = note_crud.get_user_notes(db, current_user.id, skip, limit, cursor=cursor)
+    set_pagination_headers(response, note_crud.next_cursor(notes, limit))
+    return notes
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
 def get_note(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Obtener nota específica"""
@@ -50,20 +55,26 @@ def get_note(
 
 @router.get("/admin/all", response_model=List[NoteResponse])
 def get_all_notes(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_admin: User = Depends(get_current_admin_user),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener todas las notas (admin)"""
-    return note_crud.get_all_notes(db, skip, limit)
+    """Obtener todas las notas (admin). Con `include_total` agrega `X-Total-Estimate`"""
+    notes = note_crud.get_all_notes(db, skip, limit, cursor=cursor)
+    total = note_crud.estimate_total(db) if include_total else None
+    set_pagination_headers(response, note_crud.next_cursor(notes, limit), total)
+    return notes
 
 
 @router.patch("/admin/{note_id}", response_model=NoteResponse)
 def update_note(
     note_id: int,
     note_update: NoteUpdate,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Actualizar nota (admin)"""
@@ -75,15 +86,15 @@ def update_note(
 
 @router.get("/admin/stats", response_model=NoteStats)
 def get_notes_stats(
-    current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener estadísticas de notas (admin)"""
     return note_crud.get_stats(db)
 
 @router.get("/admin/today", response_model=List[NoteResponse])
 def get_today_appointments(
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: UserPrincipal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Obtener citas programadas para hoy (admin)"""
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.crud.scene import scene_crud
+from app.services.scene_registry import scene_registry
 from app.crud.event import event_crud
 
 router = APIRouter(prefix="/suggestions", tags=["Suggestions"])
@@ -64,7 +64,7 @@ def get_suggestions(scene_context: str = None, db: Session = Depends(get_db)):
     """
     scene = None
     if scene_context:
-        scene = scene_crud.get_scene_by_key(db, scene_context)
+        scene = scene_registry.get_by_key(db, scene_context)
 
     suggestions = _generate_suggestions_for_scene(scene, db)
 
@@ -1,31 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.dependencies import get_current_active_user
 from app.schemas.user import User as UserSchema, UserUpdate
-from app.crud.user import user_crud
-from app.models.user import User
+from app.crud.user import async_user_crud
+from app.services.principal_cache import UserPrincipal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=UserSchema)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Obtiene la información del usuario actual"""
-    return current_user
+    # current_user es el principal en caché; el perfil completo (fechas) sale de la base
+    user = await async_user_crud.get_user(db, user_id=current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return user
 
 @router.put("/me", response_model=UserSchema)
 async def update_users_me(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualiza la información del usuario actual"""
     
     # Verificar que el email no esté en uso por otro usuario
     if user_update.email:
-        existing_user = user_crud.get_user_by_email(db, email=user_update.email)
+        existing_user = await async_user_crud.get_user_by_email(db, email=user_update.email)
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=400,
@@ -34,7 +41,7 @@ async def update_users_me(
     
     # Verificar que el username no esté en uso por otro usuario
     if user_update.username:
-        existing_user = user_crud.get_user_by_username(db, username=user_update.username)
+        existing_user = await async_user_crud.get_user_by_username(db, username=user_update.username)
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=400,
@@ -42,7 +49,7 @@ async def update_users_me(
             )
     
     # Actualizar usuario
-    updated_user = user_crud.update_user(db, current_user.id, user_update)
+    updated_user = await async_user_crud.update_user(db, current_user.id, user_update)
     if not updated_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
@@ -80,6 +80,7 @@ class ConversationSimple(ConversationBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     message_count: Optional[int] = None
+    last_message_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -90,6 +91,9 @@ class Conversation(ConversationBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     messages: List[Message] = []
+    # Paginación de mensajes: la página anterior se pide con ?before=<next_before>
+    has_more: bool = False
+    next_before: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -120,6 +124,28 @@ class ChatResponse(BaseModel):
     navigation: Optional[NavigationInfo] = None
     response_time_ms: Optional[int] = None
     
+# Schemas para preguntas en lote (kioscos / precarga de respuestas)
+class ChatBatchRequest(BaseModel):
+    questions: List[str]
+    conversation_id: Optional[int] = None
+    scene_context: Optional[str] = None
+
+class ChatBatchItem(BaseModel):
+    index: int
+    question: str
+    answer: Optional[str] = None
+    user_message_id: Optional[int] = None
+    assistant_message_id: Optional[int] = None
+    tokens_used: Optional[int] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    conversation: ConversationSimple
+    is_new_conversation: bool = False
+    items: List[ChatBatchItem]
+    failed: int = 0
+    response_time_ms: Optional[int] = None
+
 class IntentStats(BaseModel):
     category: str
     count: int
@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
 
 # Schema base para Scene
 class SceneBase(BaseModel):
@@ -26,4 +28,16 @@ class SceneSimple(SceneBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schema para resúmenes precalculados de escena
+class SceneSummary(BaseModel):
+    scene_id: int
+    scene_key: str
+    scene_name: str
+    summary: str
+    is_stale: bool
+    tokens_used: Optional[int] = None
+    expires_at: Optional[datetime] = None
+    generated_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
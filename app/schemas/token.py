@@ -4,4 +4,8 @@ from typing import Optional
 class Token(BaseModel):
     access_token: str
     token_type: str
-    user: dict
\ No newline at end of file
+    refresh_token: Optional[str] = None
+    user: dict
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
\ No newline at end of file
@@ -0,0 +1,234 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima de un hilo para que el event loop confirme que la tarea quedó encolada
+SUBMIT_HANDOFF_TIMEOUT_SECONDS = 1.0
+
+
+@dataclass
+class BackgroundTask:
+    fn: Callable[..., Any]
+    args: Tuple = ()
+    kwargs: Dict = field(default_factory=dict)
+    name: str = ""
+    attempts: int = 0
+
+
+class BackgroundTaskRunner:
+    """Cola acotada en proceso para el trabajo que no necesita esperar el usuario.
+
+    Cada tarea es una función síncrona `fn(db, *args, **kwargs)` que recibe su propia sesión;
+    los workers son corrutinas que la ejecutan en el threadpool. Si la tarea falla se
+    reintenta hasta `max_retries` veces con espera creciente.
+
+    `submit` se puede llamar desde el event loop o desde los hilos de los endpoints síncronos.
+    Si el runner no está iniciado (scripts, seeder) la tarea se ejecuta en línea.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 1000,
+        max_retries: int = 2,
+        retry_delay_seconds: float = 0.5
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_delay_seconds = retry_delay_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "rejected": 0,
+            "total_duration_ms": 0.0,
+        }
+        self._failures_by_task: Dict[str, int] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i), name=f"background-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Runner de tareas en segundo plano iniciado ({self.workers} workers)")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Espera a que se vacíe la cola (hasta `drain_timeout`) y detiene los workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Se detuvo el runner con {self._queue.qsize()} tareas pendientes")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        self._loop = None
+
+    def submit(self, fn: Callable[..., Any], *args, name: Optional[str] = None, **kwargs) -> bool:
+        """Encola `fn(db, *args, **kwargs)`. Devuelve False si la cola está llena o el runner
+        se detuvo, también cuando se llama desde un hilo"""
+        task = BackgroundTask(fn=fn, args=args, kwargs=kwargs, name=name or fn.__name__)
+        self._count("submitted")
+
+        if not self.running:
+            self._run_inline(task)
+            return True
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        loop = self._loop
+        if running_loop is loop:
+            return self._enqueue(task)
+        return self._enqueue_from_thread(loop, task)
+
+    def _enqueue_from_thread(self, loop: Optional[asyncio.AbstractEventLoop], task: BackgroundTask) -> bool:
+        """Encola desde un hilo (endpoints síncronos) y espera el resultado real de la entrega"""
+        async def enqueue() -> bool:
+            if not self.running:
+                return self._reject(task, "el runner se detuvo")
+            return self._enqueue(task)
+
+        # El runner se detuvo (o el loop se cerró) entre la verificación y la entrega
+        if loop is None or loop.is_closed():
+            return self._reject(task, "el runner se detuvo")
+        coroutine = enqueue()
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except RuntimeError:
+            coroutine.close()
+            return self._reject(task, "el runner se detuvo")
+        try:
+            return future.result(timeout=SUBMIT_HANDOFF_TIMEOUT_SECONDS)
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                return self._reject(task, "el event loop no respondió a tiempo")
+            return future.result()
+
+    def _enqueue(self, task: BackgroundTask) -> bool:
+        try:
+            self._queue.put_nowait(task)
+            return True
+        except asyncio.QueueFull:
+            return self._reject(task, "cola de tareas llena")
+
+    def _reject(self, task: BackgroundTask, reason: str) -> bool:
+        self._count("rejected")
+        logger.warning(f"Tarea '{task.name}' descartada: {reason}")
+        return False
+
+    def _execute(self, task: BackgroundTask):
+        db = SessionLocal()
+        try:
+            return task.fn(db, *task.args, **task.kwargs)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run_inline(self, task: BackgroundTask):
+        start = time.perf_counter()
+        try:
+            self._execute(task)
+            self._record_done(task, start)
+        except Exception as e:
+            self._record_failure(task, e)
+
+    async def _worker(self, index: int):
+        while True:
+            task = await self._queue.get()
+            with self._lock:
+                self._in_flight += 1
+            try:
+                await self._run_with_retry(task)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _run_with_retry(self, task: BackgroundTask):
+        while True:
+            task.attempts += 1
+            start = time.perf_counter()
+            try:
+                await run_in_threadpool(self._execute, task)
+                self._record_done(task, start)
+                return
+            except Exception as e:
+                if task.attempts > self.max_retries:
+                    self._record_failure(task, e)
+                    return
+                self._count("retried")
+                await asyncio.sleep(self.retry_delay_seconds * task.attempts)
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self._metrics[key] += amount
+
+    def _record_done(self, task: BackgroundTask, start: float):
+        with self._lock:
+            self._metrics["completed"] += 1
+            self._metrics["total_duration_ms"] += (time.perf_counter() - start) * 1000
+
+    def _record_failure(self, task: BackgroundTask, error: Exception):
+        with self._lock:
+            self._metrics["failed"] += 1
+            self._failures_by_task[task.name] = self._failures_by_task.get(task.name, 0) + 1
+        logger.error(f"Tarea en segundo plano '{task.name}' falló tras {task.attempts} intento(s): {error}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+            failures = dict(self._failures_by_task)
+            in_flight = self._in_flight
+        completed = metrics.pop("total_duration_ms")
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            **metrics,
+            "avg_duration_ms": round(completed / metrics["completed"], 1) if metrics["completed"] else None,
+            "failures_by_task": failures,
+        }
+
+
+background_runner = BackgroundTaskRunner(
+    workers=settings.BACKGROUND_WORKERS,
+    max_queue=settings.BACKGROUND_QUEUE_SIZE,
+    max_retries=settings.BACKGROUND_MAX_RETRIES,
+    retry_delay_seconds=settings.BACKGROUND_RETRY_DELAY_MS / 1000.0
+)
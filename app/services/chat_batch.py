@@ -0,0 +1,227 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.crud.chat import conversation_crud, ChatTurnUnitOfWork
+from app.services.scene_registry import scene_registry
+from app.database import SessionLocal
+from app.models.chat import Conversation
+from app.services.principal_cache import UserPrincipal
+from app.schemas.chat import (
+    ChatBatchItem, ChatBatchRequest, ChatBatchResponse, ConversationCreate,
+    ConversationSimple
+)
+from app.services.chatbot import (
+    build_user_message_values, check_conversation_limit, check_rate_limit,
+    generate_ai_response, retrieve_knowledge_context, validate_message_content
+)
+from app.services.embeddings import embed_texts
+from app.services.intent_detector import IntentDetector
+from app.services.llm import LLMResponse
+
+
+def _get_batch_conversation(
+    db: Session,
+    request: ChatBatchRequest,
+    current_user: UserPrincipal,
+    scene_id: Optional[int],
+    scene_name: Optional[str],
+    new_messages: int
+) -> Tuple[Conversation, bool]:
+    """Conversación del lote: la indicada (si es del usuario y tiene cupo) o una nueva sin título por LLM"""
+    if request.conversation_id:
+        conversation = conversation_crud.get_conversation(db, request.conversation_id)
+        if not conversation or conversation.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Conversación no encontrada")
+        conv_limit_ok, conv_limit_msg = check_conversation_limit(conversation, cost=new_messages)
+        if not conv_limit_ok:
+            raise HTTPException(status_code=400, detail=conv_limit_msg)
+        return conversation, False
+
+    title = f"Preguntas sobre {scene_name}" if scene_name else "Preguntas frecuentes"
+    conversation = conversation_crud.create_conversation(
+        db,
+        ConversationCreate(title=title, scene_id=scene_id, is_active=True),
+        current_user.id
+    )
+    return conversation, True
+
+
+def _answer_question(
+    question: str,
+    embedding: Optional[List[float]],
+    scene_id: Optional[int],
+    scene_name: Optional[str]
+) -> Tuple[str, Optional[LLMResponse], Dict]:
+    """Recuperación + respuesta de una pregunta. Corre en un hilo, con su propia sesión"""
+    stage_start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        retrieved_context = retrieve_knowledge_context(
+            db, question, scene_id, query_embedding=embedding
+        )
+    finally:
+        db.close()
+    stage_latencies = {"retrieval_ms": int((time.perf_counter() - stage_start) * 1000)}
+
+    if isinstance(retrieved_context, dict):
+        retrieved_context = retrieved_context.get("text")
+
+    stage_start = time.perf_counter()
+    answer, usage = generate_ai_response(
+        user_message=question,
+        scene_context=scene_name,
+        retrieved_context=retrieved_context
+    )
+    stage_latencies["llm_ms"] = int((time.perf_counter() - stage_start) * 1000)
+    return answer, usage, stage_latencies
+
+
+def _prepare_batch(
+    db: Session,
+    request: ChatBatchRequest,
+    current_user: UserPrincipal,
+    questions: int
+) -> Tuple[Optional[int], Optional[str], Conversation, bool]:
+    """Límite por hora, escena y conversación del lote (consultas y escrituras síncronas)"""
+    # Cada pregunta cuenta para el límite por hora, igual que en /chatbot/message
+    rate_ok, rate_msg = check_rate_limit(db, current_user.id, cost=questions)
+    if not rate_ok:
+        raise HTTPException(status_code=429, detail=rate_msg)
+
+    scene_id, scene_name = None, None
+    if request.scene_context:
+        scene = scene_registry.get_by_key(db, request.scene_context)
+        if scene:
+            scene_id, scene_name = scene.id, scene.name
+
+    conversation, is_new_conversation = _get_batch_conversation(
+        db, request, current_user, scene_id, scene_name, new_messages=2 * questions
+    )
+    return scene_id, scene_name, conversation, is_new_conversation
+
+
+def _persist_batch(
+    db: Session,
+    conversation: Conversation,
+    answered: List[ChatBatchItem],
+    results: Dict[int, Tuple[Optional[LLMResponse], Dict]],
+    scene_id: Optional[int]
+) -> ConversationSimple:
+    """Guarda en orden las preguntas respondidas, todas en una sola transacción.
+    La conversación se arma aquí porque leerla después del commit vuelve a consultar la BD."""
+    unit_of_work = ChatTurnUnitOfWork(db, conversation.id)
+    for item in answered:
+        usage, stage_latencies = results[item.index]
+        unit_of_work.add_turn(
+            build_user_message_values(item.question, scene_id, IntentDetector.detect_intent(item.question)),
+            {
+                "content": item.answer,
+                "scene_context_id": scene_id,
+                "tokens_used": item.tokens_used,
+                "prompt_tokens": usage.prompt_tokens if usage else None,
+                "completion_tokens": usage.completion_tokens if usage else None,
+                "model_name": usage.model if usage else None,
+                "stage_latencies": stage_latencies,
+                "cache_hits": []
+            }
+        )
+    for item, (user_message, assistant_message) in zip(answered, unit_of_work.commit()):
+        item.user_message_id = user_message.id
+        item.assistant_message_id = assistant_message.id
+    return ConversationSimple(
+        id=conversation.id,
+        title=conversation.title,
+        scene_id=conversation.scene_id,
+        is_active=conversation.is_active,
+        created_at=conversation.created_at,
+        updated_at=unit_of_work.conversation_updated_at,
+        message_count=unit_of_work.message_count
+    )
+
+
+async def answer_question_batch(
+    db: Session,
+    request: ChatBatchRequest,
+    current_user: UserPrincipal
+) -> ChatBatchResponse:
+    """Responde varias preguntas de una misma escena/conversación en una sola petición.
+
+    Los embeddings se calculan en una sola llamada, la recuperación y las respuestas del LLM
+    corren en paralelo (hasta CHAT_BATCH_MAX_CONCURRENCY a la vez) y los errores se reportan
+    por pregunta sin invalidar el resto del lote.
+    """
+    start_time = time.time()
+
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="Debes enviar al menos una pregunta")
+    if len(request.questions) > settings.CHAT_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.CHAT_BATCH_MAX_QUESTIONS} preguntas por lote"
+        )
+
+    items = [
+        ChatBatchItem(index=i, question=(question or "").strip())
+        for i, question in enumerate(request.questions)
+    ]
+    pending: List[ChatBatchItem] = []
+    for item in items:
+        is_valid, error_msg = validate_message_content(item.question)
+        if is_valid:
+            pending.append(item)
+        else:
+            item.error = error_msg
+
+    if not pending:
+        raise HTTPException(status_code=400, detail="Ninguna pregunta del lote es válida")
+
+    # Todo el trabajo con la sesión síncrona corre en el threadpool, nunca en el event loop
+    scene_id, scene_name, conversation, is_new_conversation = await run_in_threadpool(
+        _prepare_batch, db, request, current_user, len(pending)
+    )
+
+    # Un solo llamado de embeddings para todo el lote
+    try:
+        embeddings = await run_in_threadpool(embed_texts, [item.question for item in pending])
+    except Exception as e:
+        print(f"⚠️ Embeddings del lote no disponibles, se usa solo búsqueda por keywords: {e}")
+        embeddings = [None] * len(pending)
+
+    semaphore = asyncio.Semaphore(settings.CHAT_BATCH_MAX_CONCURRENCY)
+
+    results: Dict[int, Tuple[Optional[LLMResponse], Dict]] = {}
+
+    async def run_item(item: ChatBatchItem, embedding: Optional[List[float]]):
+        async with semaphore:
+            try:
+                item.answer, usage, stage_latencies = await run_in_threadpool(
+                    _answer_question, item.question, embedding, scene_id, scene_name
+                )
+                item.tokens_used = usage.total_tokens if usage else None
+                results[item.index] = (usage, stage_latencies)
+            except HTTPException as e:
+                item.error = e.detail
+            except Exception as e:
+                print(f"❌ Error respondiendo pregunta {item.index} del lote: {e}")
+                item.error = "Error al generar la respuesta"
+
+    await asyncio.gather(*(run_item(item, emb) for item, emb in zip(pending, embeddings)))
+
+    answered = [item for item in pending if item.answer is not None]
+    conversation_simple = await run_in_threadpool(
+        _persist_batch, db, conversation, answered, results, scene_id
+    )
+
+    return ChatBatchResponse(
+        conversation=conversation_simple,
+        is_new_conversation=is_new_conversation,
+        items=items,
+        failed=sum(1 for item in items if item.error),
+        response_time_ms=int((time.time() - start_time) * 1000)
+    )
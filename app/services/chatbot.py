@@ -1,4 +1,3 @@
-import os
 import openai
 from datetime import datetime, timedelta
 from fastapi import HTTPException
@@ -7,23 +6,20 @@ from typing import List, Dict, Optional
 
 from app.services.scene_graph import SceneGraph
 from app.models.chat import Message, Conversation
-from app.crud.scene import scene_crud
-from app.crud.chat import conversation_crud, message_crud
-from app.models.user import User
-from app.schemas.chat import ChatMessage, ChatResponse, ConversationSimple, ConversationCreate
+from app.services.scene_registry import scene_registry
+from app.crud.chat import conversation_crud, message_crud, ChatTurnUnitOfWork
+from app.services.principal_cache import UserPrincipal
+from app.schemas.chat import ChatMessage, ChatResponse, ConversationSimple, ConversationCreate, ConversationUpdate
 from app.services.intent_detector import IntentDetector
 from app.services.rag import retrieve_similar_passages, format_retrieved_passages, search_events_context
+from app.services.llm import get_llm_backend
+from app.services.resilience import auxiliary_breaker, chat_breaker, guarded_call, LLMUnavailableError
+from app.config import settings
+from app.services.background import background_runner
+from app.services.rate_limit import rate_limiter
 import time
 
 
-# === OPENAI CLIENTE ===
-def get_openai_client():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise Exception("OPENAI_API_KEY no encontrada en las variables de entorno")
-    return openai.OpenAI(api_key=api_key, timeout=30)
-
-
 # === VALIDACIONES ===
 def validate_message_content(content: str) -> tuple[bool, Optional[str]]:
     content = content.strip()
@@ -38,30 +34,45 @@ def validate_message_content(content: str) -> tuple[bool, Optional[str]]:
     return True, None
 
 
-def check_rate_limit(db: Session, user_id: int) -> tuple[bool, Optional[str]]:
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent_messages = db.query(Message).join(Conversation).filter(
-        Conversation.user_id == user_id,
-        Message.is_from_user == True,
-        Message.created_at >= one_hour_ago
-    ).count()
-    if recent_messages >= 15:
-        return False, f"Has alcanzado el límite de {15} mensajes por hora. Intenta más tarde."
+def check_rate_limit(db: Session, user_id: int, cost: int = 1) -> tuple[bool, Optional[str]]:
+    """Límite de mensajes por usuario en la ventana (ventana deslizante, sin COUNT por mensaje).
+
+    En frío (clave desconocida para el limitador) se siembra con los mensajes recientes de la BD.
+    """
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    limit = settings.RATE_LIMIT_MESSAGES_PER_WINDOW
+
+    def seed() -> List[float]:
+        since = datetime.utcnow() - timedelta(seconds=window)
+        rows = db.query(Message.created_at).join(Conversation).filter(
+            Conversation.user_id == user_id,
+            Message.is_from_user == True,
+            Message.created_at >= since
+        ).all()
+        return [row.created_at.timestamp() for row in rows if row.created_at]
+
+    allowed, _ = rate_limiter.hit(f"user:{user_id}", limit, window_seconds=window, cost=cost, seed=seed)
+    if not allowed:
+        return False, f"Has alcanzado el límite de {limit} mensajes por hora. Intenta más tarde."
     return True, None
 
-def check_conversation_limit(db: Session, conversation_id: int) -> tuple[bool, Optional[str]]:
-    message_count = db.query(Message).filter(
-        Message.conversation_id == conversation_id
-    ).count()
-    if message_count >= 20:
-        return False, f"Esta conversación ha alcanzado el límite de {20} mensajes. Crea una nueva conversación."
+def check_conversation_limit(conversation: Conversation, cost: int = 2) -> tuple[bool, Optional[str]]:
+    """Límite de mensajes por conversación. `cost` son los mensajes que se van a guardar
+    (un turno = pregunta + respuesta).
+
+    Se basa en conversation.message_count, que se incrementa solo al persistir el turno:
+    un turno que falla no consume cupo y todos los workers ven la misma cuenta.
+    """
+    limit = settings.CONVERSATION_MAX_MESSAGES
+    if (conversation.message_count or 0) + cost > limit:
+        return False, f"Esta conversación ha alcanzado el límite de {limit} mensajes. Crea una nueva conversación."
     return True, None
 
 def handle_navigation_intent(message: str, current_scene_key: str, db: Session) -> Optional[Dict]:
     """Detectar si el usuario quiere navegar a otra escena"""
     
     # Obtener escena actual por key
-    current_scene = scene_crud.get_scene_by_key(db, current_scene_key)
+    current_scene = scene_registry.get_by_key(db, current_scene_key)
     if not current_scene:
         return None
     
@@ -72,7 +83,7 @@ def handle_navigation_intent(message: str, current_scene_key: str, db: Session)
     
     # NUEVO: Validar si ya está en el destino
     if current_scene.scene_key == target_scene_key:
-        target_scene = scene_crud.get_scene_by_key(db, target_scene_key)
+        target_scene = scene_registry.get_by_key(db, target_scene_key)
         return {
             "from_scene": current_scene.scene_key,
             "to_scene": target_scene_key,
@@ -96,7 +107,7 @@ def handle_navigation_intent(message: str, current_scene_key: str, db: Session)
         return None
     
     # Obtener nombres amigables
-    target_scene = scene_crud.get_scene_by_key(db, target_scene_key)
+    target_scene = scene_registry.get_by_key(db, target_scene_key)
     
     return {
         **nav_info,
@@ -107,61 +118,88 @@ def handle_navigation_intent(message: str, current_scene_key: str, db: Session)
     }
 
 # === IA RESPUESTA ===
+def build_degraded_response(retrieved_context: Optional[str] = None, scene_context: Optional[str] = None) -> str:
+    """Respuesta sin LLM construida con los pasajes RAG y eventos ya recuperados.
+
+    Se usa cuando el circuit breaker está abierto o el proveedor no respondió a tiempo.
+    """
+    if retrieved_context:
+        intro = "En este momento no puedo elaborar una respuesta completa, pero esto es lo que encontré"
+        if scene_context:
+            intro += f" sobre {scene_context}"
+        return f"{intro}:\n\n{retrieved_context}"
+    return (
+        "En este momento el asistente no está disponible para responder en detalle. "
+        "Intenta de nuevo en unos minutos o contacta a la administración de Tecsup."
+    )
+
+
 def generate_ai_response(user_message: str, scene_context: str = None,
                          conversation_history: List[Dict] = None,
-                         retrieved_context: str = None) -> tuple:
-    try:
-        client = get_openai_client()
-        system_prompt = (
-            "Eres un asistente virtual de Tecsup, una institución de educación técnica en Perú.\n"
-            "Tu objetivo es ayudar a los usuarios con información sobre:\n"
-            "- Carreras técnicas\n"
-            "- Instalaciones del campus (laboratorios, biblioteca, deportes)\n"
-            "- Vida estudiantil y servicios\n"
-            "- Horarios y calendario académico\n"
-            "IMPORTANTE: Si detectas errores ortográficos en nombres de lugares, corrige automáticamente en tu respuesta.\n"
-            "Responde de manera natural, amistosa y concisa en español. Prioriza la información proporcionada en la sección [INFORMACION_RETRIEVED] si está presente.\n"
-            "Si el usuario pregunta por eventos en general (sin especificar escena), ofrece un resumen general de eventos.\n"
-            "Si el usuario está en una escena específica (se proporcionó contexto de escena), prioriza y resume los eventos de esa escena.\n"
-            "Si detectas múltiples intenciones (por ejemplo navegación + eventos), atiende primero la intención informativa y luego sugiere acciones de navegación cortas.\n"
-            "IMPORTANTE: SOLO RESPONDE INFORMACIÓN RELACIONADA A TECSUP LIMA. No inventes eventos, horarios, ubicaciones ni información de otras instituciones. Si la pregunta trata sobre otra institución, indica que no tienes información de esa entidad.\n"
-            "EVITA lenguaje inapropiado, groserías o insultos en TODAS las respuestas. Si el usuario usa lenguaje ofensivo, responde de forma profesional y neutral sin reproducir insultos.\n"
-            "Si no tienes información específica, ofrece ayuda general y sugiere contactar a la administración."
-        )
+                         retrieved_context: str = None,
+                         conversation_summary: str = None) -> tuple:
+    """Genera la respuesta del asistente.
 
-        if scene_context:
-            system_prompt += f"\n\nContexto adicional: El usuario está en {scene_context}."
+    Devuelve (texto, uso) donde `uso` es el LLMResponse con tokens y modelo. Si el LLM no está
+    disponible (breaker abierto, presupuesto de latencia agotado o error del proveedor) devuelve
+    una respuesta degradada con uso None.
+    """
+    system_prompt = (
+        "Eres un asistente virtual de Tecsup, una institución de educación técnica en Perú.\n"
+        "Tu objetivo es ayudar a los usuarios con información sobre:\n"
+        "- Carreras técnicas\n"
+        "- Instalaciones del campus (laboratorios, biblioteca, deportes)\n"
+        "- Vida estudiantil y servicios\n"
+        "- Horarios y calendario académico\n"
+        "IMPORTANTE: Si detectas errores ortográficos en nombres de lugares, corrige automáticamente en tu respuesta.\n"
+        "Responde de manera natural, amistosa y concisa en español. Prioriza la información proporcionada en la sección [INFORMACION_RETRIEVED] si está presente.\n"
+        "Si el usuario pregunta por eventos en general (sin especificar escena), ofrece un resumen general de eventos.\n"
+        "Si el usuario está en una escena específica (se proporcionó contexto de escena), prioriza y resume los eventos de esa escena.\n"
+        "Si detectas múltiples intenciones (por ejemplo navegación + eventos), atiende primero la intención informativa y luego sugiere acciones de navegación cortas.\n"
+        "IMPORTANTE: SOLO RESPONDE INFORMACIÓN RELACIONADA A TECSUP LIMA. No inventes eventos, horarios, ubicaciones ni información de otras instituciones. Si la pregunta trata sobre otra institución, indica que no tienes información de esa entidad.\n"
+        "EVITA lenguaje inapropiado, groserías o insultos en TODAS las respuestas. Si el usuario usa lenguaje ofensivo, responde de forma profesional y neutral sin reproducir insultos.\n"
+        "Si no tienes información específica, ofrece ayuda general y sugiere contactar a la administración."
+    )
 
-        if retrieved_context:
-            # Marcar claramente que esta es la información recuperada por RAG
-            system_prompt += f"\n\n[INFORMACION_RETRIEVED]\n{retrieved_context}\n\n"
+    if scene_context:
+        system_prompt += f"\n\nContexto adicional: El usuario está en {scene_context}."
 
-        messages = [{"role": "system", "content": system_prompt}]
+    if retrieved_context:
+        # Marcar claramente que esta es la información recuperada por RAG
+        system_prompt += f"\n\n[INFORMACION_RETRIEVED]\n{retrieved_context}\n\n"
 
-        if conversation_history:
-            for msg in conversation_history[-3:]:
-                if msg.get("content"):
-                    role = "user" if msg.get("is_from_user") else "assistant"
-                    messages.append({"role": role, "content": msg["content"]})
+    if conversation_summary:
+        system_prompt += f"\n\n[RESUMEN_CONVERSACION]\n{conversation_summary}"
 
-        messages.append({"role": "user", "content": user_message})
+    messages = [{"role": "system", "content": system_prompt}]
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=512,
-            temperature=0.4,
-        )
+    if conversation_history:
+        for msg in conversation_history[-settings.CHAT_HISTORY_WINDOW:]:
+            if msg.get("content"):
+                role = "user" if msg.get("is_from_user") else "assistant"
+                messages.append({"role": role, "content": msg["content"]})
 
-        result = response.choices[0].message.content.strip()
-        total_tokens = response.usage.total_tokens
+    messages.append({"role": "user", "content": user_message})
 
-        return result, total_tokens
+    try:
+        backend = get_llm_backend()
+        response = guarded_call(
+            chat_breaker,
+            lambda timeout: backend.chat(
+                messages,
+                model=settings.LLM_CHAT_MODEL,
+                max_tokens=512,
+                temperature=0.4,
+                timeout=timeout,
+            ),
+            settings.LLM_LATENCY_BUDGET_MS / 1000.0,
+            hedge=True
+        )
+        return response.content, response
 
-    except openai.RateLimitError:
-        raise HTTPException(status_code=429, detail="Demasiadas solicitudes. Intenta más tarde.")
-    except openai.APITimeoutError:
-        raise HTTPException(status_code=504, detail="Timeout en la respuesta de IA.")
+    except (LLMUnavailableError, openai.APIError) as e:
+        print(f"⚠️ LLM no disponible, respuesta degradada: {e}")
+        return build_degraded_response(retrieved_context, scene_context), None
     except Exception as e:
         print(f"❌ Error al generar respuesta: {e}")
         raise HTTPException(status_code=500, detail="Error al generar respuesta de IA.")
@@ -169,37 +207,57 @@ def generate_ai_response(user_message: str, scene_context: str = None,
 
 def generate_conversation_title(message_content: str) -> str:
     try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Genera un título corto y descriptivo (máx. 6 palabras). Corrígelo si tiene errores ortográficos."},
-                {"role": "user", "content": message_content}
-            ],
-            max_tokens=30,
-            temperature=1
+        backend = get_llm_backend()
+        response = guarded_call(
+            auxiliary_breaker,
+            lambda timeout: backend.chat(
+                [
+                    {"role": "system", "content": "Genera un título corto y descriptivo (máx. 6 palabras). Corrígelo si tiene errores ortográficos."},
+                    {"role": "user", "content": message_content}
+                ],
+                model=settings.LLM_TITLE_MODEL,
+                max_tokens=30,
+                temperature=1,
+                timeout=timeout,
+            ),
+            settings.LLM_TITLE_BUDGET_MS / 1000.0
         )
-        if response.choices:
-            return response.choices[0].message.content.strip()
+        if response.content:
+            return response.content
         return "Conversación sin título"
     except Exception:
-        words = message_content.split()[:4]
-        return " ".join(words) + "..."
+        return provisional_title(message_content)
+
+
+def provisional_title(message_content: str) -> str:
+    """Título inmediato (primeras palabras del mensaje) mientras se genera el definitivo"""
+    words = message_content.split()[:4]
+    return " ".join(words) + "..."
+
+
+def update_conversation_title(db: Session, conversation_id: int, message_content: str):
+    """Genera el título con IA y lo guarda (se ejecuta en segundo plano)"""
+    title = generate_conversation_title(message_content)
+    conversation_crud.update_conversation(db, conversation_id, ConversationUpdate(title=title))
 
 # FUNCIONES AUXILIARES
 def get_or_create_conversation(
     db: Session,
     message: ChatMessage,
-    current_user: User
+    current_user: UserPrincipal,
+    title: Optional[str] = None
 ) -> tuple[Conversation, bool]:
-    """Obtiene conversación existente o crea una nueva"""
+    """Obtiene conversación existente o crea una nueva.
+
+    Si se pasa `title` se usa tal cual y no se genera uno con el LLM.
+    """
     if message.conversation_id:
         conversation = conversation_crud.get_conversation(db, message.conversation_id)
         if not conversation or conversation.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Conversación no encontrada")
         
         # Verificar límite de mensajes por conversación
-        conv_limit_ok, conv_limit_msg = check_conversation_limit(db, conversation.id)
+        conv_limit_ok, conv_limit_msg = check_conversation_limit(conversation)
         if not conv_limit_ok:
             raise HTTPException(status_code=400, detail=conv_limit_msg)
         
@@ -208,20 +266,21 @@ def get_or_create_conversation(
         # Convertir scene_key a scene_id si existe
         scene_id = None
         if message.scene_context:
-            scene = scene_crud.get_scene_by_key(db, message.scene_context)
+            scene = scene_registry.get_by_key(db, message.scene_context)
             if scene:
                 scene_id = scene.id
 
-        # Crear nueva conversación automáticamente
-        auto_title = generate_conversation_title(message.content)
+        # Crear nueva conversación automáticamente; el título con IA se genera en segundo plano
         conversation_data = ConversationCreate(
-            title=auto_title,
+            title=title or provisional_title(message.content),
             scene_id=scene_id,
             is_active=True
         )
         conversation = conversation_crud.create_conversation(
             db, conversation_data, current_user.id
         )
+        if not title:
+            background_runner.submit(update_conversation_title, conversation.id, message.content)
         return conversation, True
 
 
@@ -229,13 +288,29 @@ def get_scene_context(db: Session, scene_id: Optional[int]) -> Optional[str]:
     """Obtiene el nombre de la escena actual"""
     if not scene_id:
         return None
-    scene = scene_crud.get_scene(db, scene_id)
+    scene = scene_registry.get_by_id(db, scene_id)
     return scene.name if scene else None
 
 
-def get_conversation_history(db: Session, conversation_id: int) -> List[Dict]:
-    """Obtiene el historial de mensajes de la conversación"""
-    conversation_messages = message_crud.get_conversation_messages(db, conversation_id)
+def get_conversation_history(
+    db: Session,
+    conversation_id: int,
+    exclude_message_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    since: Optional[datetime] = None
+) -> List[Dict]:
+    """Obtiene los últimos mensajes de la conversación (solo los que entran en el prompt).
+
+    `exclude_message_id` es el mensaje actual del usuario, que ya se envía aparte.
+    `since` (creación de la conversación) limita la consulta a las particiones desde ese mes.
+    """
+    conversation_messages = message_crud.get_recent_messages(
+        db,
+        conversation_id,
+        limit=limit or settings.CHAT_HISTORY_WINDOW,
+        before_id=exclude_message_id,
+        since=since
+    )
     return [
         {
             "content": msg.content,
@@ -249,7 +324,8 @@ def get_conversation_history(db: Session, conversation_id: int) -> List[Dict]:
 def retrieve_knowledge_context(
     db: Session,
     query: str,
-    scene_id: Optional[int]
+    scene_id: Optional[int],
+    query_embedding: Optional[List[float]] = None
 ) -> Optional[dict]:
     """Recupera contexto relevante de la knowledge base usando RAG.
 
@@ -259,7 +335,7 @@ def retrieve_knowledge_context(
     """
     try:
         passages = retrieve_similar_passages(
-            db, query, top_k=4, scene_id=scene_id
+            db, query, top_k=4, scene_id=scene_id, query_embedding=query_embedding
         )
         knowledge_context = format_retrieved_passages(passages)
 
@@ -294,9 +370,8 @@ def retrieve_knowledge_context(
 def handle_clarification_response(
     db: Session,
     conversation: Conversation,
-    user_message: Message,
+    user_values: Dict,
     intent_result: Dict,
-    message: ChatMessage,
     is_new_conversation: bool,
     start_time: float
 ) -> ChatResponse:
@@ -304,20 +379,91 @@ def handle_clarification_response(
     clarification_msg = IntentDetector.get_clarification_message(
         intent_result["all_matches"]
     )
-    
-    assistant_scene_key = None
-    try:
-        if getattr(user_message, "scene_context", None):
-            assistant_scene_key = user_message.scene_context.scene_key
-    except Exception:
-        assistant_scene_key = None
+    return persist_chat_turn(
+        db=db,
+        conversation=conversation,
+        user_values=user_values,
+        assistant_values={
+            "content": clarification_msg,
+            "scene_context_id": user_values.get("scene_context_id"),
+            "cache_hits": []
+        },
+        is_new_conversation=is_new_conversation,
+        start_time=start_time
+    )
+
 
-    assistant_message = message_crud.create_assistant_message(
-        db, clarification_msg, conversation.id, assistant_scene_key
+def build_user_message_values(content: str, scene_id: Optional[int], intent_result: Dict) -> Dict:
+    """Columnas del mensaje del usuario (con intención) para ChatTurnUnitOfWork"""
+    return {
+        "content": content,
+        "scene_context_id": scene_id,
+        "intent_category": intent_result["category"],
+        "intent_confidence": intent_result["confidence"],
+        "intent_keywords": intent_result["keywords_found"],
+        "requires_clarification": bool(intent_result.get("requires_clarification", False))
+    }
+
+
+def message_to_dict(db: Session, msg: Message) -> dict:
+    """Mensaje en el formato de ChatResponse / detalle de conversación (scene_key desde el registro)"""
+    return {
+        "id": msg.id,
+        "conversation_id": msg.conversation_id,
+        "content": msg.content,
+        "is_from_user": msg.is_from_user,
+        "scene_context": scene_registry.key_for_id(db, msg.scene_context_id),
+        "tokens_used": msg.tokens_used,
+        "created_at": msg.created_at,
+        "feedback": None,
+        "intent_category": getattr(msg, "intent_category", None),
+        "intent_confidence": getattr(msg, "intent_confidence", None),
+        "intent_keywords": getattr(msg, "intent_keywords", None),
+        "requires_clarification": getattr(msg, "requires_clarification", None)
+    }
+
+
+def build_conversation_page(
+    db: Session,
+    conversation: Conversation,
+    limit: int,
+    before_id: Optional[int] = None
+) -> dict:
+    """Conversación con una página de sus mensajes más recientes (o anteriores a `before_id`)"""
+    limit = max(1, min(limit, settings.CONVERSATION_PAGE_SIZE * 4))
+    messages, has_more = message_crud.get_message_page(
+        db, conversation.id, limit, before_id=before_id, since=conversation.created_at
     )
-    
+    return {
+        "id": conversation.id,
+        "title": conversation.title,
+        "scene_id": conversation.scene_id,
+        "is_active": conversation.is_active,
+        "user_id": conversation.user_id,
+        "created_at": conversation.created_at,
+        "updated_at": conversation.updated_at,
+        "messages": [message_to_dict(db, m) for m in messages],
+        "has_more": has_more,
+        "next_before": messages[0].id if has_more and messages else None
+    }
+
+
+def persist_chat_turn(
+    db: Session,
+    conversation: Conversation,
+    user_values: Dict,
+    assistant_values: Dict,
+    is_new_conversation: bool,
+    start_time: float,
+    navigation_data: Optional[Dict] = None
+) -> ChatResponse:
+    """Guarda el turno (pregunta, respuesta y actividad de la conversación) en una sola
+    transacción y arma la respuesta del endpoint"""
     response_time_ms = int((time.time() - start_time) * 1000)
-    
+    unit_of_work = ChatTurnUnitOfWork(db, conversation.id)
+    unit_of_work.add_turn(user_values, dict(assistant_values, response_time_ms=response_time_ms))
+    [(user_message, assistant_message)] = unit_of_work.commit()
+
     conversation_simple = ConversationSimple(
         id=conversation.id,
         title=conversation.title,
@@ -325,48 +471,116 @@ def handle_clarification_response(
         is_active=conversation.is_active,
         user_id=conversation.user_id,
         created_at=conversation.created_at,
-        updated_at=conversation.updated_at
+        updated_at=unit_of_work.conversation_updated_at,
+        message_count=unit_of_work.message_count
     )
-    def _message_to_dict(msg: Message) -> dict:
-        return {
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "content": msg.content,
-            "is_from_user": msg.is_from_user,
-            "scene_context": msg.scene_context.scene_key if getattr(msg, "scene_context", None) else None,
-            "tokens_used": msg.tokens_used,
-            "created_at": msg.created_at,
-            "feedback": None,
-            "intent_category": getattr(msg, "intent_category", None),
-            "intent_confidence": getattr(msg, "intent_confidence", None),
-            "intent_keywords": getattr(msg, "intent_keywords", None),
-            "requires_clarification": getattr(msg, "requires_clarification", None)
-        }
 
     return ChatResponse(
-        user_message=_message_to_dict(user_message),
-        assistant_message=_message_to_dict(assistant_message),
+        user_message=message_to_dict(db, user_message),
+        assistant_message=message_to_dict(db, assistant_message),
         conversation=conversation_simple,
         is_new_conversation=is_new_conversation,
-        navigation=None,
+        navigation=navigation_data,
         response_time_ms=response_time_ms
     )
 
 
+# Plantillas de respuesta de navegación por idioma
+NAVIGATION_TEMPLATES = {
+    "es": {
+        "route": "Para llegar a {to_scene_name} desde {from_scene_name} son {steps} paso(s).\n\n🗺️ Ruta sugerida: {route}",
+        "already_here": "Ya te encuentras en {to_scene_name}. ¿En qué más puedo ayudarte?",
+        "title": "Ruta a {to_scene_name}",
+    },
+}
+
+
+def format_route(path: List[str]) -> str:
+    """Convierte una lista de scene_keys en la ruta legible 'patio → camino → ...'"""
+    return " → ".join([s.split("-")[1] for s in path])
+
+
+def render_navigation_reply(navigation_data: Dict, language: str = "es") -> str:
+    """Respuesta de navegación a partir de plantilla, sin LLM"""
+    templates = NAVIGATION_TEMPLATES.get(language, NAVIGATION_TEMPLATES["es"])
+    if navigation_data.get("already_here"):
+        return templates["already_here"].format(**navigation_data)
+    return templates["route"].format(route=format_route(navigation_data["path"]), **navigation_data)
+
+
+def resolve_navigation_fast_path(db: Session, content: str, scene_context: Optional[str]) -> Optional[Dict]:
+    """Ruta rápida para mensajes de navegación pura.
+
+    Si el mensaje coincide con un patrón claro de navegación, no pide nada más (ninguna otra
+    categoría de IntentDetector tiene keywords) y el destino se resuelve en el grafo de escenas,
+    devuelve la intención, los datos de navegación y la respuesta renderizada. Devuelve None si
+    hay que seguir el flujo normal (RAG + LLM), que responde primero la parte informativa.
+    """
+    if not settings.NAVIGATION_FAST_PATH_ENABLED or not scene_context:
+        return None
+
+    message_lower = content.strip().lower()
+    if not IntentDetector.is_pure_navigation(message_lower):
+        return None
+    intent_result = IntentDetector.detect_navigation_pattern(message_lower)
+
+    navigation_data = handle_navigation_intent(content, scene_context, db)
+    if not navigation_data:
+        return None
+
+    return {
+        "intent": intent_result,
+        "navigation": navigation_data,
+        "content": render_navigation_reply(navigation_data),
+        "title": NAVIGATION_TEMPLATES["es"]["title"].format(**navigation_data),
+    }
+
+
+def handle_direct_response(
+    db: Session,
+    conversation: Conversation,
+    user_values: Dict,
+    content: str,
+    is_new_conversation: bool,
+    start_time: float,
+    navigation_data: Optional[Dict] = None,
+    cache_hit: Optional[str] = None
+) -> ChatResponse:
+    """Responde con un contenido ya resuelto (ruta rápida de navegación o resumen de escena), sin embeddings ni LLM.
+
+    `cache_hit` indica de dónde salió la respuesta ("navigation_fast_path", "scene_summary").
+    """
+    return persist_chat_turn(
+        db=db,
+        conversation=conversation,
+        user_values=user_values,
+        assistant_values={
+            "content": content,
+            "scene_context_id": user_values.get("scene_context_id"),
+            "cache_hits": [cache_hit] if cache_hit else []
+        },
+        is_new_conversation=is_new_conversation,
+        start_time=start_time,
+        navigation_data=navigation_data
+    )
+
+
 def handle_navigation_if_needed(
     db: Session,
     intent_category: str,
     message_content: str,
         scene_context: Optional[str],
-    assistant_message: Message,
+    response_text: str,
     intent_all_matches: Optional[list] = None
-) -> Optional[Dict]:
+) -> tuple[Optional[Dict], str]:
     """Detecta y maneja navegación. Soporta múltiples intenciones: si 'navegacion' aparece
     en `intent_all_matches` se considera como intención de navegación.
+
+    Devuelve (datos de navegación, texto de la respuesta con la ruta sugerida si corresponde).
     """
     # Si no hay contexto de escena, no intentaremos navegación
     if not scene_context:
-        return None
+        return None, response_text
 
     # Determinar si navegación está solicitada
     nav_requested = False
@@ -383,7 +597,7 @@ def handle_navigation_if_needed(
                 break
 
     if not nav_requested:
-        return None
+        return None, response_text
     
     navigation_data = handle_navigation_intent(
         message_content,
@@ -392,7 +606,7 @@ def handle_navigation_if_needed(
     )
     
     if not navigation_data:
-        return None
+        return None, response_text
     
     # Enriquecer respuesta del bot según el caso
     if navigation_data.get("already_here"):
@@ -400,10 +614,6 @@ def handle_navigation_if_needed(
         new_response = f"Ya te encuentras en {navigation_data['to_scene_name']}. ¿En qué más puedo ayudarte?"
     else:
         # Hay ruta para navegar
-        steps = " → ".join([s.split("-")[1] for s in navigation_data["path"]])
-        new_response = assistant_message.content + f"\n\n🗺️ Ruta sugerida: {steps}"
-    
-    assistant_message.content = new_response
-    db.commit()
+        new_response = response_text + f"\n\n🗺️ Ruta sugerida: {format_route(navigation_data['path'])}"
     
-    return navigation_data
\ No newline at end of file
+    return navigation_data, new_response
\ No newline at end of file
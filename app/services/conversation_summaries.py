@@ -0,0 +1,85 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.chat import conversation_crud, message_crud
+from app.models.chat import Conversation, Message
+from app.services.llm import get_llm_backend
+from app.services.resilience import auxiliary_breaker, guarded_call
+
+
+def _format_transcript(messages: List[Message]) -> str:
+    return "\n".join(
+        f"{'Usuario' if msg.is_from_user else 'Asistente'}: {msg.content.strip()}"
+        for msg in messages if msg.content
+    )
+
+
+def summarize_messages(previous_summary: Optional[str], messages: List[Message]) -> Optional[str]:
+    """Integra `messages` al resumen previo con el LLM. Devuelve None si no se pudo generar"""
+    prompt = ""
+    if previous_summary:
+        prompt += f"Resumen hasta ahora:\n{previous_summary}\n\n"
+    prompt += f"Mensajes nuevos:\n{_format_transcript(messages)}"
+
+    try:
+        backend = get_llm_backend()
+        response = guarded_call(
+            auxiliary_breaker,
+            lambda timeout: backend.chat(
+                [
+                    {"role": "system", "content": (
+                        "Resume en español, en pocas oraciones, una conversación entre un visitante y el "
+                        "asistente del tour virtual de Tecsup. Conserva lo que pregunta el visitante, "
+                        "los lugares y eventos mencionados y sus preferencias. No inventes información."
+                    )},
+                    {"role": "user", "content": prompt}
+                ],
+                model=settings.LLM_TITLE_MODEL,
+                max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+                temperature=0.2,
+                timeout=timeout,
+            ),
+            settings.LLM_LATENCY_BUDGET_MS / 1000.0
+        )
+        return response.content.strip() or None
+    except Exception as e:
+        print(f"⚠️ No se pudo actualizar el resumen de la conversación: {e}")
+        return None
+
+
+def update_conversation_summary(db: Session, conversation_id: int) -> bool:
+    """Incorpora al resumen los mensajes que ya salieron de la ventana del prompt.
+
+    Solo llama al LLM cuando hay al menos CONVERSATION_SUMMARY_BATCH mensajes pendientes,
+    para que el costo no crezca con cada turno. Devuelve True si el resumen cambió.
+    """
+    conversation = conversation_crud.get_conversation(db, conversation_id)
+    if not conversation:
+        return False
+
+    pending = message_crud.get_messages_after(
+        db, conversation_id, conversation.summary_message_id, since=conversation.created_at
+    )
+    # Los últimos mensajes se envían textualmente en el próximo prompt
+    outside_window = pending[:-settings.CHAT_HISTORY_WINDOW] if settings.CHAT_HISTORY_WINDOW else pending
+    if len(outside_window) < settings.CONVERSATION_SUMMARY_BATCH:
+        return False
+
+    summary = summarize_messages(conversation.summary, outside_window)
+    if not summary:
+        return False
+
+    # Sin tocar updated_at: el resumen no es actividad del usuario
+    db.query(Conversation).filter(Conversation.id == conversation_id).update(
+        {
+            Conversation.summary: summary,
+            Conversation.summary_message_id: outside_window[-1].id,
+            Conversation.updated_at: Conversation.updated_at,
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    return True
+
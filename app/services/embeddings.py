@@ -1,34 +1,27 @@
-import os
-import openai
 from typing import List
 
-
-def get_openai_client():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise Exception("OPENAI_API_KEY no encontrada en las variables de entorno")
-    return openai.OpenAI(api_key=api_key, timeout=30)
+from app.config import settings
+from app.services.llm import get_llm_backend
+from app.services.resilience import embedding_breaker, guarded_call
 
 
 def embed_text(text: str) -> List[float]:
-    """Genera un embedding para un texto usando OpenAI embeddings.
+    """Genera un embedding para un texto usando el backend LLM configurado.
 
     Returns:
         lista de floats (embedding)
     """
-    client = get_openai_client()
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return response.data[0].embedding
+    return embed_texts([text])[0]
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
-    """Genera embeddings para una lista de textos (batch)."""
-    client = get_openai_client()
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=texts
+    """Genera embeddings para una lista de textos (batch).
+
+    Protegido por el circuit breaker de embeddings y su presupuesto de latencia.
+    """
+    backend = get_llm_backend()
+    return guarded_call(
+        embedding_breaker,
+        lambda timeout: backend.embed(texts, timeout=timeout),
+        settings.LLM_EMBEDDING_BUDGET_MS / 1000.0
     )
-    return [item.embedding for item in response.data]
@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.chat import Conversation, Message, MessageFeedback
+from app.models.scene import Scene
+from app.models.user import User
+
+MESSAGE_EXPORT_FIELDS = [
+    "id", "conversation_id", "conversation_title", "user_id", "username", "is_from_user",
+    "scene_context", "content", "intent_category", "intent_confidence", "intent_keywords",
+    "requires_clarification", "tokens_used", "model_name", "response_time_ms",
+    "feedback_is_positive", "created_at",
+]
+
+CONVERSATION_EXPORT_FIELDS = [
+    "id", "user_id", "username", "title", "scene_key", "is_active", "message_count",
+    "last_message_at", "created_at", "updated_at",
+]
+
+
+def message_export_query(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    scene_id: Optional[int] = None,
+    only_user_messages: bool = False
+) -> Query:
+    """Mensajes con usuario, conversación, scene_key y feedback, en orden de id"""
+    query = db.query(
+        Message.id,
+        Message.conversation_id,
+        Conversation.title.label("conversation_title"),
+        Conversation.user_id,
+        User.username,
+        Message.is_from_user,
+        Scene.scene_key.label("scene_context"),
+        Message.content,
+        Message.intent_category,
+        Message.intent_confidence,
+        Message.intent_keywords,
+        Message.requires_clarification,
+        Message.tokens_used,
+        Message.model_name,
+        Message.response_time_ms,
+        MessageFeedback.is_positive.label("feedback_is_positive"),
+        Message.created_at
+    ).join(
+        Conversation, Message.conversation_id == Conversation.id
+    ).join(
+        User, Conversation.user_id == User.id
+    ).outerjoin(
+        Scene, Scene.id == Message.scene_context_id
+    ).outerjoin(
+        MessageFeedback, MessageFeedback.message_id == Message.id
+    )
+    if start is not None:
+        query = query.filter(Message.created_at >= start)
+    if end is not None:
+        query = query.filter(Message.created_at < end)
+    if scene_id is not None:
+        query = query.filter(Message.scene_context_id == scene_id)
+    if only_user_messages:
+        query = query.filter(Message.is_from_user == True)
+    return query.order_by(Message.id)
+
+
+def conversation_export_query(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    scene_id: Optional[int] = None
+) -> Query:
+    """Conversaciones con usuario y scene_key (fechas sobre created_at), en orden de id"""
+    query = db.query(
+        Conversation.id,
+        Conversation.user_id,
+        User.username,
+        Conversation.title,
+        Scene.scene_key,
+        Conversation.is_active,
+        Conversation.message_count,
+        Conversation.last_message_at,
+        Conversation.created_at,
+        Conversation.updated_at
+    ).join(
+        User, Conversation.user_id == User.id
+    ).outerjoin(
+        Scene, Scene.id == Conversation.scene_id
+    )
+    if start is not None:
+        query = query.filter(Conversation.created_at >= start)
+    if end is not None:
+        query = query.filter(Conversation.created_at < end)
+    if scene_id is not None:
+        query = query.filter(Conversation.scene_id == scene_id)
+    return query.order_by(Conversation.id)
+
+
+def stream_export_rows(build_query: Callable[[Session], Query]) -> Iterator[Dict]:
+    """Recorre la consulta con un cursor del lado del servidor (`yield_per`).
+
+    Abre su propia sesión: el generador sigue corriendo mientras se envía la respuesta,
+    después de que la sesión del endpoint ya terminó. La memoria usada depende del tamaño
+    del lote (EXPORT_BATCH_SIZE), no del total exportado.
+    """
+    db = SessionLocal()
+    try:
+        for row in build_query(db).yield_per(settings.EXPORT_BATCH_SIZE):
+            yield dict(row._mapping)
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def to_ndjson(rows: Iterable[Dict]) -> Iterator[str]:
+    """Una línea JSON por fila"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+
+
+def to_csv(rows: Iterable[Dict], fields: List[str]) -> Iterator[str]:
+    """CSV con encabezado; las listas (intent_keywords) se escriben como JSON"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
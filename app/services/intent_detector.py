@@ -1,6 +1,7 @@
 from typing import Dict, List, Tuple
 from enum import Enum
 import re
+import unicodedata
 
 class IntentCategory(str, Enum):
     """Categorías de intención del usuario"""
@@ -13,6 +14,14 @@ class IntentCategory(str, Enum):
     SCHEDULES = "horarios"
     GENERAL = "general"
 
+def _build_keyword_table(intent_keywords: Dict, weights: Dict[str, float]) -> Tuple[Tuple[str, "IntentCategory", float], ...]:
+    return tuple(
+        (keyword, category, weight)
+        for category, priority_keywords in intent_keywords.items()
+        for priority, weight in weights.items()
+        for keyword in priority_keywords[priority]
+    )
+
 class IntentDetector:
     """
     Detector de intenciones mejorado con:
@@ -78,6 +87,15 @@ class IntentDetector:
         }
     }
     
+    PRIORITY_WEIGHTS = {"high_priority": 3.0, "medium_priority": 2.0, "low_priority": 1.0}
+
+    # Compilados una sola vez al importar:
+    # - los 8 patrones de navegación en una sola regex (una búsqueda en vez de ocho)
+    # - las keywords en una tabla plana (keyword, categoría, peso) en el orden de
+    #   INTENT_KEYWORDS, así keywords_found y los empates conservan el orden de antes
+    _NAVIGATION_REGEX = re.compile("|".join(f"(?:{pattern})" for pattern in NAVIGATION_PATTERNS))
+    _KEYWORD_TABLE = _build_keyword_table(INTENT_KEYWORDS, PRIORITY_WEIGHTS)
+
     @staticmethod
     def _normalize_common_typos(message: str) -> str:
         """Corregir typos comunes en palabras de navegación"""
@@ -99,6 +117,35 @@ class IntentDetector:
         
         return " ".join(corrected)
 
+    @staticmethod
+    def score_keywords(message_lower: str) -> Tuple[Dict, Dict]:
+        """Puntuación por keywords de cada categoría (high priority pesa 3, medium 2 y low 1).
+
+        Devuelve (puntaje por categoría, keywords encontradas por categoría); solo incluye
+        las categorías con alguna coincidencia.
+        """
+        category_scores = {}
+        keywords_by_category = {}
+        for keyword, category, weight in IntentDetector._KEYWORD_TABLE:
+            if keyword in message_lower:
+                category_scores[category] = category_scores.get(category, 0.0) + weight
+                keywords_by_category.setdefault(category, []).append(keyword)
+        return category_scores, keywords_by_category
+
+    @staticmethod
+    def is_pure_navigation(message: str) -> bool:
+        """True si el mensaje coincide con un patrón de navegación y ninguna otra categoría
+        tiene keywords (p. ej. "¿cómo llego a la biblioteca y a qué hora abre?" no lo es)"""
+        message_lower = message.lower()
+        if not IntentDetector._NAVIGATION_REGEX.search(message_lower):
+            return False
+        # Las keywords están sin tildes: "a qué hora abre" tiene que sumar "que hora"
+        without_accents = "".join(
+            c for c in unicodedata.normalize("NFD", message_lower) if not unicodedata.combining(c)
+        )
+        category_scores, _ = IntentDetector.score_keywords(without_accents)
+        return all(category == IntentCategory.NAVIGATION for category in category_scores)
+
     @staticmethod
     def detect_intent(message: str) -> Dict:
         """
@@ -110,34 +157,7 @@ class IntentDetector:
         if nav_match:
             return nav_match
         
-        category_scores = {}
-        keywords_by_category = {}
-        
-        for category, priority_keywords in IntentDetector.INTENT_KEYWORDS.items():
-            score = 0.0
-            found_keywords = []
-            
-            # High priority keywords (peso 3)
-            for keyword in priority_keywords["high_priority"]:
-                if keyword in message_lower:
-                    score += 3.0
-                    found_keywords.append(keyword)
-            
-            # Medium priority (peso 2)
-            for keyword in priority_keywords["medium_priority"]:
-                if keyword in message_lower:
-                    score += 2.0
-                    found_keywords.append(keyword)
-            
-            # Low priority (peso 1)
-            for keyword in priority_keywords["low_priority"]:
-                if keyword in message_lower:
-                    score += 1.0
-                    found_keywords.append(keyword)
-            
-            if score > 0:
-                category_scores[category] = score
-                keywords_by_category[category] = found_keywords
+        category_scores, keywords_by_category = IntentDetector.score_keywords(message_lower)
         
         # Si no hay coincidencias, es consulta general
         if not category_scores:
@@ -195,29 +215,28 @@ class IntentDetector:
     @staticmethod
     def detect_navigation_pattern(message: str) -> Dict:
         """Detectar patrones claros de navegación usando regex"""
-        for pattern in IntentDetector.NAVIGATION_PATTERNS:
-            if re.search(pattern, message):
-                # Extraer palabras clave del match
-                keywords = []
-                if "quiero ir" in message or "voy a" in message:
-                    keywords.append("quiero ir")
-                elif "como llego" in message or "como voy" in message:
-                    keywords.append("como llego")
-                elif "llevame" in message or "guiame" in message:
-                    keywords.append("llevame")
-                elif "donde esta" in message or "donde queda" in message:
-                    keywords.append("donde esta")
-                else:
-                    keywords.append("navegación detectada")
-                
-                return {
-                    "category": IntentCategory.NAVIGATION.value,
-                    "confidence": 0.90,  # Alta confianza por patrón
-                    "keywords_found": keywords,
-                    "requires_clarification": False,
-                    "all_matches": [(IntentCategory.NAVIGATION.value, 0.90)]
-                }
-        
+        if IntentDetector._NAVIGATION_REGEX.search(message):
+            # Extraer palabras clave del match
+            keywords = []
+            if "quiero ir" in message or "voy a" in message:
+                keywords.append("quiero ir")
+            elif "como llego" in message or "como voy" in message:
+                keywords.append("como llego")
+            elif "llevame" in message or "guiame" in message:
+                keywords.append("llevame")
+            elif "donde esta" in message or "donde queda" in message:
+                keywords.append("donde esta")
+            else:
+                keywords.append("navegación detectada")
+            
+            return {
+                "category": IntentCategory.NAVIGATION.value,
+                "confidence": 0.90,  # Alta confianza por patrón
+                "keywords_found": keywords,
+                "requires_clarification": False,
+                "all_matches": [(IntentCategory.NAVIGATION.value, 0.90)]
+            }
+    
         return None
 
     @staticmethod
@@ -0,0 +1,228 @@
+import hashlib
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+import openai
+
+from app.config import settings
+
+
+@dataclass
+class LLMResponse:
+    """Resultado normalizado de una completion, independiente del proveedor"""
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    model: Optional[str] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximación de tokens (~4 caracteres por token) usada por el simulador"""
+    return max(1, len(text or "") // 4)
+
+
+# === MODELO DE LATENCIA ===
+class LatencyModel:
+    """Muestrea latencias de un LLM: tiempo hasta el primer token + generación a cierto ritmo de tokens"""
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(
+        self,
+        distribution: str = "lognormal",
+        mean_ms: float = 400.0,
+        stddev_ms: float = 150.0,
+        tokens_per_second: float = 60.0,
+        tokens_per_second_stddev: float = 15.0,
+        seed: Optional[int] = None
+    ):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Distribución de latencia no soportada: {distribution}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.stddev_ms = stddev_ms
+        self.tokens_per_second = tokens_per_second
+        self.tokens_per_second_stddev = tokens_per_second_stddev
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_settings(cls) -> "LatencyModel":
+        return cls(
+            distribution=settings.MOCK_LLM_LATENCY_DISTRIBUTION,
+            mean_ms=settings.MOCK_LLM_LATENCY_MS,
+            stddev_ms=settings.MOCK_LLM_LATENCY_STDDEV_MS,
+            tokens_per_second=settings.MOCK_LLM_TOKENS_PER_SECOND,
+            tokens_per_second_stddev=settings.MOCK_LLM_TOKENS_PER_SECOND_STDDEV,
+            seed=settings.MOCK_LLM_SEED
+        )
+
+    def sample_first_token_ms(self) -> float:
+        mean, std = self.mean_ms, self.stddev_ms
+        if self.distribution == "fixed" or std <= 0:
+            return max(0.0, mean)
+        if self.distribution == "uniform":
+            return max(0.0, self._rng.uniform(mean - std, mean + std))
+        if self.distribution == "normal":
+            return max(0.0, self._rng.gauss(mean, std))
+        # lognormal parametrizada por media y desviación estándar (cola larga, como un proveedor real)
+        sigma2 = math.log(1 + (std ** 2) / (mean ** 2))
+        mu = math.log(mean) - sigma2 / 2
+        return self._rng.lognormvariate(mu, math.sqrt(sigma2))
+
+    def sample_tokens_per_second(self) -> float:
+        if self.tokens_per_second_stddev <= 0:
+            return self.tokens_per_second
+        return max(1.0, self._rng.gauss(self.tokens_per_second, self.tokens_per_second_stddev))
+
+    def sample_completion_tokens(self, max_tokens: int) -> int:
+        target = settings.MOCK_LLM_COMPLETION_TOKENS
+        sampled = int(self._rng.gauss(target, target * 0.25))
+        return max(1, min(max_tokens, sampled))
+
+    def completion_seconds(self, completion_tokens: int) -> float:
+        """Duración total simulada de una completion"""
+        return self.sample_first_token_ms() / 1000.0 + completion_tokens / self.sample_tokens_per_second()
+
+    def should_fail(self) -> bool:
+        return settings.MOCK_LLM_ERROR_RATE > 0 and self._rng.random() < settings.MOCK_LLM_ERROR_RATE
+
+
+def fake_completion_text(messages: List[Dict], completion_tokens: int) -> str:
+    """Texto determinista de longitud aproximada a `completion_tokens`"""
+    last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    base = f"Respuesta simulada para: {last_user.strip()[:80]}."
+    filler = " Tecsup ofrece información del campus, carreras y servicios."
+    text = base
+    while estimate_tokens(text) < completion_tokens:
+        text += filler
+    return text[: completion_tokens * 4]
+
+
+def fake_embedding(text: str, dimensions: int) -> List[float]:
+    """Embedding pseudoaleatorio y normalizado, estable para el mismo texto"""
+    seed = int.from_bytes(hashlib.sha256((text or "").encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+# === BACKENDS ===
+class LLMBackend:
+    """Interfaz común para completions de chat y embeddings"""
+    name = "base"
+
+    def chat(
+        self,
+        messages: List[Dict],
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.4,
+        timeout: Optional[float] = None
+    ) -> LLMResponse:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str], model: Optional[str] = None, timeout: Optional[float] = None) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    """Backend para OpenAI o cualquier servidor compatible (incluido el simulador local)"""
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str] = None, timeout: float = 30):
+        if not api_key:
+            if not base_url:
+                raise Exception("OPENAI_API_KEY no encontrada en las variables de entorno")
+            # Los servidores locales compatibles no validan la clave
+            api_key = "sk-local"
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+
+    def chat(self, messages, model=None, max_tokens=512, temperature=0.4, timeout=None) -> LLMResponse:
+        client = self.client.with_options(timeout=timeout) if timeout else self.client
+        response = client.chat.completions.create(
+            model=model or settings.LLM_CHAT_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        content = response.choices[0].message.content if response.choices else ""
+        usage = response.usage
+        return LLMResponse(
+            content=(content or "").strip(),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            total_tokens=getattr(usage, "total_tokens", 0) or 0,
+            model=getattr(response, "model", None) or model
+        )
+
+    def embed(self, texts, model=None, timeout=None) -> List[List[float]]:
+        client = self.client.with_options(timeout=timeout) if timeout else self.client
+        response = client.embeddings.create(
+            model=model or settings.LLM_EMBEDDING_MODEL,
+            input=texts
+        )
+        return [item.embedding for item in response.data]
+
+
+class MockBackend(LLMBackend):
+    """Simulador en proceso: no hace llamadas de red, solo reproduce la latencia configurada"""
+    name = "mock"
+
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        self.latency = latency or LatencyModel.from_settings()
+
+    def chat(self, messages, model=None, max_tokens=512, temperature=0.4, timeout=None) -> LLMResponse:
+        completion_tokens = self.latency.sample_completion_tokens(max_tokens)
+        duration = self.latency.completion_seconds(completion_tokens)
+        if timeout is not None and duration > timeout:
+            time.sleep(timeout)
+            raise openai.APITimeoutError(request=httpx.Request("POST", "mock://llm/chat/completions"))
+        time.sleep(duration)
+        if self.latency.should_fail():
+            raise openai.APIConnectionError(
+                message="Error simulado del proveedor LLM",
+                request=httpx.Request("POST", "mock://llm/chat/completions")
+            )
+
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        return LLMResponse(
+            content=fake_completion_text(messages, completion_tokens),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            model=model or settings.LLM_CHAT_MODEL
+        )
+
+    def embed(self, texts, model=None, timeout=None) -> List[List[float]]:
+        duration = settings.MOCK_LLM_EMBEDDING_LATENCY_MS / 1000.0
+        if timeout is not None and duration > timeout:
+            time.sleep(timeout)
+            raise openai.APITimeoutError(request=httpx.Request("POST", "mock://llm/embeddings"))
+        time.sleep(duration)
+        return [fake_embedding(t, settings.LLM_EMBEDDING_DIMENSIONS) for t in texts]
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """Devuelve el backend configurado en `settings.LLM_BACKEND` (instancia compartida)"""
+    global _backend
+    if _backend is None:
+        if settings.LLM_BACKEND == "mock":
+            _backend = MockBackend()
+        elif settings.LLM_BACKEND == "openai":
+            _backend = OpenAIBackend(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.LLM_BASE_URL,
+                timeout=settings.LLM_TIMEOUT_SECONDS
+            )
+        else:
+            raise Exception(f"LLM_BACKEND desconocido: {settings.LLM_BACKEND}")
+    return _backend
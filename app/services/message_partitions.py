@@ -0,0 +1,240 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.chat import Conversation, ConversationArchive, Message, MessageFeedback
+
+logger = logging.getLogger(__name__)
+
+# messages está particionada por mes sobre created_at: messages_yYYYYmMM para cada mes y
+# messages_default para lo que caiga fuera de las particiones creadas.
+DEFAULT_PARTITION = "messages_default"
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"messages_y{month.year:04d}m{month.month:02d}"
+
+
+def list_message_partitions(db: Session) -> List[Dict]:
+    """Particiones de messages con su rango y filas estimadas (estadísticas del planner)"""
+    rows = db.execute(text(
+        """
+        SELECT child.relname AS name,
+               pg_get_expr(child.relpartbound, child.oid) AS bounds,
+               GREATEST(child.reltuples, 0)::bigint AS estimated_rows
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'messages'
+        ORDER BY child.relname
+        """
+    )).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def ensure_message_partitions(
+    db: Session,
+    months_ahead: Optional[int] = None,
+    months_back: int = 0
+) -> List[str]:
+    """Crea las particiones mensuales que falten (desde `months_back` meses atrás hasta
+    `months_ahead` meses adelante) y la partición por defecto. Devuelve las creadas."""
+    months_ahead = settings.MESSAGE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    existing = {p["name"] for p in list_message_partitions(db)}
+    current = _month_start(datetime.utcnow().date())
+    created = []
+
+    for offset in range(-months_back, months_ahead + 1):
+        start = _add_months(current, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        try:
+            moved = _create_month_partition(db, name, start, DEFAULT_PARTITION in existing)
+            db.commit()
+            created.append(name)
+            if moved:
+                logger.info(f"{moved} mensajes movidos de {DEFAULT_PARTITION} a {name}")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"No se pudo crear la partición {name}: {e}")
+
+    if DEFAULT_PARTITION not in existing:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF messages DEFAULT"))
+        db.commit()
+        created.append(DEFAULT_PARTITION)
+
+    if created:
+        logger.info(f"Particiones de messages creadas: {', '.join(created)}")
+    return created
+
+
+def _create_month_partition(db: Session, name: str, start: date, has_default: bool) -> int:
+    """Crea la partición del mes que empieza en `start` (sin commit).
+
+    Si la partición por defecto ya tiene filas de ese mes, PostgreSQL rechaza la partición
+    nueva por solapamiento: se desacopla la por defecto, se crea la del mes, se mueven esas
+    filas y se vuelve a acoplar, todo en la misma transacción. Devuelve las filas movidas.
+    """
+    end = _add_months(start, 1)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    month_filter = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+
+    if not has_default or not db.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {month_filter})"
+    )).scalar():
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages {bounds}"))
+        return 0
+
+    db.execute(text(f"ALTER TABLE messages DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(text(f"CREATE TABLE {name} PARTITION OF messages {bounds}"))
+    moved = db.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {month_filter} RETURNING *) "
+        f"INSERT INTO messages SELECT * FROM moved"
+    )).rowcount
+    db.execute(text(f"ALTER TABLE messages ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return moved
+
+
+def _archive_payload(messages: List[Message], feedback: Dict[int, bool]) -> List[Dict]:
+    return [
+        {
+            "id": m.id,
+            "is_from_user": m.is_from_user,
+            "content": m.content,
+            "created_at": m.created_at.isoformat() if m.created_at else None,
+            "scene_context_id": m.scene_context_id,
+            "intent_category": m.intent_category,
+            "intent_confidence": m.intent_confidence,
+            "tokens_used": m.tokens_used,
+            "model_name": m.model_name,
+            "response_time_ms": m.response_time_ms,
+            "feedback_is_positive": feedback.get(m.id),
+        }
+        for m in messages
+    ]
+
+
+def archive_inactive_conversations(
+    db: Session,
+    months: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None
+) -> Dict:
+    """Mueve a conversation_archive las conversaciones sin actividad en `months` meses.
+
+    Cada lote (conversaciones, mensajes y feedback) se archiva y borra en una transacción.
+    Después se eliminan las particiones mensuales anteriores al corte que quedaron vacías.
+    """
+    months = settings.ARCHIVE_AFTER_MONTHS if months is None else months
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = _add_months(_month_start(datetime.utcnow().date()), -months)
+    last_activity = func.coalesce(
+        Conversation.last_message_at, Conversation.updated_at, Conversation.created_at
+    )
+
+    archived_conversations = 0
+    archived_messages = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        conversations = db.query(Conversation).filter(
+            last_activity < cutoff
+        ).order_by(Conversation.id).limit(batch_size).all()
+        if not conversations:
+            break
+
+        conversation_ids = [c.id for c in conversations]
+        try:
+            messages = db.query(Message).filter(
+                Message.conversation_id.in_(conversation_ids)
+            ).order_by(Message.conversation_id, Message.id).all()
+            message_ids = [m.id for m in messages]
+            feedback = dict(
+                db.query(MessageFeedback.message_id, MessageFeedback.is_positive).filter(
+                    MessageFeedback.message_id.in_(message_ids)
+                ).all()
+            ) if message_ids else {}
+
+            by_conversation: Dict[int, List[Message]] = {}
+            for message in messages:
+                by_conversation.setdefault(message.conversation_id, []).append(message)
+
+            for conversation in conversations:
+                conversation_messages = by_conversation.get(conversation.id, [])
+                db.merge(ConversationArchive(
+                    id=conversation.id,
+                    user_id=conversation.user_id,
+                    title=conversation.title,
+                    scene_id=conversation.scene_id,
+                    summary=conversation.summary,
+                    message_count=len(conversation_messages),
+                    created_at=conversation.created_at,
+                    last_message_at=conversation.last_message_at,
+                    messages=_archive_payload(conversation_messages, feedback)
+                ))
+
+            if message_ids:
+                db.query(MessageFeedback).filter(
+                    MessageFeedback.message_id.in_(message_ids)
+                ).delete(synchronize_session=False)
+            db.query(Message).filter(
+                Message.conversation_id.in_(conversation_ids)
+            ).delete(synchronize_session=False)
+            db.query(Conversation).filter(
+                Conversation.id.in_(conversation_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.expunge_all()
+
+        archived_conversations += len(conversation_ids)
+        archived_messages += len(messages)
+        batches += 1
+
+    dropped = drop_empty_partitions(db, before=cutoff)
+    logger.info(
+        f"Archivo: {archived_conversations} conversaciones y {archived_messages} mensajes "
+        f"anteriores a {cutoff.isoformat()}; particiones eliminadas: {dropped or '-'}"
+    )
+    return {
+        "cutoff": cutoff.isoformat(),
+        "archived_conversations": archived_conversations,
+        "archived_messages": archived_messages,
+        "dropped_partitions": dropped,
+    }
+
+
+def drop_empty_partitions(db: Session, before: date) -> List[str]:
+    """Elimina las particiones mensuales que terminan antes de `before` y no tienen filas"""
+    dropped = []
+    for partition in list_message_partitions(db):
+        name = partition["name"]
+        if not name.startswith("messages_y"):
+            continue
+        try:
+            month = date(int(name[10:14]), int(name[15:17]), 1)
+        except ValueError:
+            continue
+        if _add_months(month, 1) > before:
+            continue
+        if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        db.commit()
+        dropped.append(name)
+    return dropped
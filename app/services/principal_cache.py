@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Lo que la autorización necesita de un usuario (mismos nombres que el modelo User)"""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    is_admin: bool
+    current_scene_id: Optional[int] = None
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            current_scene_id=user.current_scene_id,
+            token_version=user.token_version or 0,
+        )
+
+
+class PrincipalCache:
+    """Principals por sujeto del token (uid, o username en tokens antiguos), con TTL corto y
+    tamaño acotado (LRU).
+
+    Evita la consulta del usuario en cada petición autenticada y guarda el token_version
+    contra el que se revocan los tokens. UserCRUD invalida la entrada cuando actualiza o
+    elimina al usuario; el TTL acota lo que otro worker puede seguir viendo después de un
+    cambio hecho en otro proceso.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._subject_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, subject: str) -> Optional[UserPrincipal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    self._remove(subject)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, subject: str, principal: UserPrincipal):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._remove(subject)
+            self._remove_id(principal.id)
+            self._entries[subject] = (time.monotonic(), principal)
+            self._subject_by_id[principal.id] = subject
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._subject_by_id.pop(evicted.id, None)
+
+    def invalidate(self, user_id: int):
+        """Descarta al usuario (se busca por id porque el username puede haber cambiado)"""
+        with self._lock:
+            self._remove_id(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._subject_by_id.clear()
+
+    def _remove(self, subject: str):
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            self._subject_by_id.pop(entry[1].id, None)
+
+    def _remove_id(self, user_id: int):
+        subject = self._subject_by_id.pop(user_id, None)
+        if subject is not None:
+            self._entries.pop(subject, None)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
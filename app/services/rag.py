@@ -7,6 +7,7 @@ import math
 
 from app.models.knowledge import KnowledgeBase, Event
 from app.services.embeddings import embed_text
+from app.services.background import background_runner
 
 
 def cosine_distance(a: List[float], b: List[float]) -> float:
@@ -19,94 +20,105 @@ def cosine_distance(a: List[float], b: List[float]) -> float:
     return 1.0 - (dot / (norm_a * norm_b))
 
 
-def retrieve_similar_passages(db: Session, query: str, top_k: int = 2, scene_id: Optional[int] = None, distance_threshold: Optional[float] = None) -> List[Dict]:
-    """Búsqueda híbrida: vector + keyword"""
+def retrieve_similar_passages(db: Session, query: str, top_k: int = 2, scene_id: Optional[int] = None, distance_threshold: Optional[float] = None, query_embedding: Optional[List[float]] = None) -> List[Dict]:
+    """Búsqueda híbrida: vector + keyword
 
-    q_emb = embed_text(query)
-    q_emb_str = '[' + ','.join(map(str, q_emb)) + ']'
+    `query_embedding` permite reutilizar un embedding ya calculado (p. ej. en lote).
+    """
+
+    q_emb = query_embedding
+    if q_emb is None:
+        try:
+            q_emb = embed_text(query)
+        except Exception as e:
+            # Sin embeddings (proveedor caído o breaker abierto) seguimos solo con la búsqueda por keywords
+            print(f"⚠️ Embedding no disponible, se usa solo búsqueda por keywords: {e}")
 
     vector_results = []
-    try:
-        if scene_id is not None:
-            sql_scene = """
-                SELECT id, content, category,
-                embedding <=> CAST(:q_vector AS vector) AS distance
-                FROM knowledge_base
-                WHERE is_active = true
-                AND scene_id = :scene_id
-                ORDER BY distance ASC
-                LIMIT :top_k
-            """
-            result_scene = db.execute(text(sql_scene), {"q_vector": q_emb_str, "scene_id": scene_id, "top_k": top_k})
-            rows_scene = result_scene.mappings().all()
-            vector_results = [
-                {"id": r["id"], "content": r["content"], "category": r["category"], "distance": float(r["distance"])}
-                for r in rows_scene
-            ]
-
-            if len(vector_results) < top_k:
-                remaining = top_k - len(vector_results)
-                sql_global = """
+    if q_emb is not None:
+        q_emb_str = '[' + ','.join(map(str, q_emb)) + ']'
+
+        try:
+            if scene_id is not None:
+                sql_scene = """
                     SELECT id, content, category,
                     embedding <=> CAST(:q_vector AS vector) AS distance
                     FROM knowledge_base
                     WHERE is_active = true
-                    AND scene_id IS NULL
+                    AND scene_id = :scene_id
                     ORDER BY distance ASC
-                    LIMIT :remaining
+                    LIMIT :top_k
                 """
-                result_global = db.execute(text(sql_global), {"q_vector": q_emb_str, "remaining": remaining})
-                rows_global = result_global.mappings().all()
-                vector_results += [
+                result_scene = db.execute(text(sql_scene), {"q_vector": q_emb_str, "scene_id": scene_id, "top_k": top_k})
+                rows_scene = result_scene.mappings().all()
+                vector_results = [
                     {"id": r["id"], "content": r["content"], "category": r["category"], "distance": float(r["distance"])}
-                    for r in rows_global
+                    for r in rows_scene
                 ]
-        else:
-            sql = """
-                SELECT id, content, category,
-                embedding <=> CAST(:q_vector AS vector) AS distance
-                FROM knowledge_base
-                WHERE is_active = true
-                ORDER BY distance ASC
-                LIMIT :top_k
-            """
-            result = db.execute(text(sql), {"q_vector": q_emb_str, "top_k": top_k})
-            rows = result.mappings().all()
-            vector_results = [
-                {"id": r["id"], "content": r["content"], "category": r["category"], "distance": float(r["distance"])}
-                for r in rows
-            ]
-
-        if distance_threshold is not None:
-            vector_results = [r for r in vector_results if r.get("distance", 1.0) <= distance_threshold]
 
-    except Exception as e:
-        print(f"⚠️ Error vector search con pgvector, fallback Python: {e}")
-        db.rollback()
+                if len(vector_results) < top_k:
+                    remaining = top_k - len(vector_results)
+                    sql_global = """
+                        SELECT id, content, category,
+                        embedding <=> CAST(:q_vector AS vector) AS distance
+                        FROM knowledge_base
+                        WHERE is_active = true
+                        AND scene_id IS NULL
+                        ORDER BY distance ASC
+                        LIMIT :remaining
+                    """
+                    result_global = db.execute(text(sql_global), {"q_vector": q_emb_str, "remaining": remaining})
+                    rows_global = result_global.mappings().all()
+                    vector_results += [
+                        {"id": r["id"], "content": r["content"], "category": r["category"], "distance": float(r["distance"])}
+                        for r in rows_global
+                    ]
+            else:
+                sql = """
+                    SELECT id, content, category,
+                    embedding <=> CAST(:q_vector AS vector) AS distance
+                    FROM knowledge_base
+                    WHERE is_active = true
+                    ORDER BY distance ASC
+                    LIMIT :top_k
+                """
+                result = db.execute(text(sql), {"q_vector": q_emb_str, "top_k": top_k})
+                rows = result.mappings().all()
+                vector_results = [
+                    {"id": r["id"], "content": r["content"], "category": r["category"], "distance": float(r["distance"])}
+                    for r in rows
+                ]
 
-        # CAMBIO: Fallback también incluye NULL
-        query_q = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True)
-        if scene_id is not None:
-            query_q = query_q.filter(
-                (KnowledgeBase.scene_id == scene_id) | (KnowledgeBase.scene_id.is_(None))
-            )
-        docs = query_q.all()
-
-        docs_with_emb = [d for d in docs if getattr(d, "embedding", None) is not None]
-        vector_results = []
-        for d in docs_with_emb:
-            dist = cosine_distance(q_emb, list(d.embedding))
-            vector_results.append({
-                "id": d.id,
-                "content": d.content,
-                "category": d.category,
-                "distance": float(dist)
-            })
+            if distance_threshold is not None:
+                vector_results = [r for r in vector_results if r.get("distance", 1.0) <= distance_threshold]
 
-        vector_results.sort(key=lambda x: x["distance"])
-        if distance_threshold is not None:
-            vector_results = [r for r in vector_results if r["distance"] <= distance_threshold]
-        vector_results = vector_results[:top_k]
+        except Exception as e:
+            print(f"⚠️ Error vector search con pgvector, fallback Python: {e}")
+            db.rollback()
+
+            # CAMBIO: Fallback también incluye NULL
+            query_q = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True)
+            if scene_id is not None:
+                query_q = query_q.filter(
+                    (KnowledgeBase.scene_id == scene_id) | (KnowledgeBase.scene_id.is_(None))
+                )
+            docs = query_q.all()
+
+            docs_with_emb = [d for d in docs if getattr(d, "embedding", None) is not None]
+            vector_results = []
+            for d in docs_with_emb:
+                dist = cosine_distance(q_emb, list(d.embedding))
+                vector_results.append({
+                    "id": d.id,
+                    "content": d.content,
+                    "category": d.category,
+                    "distance": float(dist)
+                })
+
+            vector_results.sort(key=lambda x: x["distance"])
+            if distance_threshold is not None:
+                vector_results = [r for r in vector_results if r["distance"] <= distance_threshold]
+            vector_results = vector_results[:top_k]
 
     keyword_results = []
     try:
@@ -143,21 +155,20 @@ def retrieve_similar_passages(db: Session, query: str, top_k: int = 2, scene_id:
     combined = rerank_passages(query, combined)
     
     if combined:
-        try:
-            unique_ids = list(set(r["id"] for r in combined))
-            db.query(KnowledgeBase).filter(
-                KnowledgeBase.id.in_(unique_ids)
-            ).update(
-                {"usage_count": KnowledgeBase.usage_count + 1},
-                synchronize_session=False
-            )
-            db.commit()
-        except Exception as e:
-            print(f"⚠️ Error al incrementar usage_count: {e}")
-            db.rollback()
+        background_runner.submit(increment_usage_count, list(set(r["id"] for r in combined)))
 
     return combined
 
+def increment_usage_count(db: Session, kb_ids: List[int]):
+    """Suma un uso a las entradas recuperadas (se ejecuta en segundo plano)"""
+    db.query(KnowledgeBase).filter(
+        KnowledgeBase.id.in_(kb_ids)
+    ).update(
+        {"usage_count": KnowledgeBase.usage_count + 1},
+        synchronize_session=False
+    )
+    db.commit()
+
 def merge_hybrid_results(vector_results: List[Dict], keyword_results: List[Dict], top_k: int) -> List[Dict]:
     """Fusiona y deduplica resultados vector + keyword"""
     seen_ids = set()
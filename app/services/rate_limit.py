@@ -0,0 +1,221 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from app.config import settings
+
+# Semilla de una clave que el limitador todavía no conoce (arranque en frío o clave desalojada):
+# lista de timestamps (epoch) para ventanas deslizantes, entero para contadores sin ventana.
+Seed = Callable[[], Union[List[float], int]]
+
+
+class RateLimiter:
+    """Interfaz de los limitadores.
+
+    `hit` consume `cost` unidades de `key` si no se supera `limit` y devuelve (permitido, usados).
+    Con `window_seconds` es una ventana deslizante; sin ella, un contador acumulado.
+    """
+
+    def hit(
+        self,
+        key: str,
+        limit: int,
+        window_seconds: Optional[float] = None,
+        cost: int = 1,
+        seed: Optional[Seed] = None
+    ) -> Tuple[bool, int]:
+        raise NotImplementedError
+
+    def reset(self, key: str):
+        raise NotImplementedError
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Ventana deslizante en memoria del proceso (registro de timestamps por clave).
+
+    Guarda como máximo `max_keys` claves (LRU); una clave desalojada se vuelve a sembrar
+    desde la base de datos la próxima vez que se usa.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, Union[Deque[float], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window_seconds=None, cost=1, seed=None):
+        with self._lock:
+            known = key in self._entries
+        if not known:
+            # La semilla consulta la BD: se calcula fuera del lock
+            initial = seed() if seed else ([] if window_seconds else 0)
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = deque(sorted(initial)) if window_seconds else int(initial)
+
+        now = time.time()
+        with self._lock:
+            self._entries.move_to_end(key)
+            if window_seconds:
+                window: Deque[float] = self._entries[key]
+                while window and window[0] <= now - window_seconds:
+                    window.popleft()
+                used = len(window)
+                if used + cost > limit:
+                    return False, used
+                window.extend([now] * cost)
+                used += cost
+            else:
+                used = self._entries[key]
+                if used + cost > limit:
+                    return False, used
+                used += cost
+                self._entries[key] = used
+
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            return True, used
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SharedStoreRateLimiter(RateLimiter):
+    """Ventana deslizante en un almacén compartido con la API de Redis (sorted sets + contadores).
+
+    Sirve para varios workers/procesos. Verificar y consumir son operaciones separadas, así que
+    con mucha concurrencia sobre la misma clave el límite es aproximado.
+    """
+
+    def __init__(self, store, prefix: str = "ratelimit:", counter_ttl_seconds: int = 7 * 24 * 3600):
+        self.store = store
+        self.prefix = prefix
+        self.counter_ttl_seconds = counter_ttl_seconds
+
+    def hit(self, key, limit, window_seconds=None, cost=1, seed=None):
+        store_key = self.prefix + key
+        now = time.time()
+
+        if window_seconds:
+            if not self.store.exists(store_key) and seed:
+                initial = seed()
+                if initial:
+                    self.store.zadd(store_key, {f"{ts}:{uuid.uuid4().hex}": ts for ts in initial})
+            self.store.zremrangebyscore(store_key, 0, now - window_seconds)
+            used = int(self.store.zcard(store_key))
+            if used + cost > limit:
+                return False, used
+            self.store.zadd(store_key, {f"{now}:{uuid.uuid4().hex}": now for _ in range(cost)})
+            self.store.expire(store_key, int(window_seconds) + 1)
+            return True, used + cost
+
+        if not self.store.exists(store_key):
+            self.store.set(store_key, int(seed() if seed else 0), nx=True, ex=self.counter_ttl_seconds)
+        used = int(self.store.get(store_key) or 0)
+        if used + cost > limit:
+            return False, used
+        used = int(self.store.incrby(store_key, cost))
+        self.store.expire(store_key, self.counter_ttl_seconds)
+        return True, used
+
+    def reset(self, key):
+        self.store.delete(self.prefix + key)
+
+
+class LocalSharedStore:
+    """Sustituto local (en memoria) del subconjunto de Redis que usa SharedStoreRateLimiter.
+
+    Permite ejecutar el backend compartido sin un servidor Redis (desarrollo, pruebas de carga).
+    """
+
+    def __init__(self):
+        self._data: Dict[str, object] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _purge(self, key: str):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def exists(self, key: str) -> int:
+        with self._lock:
+            self._purge(key)
+            return int(key in self._data)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._expires[key] = time.time() + seconds
+            return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            self._expires.pop(key, None)
+            return int(self._data.pop(key, None) is not None)
+
+    def get(self, key: str):
+        with self._lock:
+            self._purge(key)
+            return self._data.get(key)
+
+    def set(self, key: str, value, nx: bool = False, ex: Optional[int] = None):
+        with self._lock:
+            self._purge(key)
+            if nx and key in self._data:
+                return None
+            self._data[key] = value
+            if ex:
+                self._expires[key] = time.time() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def incrby(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._purge(key)
+            value = int(self._data.get(key) or 0) + amount
+            self._data[key] = value
+            return value
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        with self._lock:
+            self._purge(key)
+            zset = self._data.setdefault(key, {})
+            added = sum(1 for member in mapping if member not in zset)
+            zset.update(mapping)
+            return added
+
+    def zremrangebyscore(self, key: str, min_score: float, max_score: float) -> int:
+        with self._lock:
+            self._purge(key)
+            zset = self._data.get(key) or {}
+            removed = [m for m, score in zset.items() if min_score <= score <= max_score]
+            for member in removed:
+                del zset[member]
+            return len(removed)
+
+    def zcard(self, key: str) -> int:
+        with self._lock:
+            self._purge(key)
+            return len(self._data.get(key) or {})
+
+
+def build_rate_limiter() -> RateLimiter:
+    """Limitador según RATE_LIMIT_BACKEND: "memory" (por proceso) o "shared" (Redis o sustituto local)"""
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        if settings.RATE_LIMIT_REDIS_URL:
+            try:
+                import redis
+                return SharedStoreRateLimiter(redis.Redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+            except ImportError:
+                print("⚠️ Paquete 'redis' no instalado, se usa el almacén compartido local")
+        return SharedStoreRateLimiter(LocalSharedStore())
+    return InMemoryRateLimiter(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = build_rate_limiter()
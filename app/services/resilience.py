@@ -0,0 +1,248 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(Exception):
+    """El proveedor LLM no puede usarse ahora (breaker abierto o presupuesto agotado)"""
+
+
+class LatencyBudgetExceeded(LLMUnavailableError):
+    """La llamada no terminó dentro del presupuesto de latencia"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """El circuit breaker está abierto y no se intentó la llamada"""
+
+
+class CircuitBreaker:
+    """Circuit breaker con ventana deslizante de resultados.
+
+    - closed: deja pasar llamadas; se abre si la tasa de error o el p95 de latencia de la
+      ventana superan los umbrales.
+    - open: rechaza llamadas hasta que pase `cooldown_seconds`.
+    - half_open: deja pasar una sola llamada de prueba; si va bien se cierra, si falla se reabre.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        latency_threshold_ms: Optional[float] = None,
+        cooldown_seconds: float = 30.0
+    ):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold_ms = latency_threshold_ms
+        self.cooldown_seconds = cooldown_seconds
+        self._results: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = "half_open"
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency_ms: float):
+        with self._lock:
+            if self._state == "half_open":
+                self._state = "closed"
+                self._results.clear()
+            self._probe_in_flight = False
+            self._results.append((True, latency_ms))
+            self._evaluate()
+
+    def record_failure(self, latency_ms: float = 0.0):
+        with self._lock:
+            if self._state == "half_open":
+                self._trip()
+                return
+            self._results.append((False, latency_ms))
+            self._evaluate()
+
+    def _evaluate(self):
+        if self._state != "closed" or len(self._results) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._results if not ok)
+        if failures / len(self._results) >= self.error_rate_threshold:
+            self._trip()
+            return
+        if self.latency_threshold_ms:
+            p95 = _percentile([lat for ok, lat in self._results if ok], 95)
+            if p95 is not None and p95 > self.latency_threshold_ms:
+                self._trip()
+
+    def _trip(self):
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._times_opened += 1
+        self._results.clear()
+        print(f"⚠️ Circuit breaker '{self.name}' abierto")
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            return _percentile([lat for ok, lat in self._results if ok], pct)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            results = list(self._results)
+        successes = [lat for ok, lat in results if ok]
+        return {
+            "name": self.name,
+            "state": state,
+            "window_calls": len(results),
+            "window_failures": sum(1 for ok, _ in results if not ok),
+            "p95_latency_ms": _percentile(successes, 95),
+            "times_opened": self._times_opened,
+        }
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+# Hilos para las llamadas con presupuesto/hedging (el cliente LLM es síncrono)
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_CONCURRENT_CALLS, thread_name_prefix="llm")
+
+
+def call_with_budget(
+    fn: Callable[[float], T],
+    budget_seconds: float,
+    hedge_after_seconds: Optional[float] = None
+) -> T:
+    """Ejecuta `fn(timeout)` respetando un presupuesto total de latencia.
+
+    Si `hedge_after_seconds` está definido y la primera llamada no terminó en ese tiempo,
+    lanza una segunda llamada idéntica y devuelve la primera que responda bien.
+    Lanza `LatencyBudgetExceeded` si ninguna termina dentro del presupuesto.
+    """
+    deadline = time.monotonic() + budget_seconds
+    futures = [_executor.submit(fn, budget_seconds)]
+
+    if hedge_after_seconds is not None and 0 < hedge_after_seconds < budget_seconds:
+        done, _ = wait(futures, timeout=hedge_after_seconds)
+        if not done:
+            futures.append(_executor.submit(fn, max(0.1, deadline - time.monotonic())))
+
+    last_error: Optional[BaseException] = None
+    while futures:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            futures.remove(future)
+            error = future.exception()
+            if error is None:
+                for pending in futures:
+                    pending.cancel()
+                return future.result()
+            last_error = error
+
+    if futures or last_error is None:
+        raise LatencyBudgetExceeded(f"Sin respuesta del LLM en {budget_seconds:.1f}s")
+    raise last_error
+
+
+def hedge_delay_seconds(breaker: CircuitBreaker) -> Optional[float]:
+    """Retardo del hedge: el configurado o el p95 observado cuando hay muestras suficientes"""
+    if not settings.LLM_HEDGE_ENABLED:
+        return None
+    if settings.LLM_HEDGE_DELAY_MS:
+        return settings.LLM_HEDGE_DELAY_MS / 1000.0
+    snapshot = breaker.snapshot()
+    if snapshot["window_calls"] < settings.LLM_HEDGE_MIN_SAMPLES or snapshot["p95_latency_ms"] is None:
+        return None
+    return snapshot["p95_latency_ms"] / 1000.0
+
+
+def guarded_call(
+    breaker: CircuitBreaker,
+    fn: Callable[[float], T],
+    budget_seconds: float,
+    hedge: bool = False
+) -> T:
+    """Llamada protegida por breaker + presupuesto (+ hedge opcional). Registra el resultado en el breaker."""
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"Circuit breaker '{breaker.name}' abierto")
+
+    start = time.perf_counter()
+    try:
+        result = call_with_budget(
+            fn,
+            budget_seconds,
+            hedge_after_seconds=hedge_delay_seconds(breaker) if hedge else None
+        )
+    except Exception:
+        breaker.record_failure((time.perf_counter() - start) * 1000)
+        raise
+    breaker.record_success((time.perf_counter() - start) * 1000)
+    return result
+
+
+chat_breaker = CircuitBreaker(
+    "chat",
+    window_size=settings.LLM_BREAKER_WINDOW,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    error_rate_threshold=settings.LLM_BREAKER_ERROR_RATE,
+    latency_threshold_ms=settings.LLM_BREAKER_LATENCY_MS,
+    cooldown_seconds=settings.LLM_BREAKER_COOLDOWN_SECONDS
+)
+
+# Títulos y resúmenes (de escena y de conversación) usan el mismo proveedor pero tienen su
+# propio breaker: sus timeouts no deben abrir el de las respuestas del chat ni sesgar el p95
+# con el que se calcula el hedge.
+auxiliary_breaker = CircuitBreaker(
+    "chat_auxiliary",
+    window_size=settings.LLM_BREAKER_WINDOW,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    error_rate_threshold=settings.LLM_BREAKER_ERROR_RATE,
+    latency_threshold_ms=settings.LLM_BREAKER_LATENCY_MS,
+    cooldown_seconds=settings.LLM_BREAKER_COOLDOWN_SECONDS
+)
+
+embedding_breaker = CircuitBreaker(
+    "embeddings",
+    window_size=settings.LLM_BREAKER_WINDOW,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    error_rate_threshold=settings.LLM_BREAKER_ERROR_RATE,
+    cooldown_seconds=settings.LLM_BREAKER_COOLDOWN_SECONDS
+)
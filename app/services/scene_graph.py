@@ -241,18 +241,32 @@ class SceneGraph:
         
         return None
     
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Minúsculas, sin tildes ni signos de puntuación y con espacios simples"""
+        if not text:
+            return ""
+        text = unicodedata.normalize("NFD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+        text = text.lower()
+        text = re.sub(r"[^\w\s]", "", text)
+        text = re.sub(r"\s+", " ", text).strip()
+        return text
+
+    @staticmethod
+    def find_alias_targets(query: str) -> set:
+        """Escenas mencionadas explícitamente (por alias exacto, sin fuzzy) en la consulta"""
+        norm_query = f" {SceneGraph.normalize_text(query)} "
+        return {
+            scene_key
+            for alias, scene_key in SceneGraph.SCENE_ALIASES.items()
+            if f" {SceneGraph.normalize_text(alias)} " in norm_query
+        }
+
     @staticmethod
     def resolve_scene_name(query: str, threshold: int = 70) -> Optional[str]:
         """Extraer nombre de escena de la consulta del usuario"""
-        def _normalize(text: str) -> str:
-            if not text:
-                return ""
-            text = unicodedata.normalize("NFD", text)
-            text = "".join(ch for ch in text if not unicodedata.combining(ch))
-            text = text.lower()
-            text = re.sub(r"[^\w\s]", "", text)
-            text = re.sub(r"\s+", " ", text).strip()
-            return text
+        _normalize = SceneGraph.normalize_text
 
         raw_lower = query.lower()
         search_areas = [raw_lower]
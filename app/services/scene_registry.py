@@ -0,0 +1,81 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.scene import Scene
+
+
+@dataclass(frozen=True)
+class SceneEntry:
+    """Copia inmutable de una fila de `scenes` (mismos atributos que el modelo)"""
+    id: int
+    scene_key: str
+    name: str
+    is_relevant: bool
+
+
+class SceneRegistry:
+    """Escenas en memoria, por key y por id.
+
+    La tabla es pequeña y casi no cambia: se carga al iniciar, se recarga cuando SceneCRUD
+    escribe y, para ver cambios hechos por otros procesos, cuando pasa SCENE_REGISTRY_TTL_SECONDS.
+    Las recargas construyen mapas nuevos y los reemplazan de una vez, así las lecturas nunca
+    ven un estado a medias.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self._by_key: Mapping[str, SceneEntry] = MappingProxyType({})
+        self._by_id: Mapping[int, SceneEntry] = MappingProxyType({})
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> int:
+        """Recarga todas las escenas desde la base de datos"""
+        entries = [
+            SceneEntry(id=s.id, scene_key=s.scene_key, name=s.name, is_relevant=bool(s.is_relevant))
+            for s in db.query(Scene).all()
+        ]
+        with self._lock:
+            self._by_key = MappingProxyType({e.scene_key: e for e in entries})
+            self._by_id = MappingProxyType({e.id: e for e in entries})
+            self._loaded_at = time.monotonic()
+        return len(entries)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl_seconds:
+            self.load(db)
+
+    def get_by_key(self, db: Session, scene_key: Optional[str]) -> Optional[SceneEntry]:
+        if not scene_key:
+            return None
+        self._ensure_loaded(db)
+        return self._by_key.get(scene_key)
+
+    def get_by_id(self, db: Session, scene_id: Optional[int]) -> Optional[SceneEntry]:
+        if not scene_id:
+            return None
+        self._ensure_loaded(db)
+        return self._by_id.get(scene_id)
+
+    def key_for_id(self, db: Session, scene_id: Optional[int]) -> Optional[str]:
+        """scene_key de un scene_id (p. ej. Message.scene_context_id) sin cargar la relación"""
+        entry = self.get_by_id(db, scene_id)
+        return entry.scene_key if entry else None
+
+    def all(self, db: Session) -> List[SceneEntry]:
+        self._ensure_loaded(db)
+        return sorted(self._by_id.values(), key=lambda e: e.id)
+
+
+scene_registry = SceneRegistry(ttl_seconds=settings.SCENE_REGISTRY_TTL_SECONDS)
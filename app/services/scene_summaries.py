@@ -0,0 +1,199 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.scene_summary import scene_summary_crud
+from app.models.knowledge import KnowledgeBase, Event
+from app.models.scene import Scene, SceneSummary
+from app.services.background import background_runner
+from app.services.llm import get_llm_backend
+from app.services.resilience import auxiliary_breaker, guarded_call
+from app.services.scene_graph import SceneGraph
+
+# Escena -> momento (monotonic) en que el chat pidió regenerar su resumen por última vez
+_refresh_requested_at: Dict[int, float] = {}
+_refresh_lock = threading.Lock()
+
+
+def collect_scene_sources(db: Session, scene_id: int) -> Tuple[List[KnowledgeBase], List[Event]]:
+    """Entradas activas de knowledge_base y eventos próximos de una escena"""
+    kb_rows = db.query(KnowledgeBase).filter(
+        KnowledgeBase.scene_id == scene_id,
+        KnowledgeBase.is_active == True
+    ).order_by(KnowledgeBase.id).all()
+
+    events = db.query(Event).filter(
+        Event.scene_id == scene_id,
+        Event.is_active == True,
+        Event.event_date >= datetime.now()
+    ).order_by(Event.event_date).limit(5).all()
+
+    return kb_rows, events
+
+
+def compute_source_hash(scene: Scene, kb_rows: List[KnowledgeBase], events: List[Event]) -> str:
+    """Huella del contenido usado para el resumen; si no cambia, no hace falta regenerarlo"""
+    parts = [scene.name or ""]
+    parts += [f"kb:{kb.id}:{kb.content}" for kb in kb_rows]
+    parts += [f"ev:{ev.id}:{ev.title}:{ev.event_date}:{ev.location}:{ev.modalidad}" for ev in events]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _format_event(event: Event) -> str:
+    when = event.event_date.strftime('%d/%m/%Y %H:%M') if event.event_date else 'Fecha por definir'
+    if event.modalidad and event.modalidad.lower() == "virtual":
+        where = f"virtual ({event.link or 'enlace por definir'})"
+    else:
+        where = event.location or "ubicación por definir"
+    return f"{event.title} — {where} — {when}"
+
+
+def build_template_summary(scene: Scene, kb_rows: List[KnowledgeBase], events: List[Event]) -> str:
+    """Resumen sin LLM, usado como respaldo si el proveedor no está disponible"""
+    text = f"Estás en {scene.name}."
+    if kb_rows:
+        text += " " + " ".join(kb.content.strip() for kb in kb_rows)
+    if events:
+        text += "\n\n📅 Próximos eventos aquí:\n" + "\n".join(f"• {_format_event(ev)}" for ev in events)
+    return text
+
+
+def generate_summary_text(scene: Scene, kb_rows: List[KnowledgeBase], events: List[Event]) -> Tuple[str, Optional[int]]:
+    """Genera el resumen con el LLM; si falla usa la plantilla. Devuelve (texto, tokens)"""
+    sources = "\n".join(f"- {kb.content.strip()}" for kb in kb_rows) or "- (sin entradas)"
+    if events:
+        sources += "\n\nPróximos eventos:\n" + "\n".join(f"- {_format_event(ev)}" for ev in events)
+
+    messages = [
+        {"role": "system", "content": (
+            "Eres el asistente virtual del campus de Tecsup Lima. Redacta en español, en 3 a 5 oraciones, "
+            "qué hay en la zona indicada y qué puede hacer ahí el visitante. Usa SOLO la información dada; "
+            "si hay eventos próximos, menciónalos con su fecha."
+        )},
+        {"role": "user", "content": f"Zona: {scene.name}\n\nInformación:\n{sources}"}
+    ]
+
+    try:
+        backend = get_llm_backend()
+        response = guarded_call(
+            auxiliary_breaker,
+            lambda timeout: backend.chat(
+                messages,
+                model=settings.LLM_CHAT_MODEL,
+                max_tokens=300,
+                temperature=0.3,
+                timeout=timeout,
+            ),
+            settings.LLM_LATENCY_BUDGET_MS / 1000.0
+        )
+        if response.content:
+            return response.content, response.total_tokens
+    except Exception as e:
+        print(f"⚠️ No se pudo generar el resumen de '{scene.scene_key}' con IA, se usa plantilla: {e}")
+
+    return build_template_summary(scene, kb_rows, events), None
+
+
+def refresh_scene_summary(db: Session, scene: Scene, force: bool = False) -> Optional[SceneSummary]:
+    """Regenera el resumen de una escena si su contenido cambió (o si `force`).
+
+    Las escenas sin entradas ni eventos no tienen resumen: se atienden por el flujo normal.
+    """
+    kb_rows, events = collect_scene_sources(db, scene.id)
+    current = scene_summary_crud.get_by_scene(db, scene.id)
+
+    if not kb_rows and not events:
+        if current:
+            scene_summary_crud.delete_by_scene(db, scene.id)
+        return None
+
+    source_hash = compute_source_hash(scene, kb_rows, events)
+    if current and not force and not current.is_stale and current.source_hash == source_hash:
+        return current
+
+    summary, tokens_used = generate_summary_text(scene, kb_rows, events)
+    return scene_summary_crud.upsert(
+        db,
+        scene_id=scene.id,
+        summary=summary,
+        source_hash=source_hash,
+        tokens_used=tokens_used,
+        expires_at=events[0].event_date if events else None
+    )
+
+
+def regenerate_scene_summaries(db: Session, scene_ids: Optional[List[int]] = None, force: bool = False) -> Dict:
+    """Regenera en lote los resúmenes de todas las escenas (o de las indicadas)"""
+    query = db.query(Scene)
+    if scene_ids:
+        query = query.filter(Scene.id.in_(scene_ids))
+
+    result = {"processed": 0, "generated": 0, "skipped": 0, "errors": 0}
+    for scene in query.order_by(Scene.id).all():
+        result["processed"] += 1
+        try:
+            summary = refresh_scene_summary(db, scene, force=force)
+            if summary is None:
+                result["skipped"] += 1
+            else:
+                result["generated"] += 1
+        except Exception as e:
+            print(f"⚠️ Error regenerando resumen de '{scene.scene_key}': {e}")
+            db.rollback()
+            result["errors"] += 1
+    return result
+
+
+def request_scene_summary_refresh(scene_id: int) -> bool:
+    """Encola en segundo plano la regeneración del resumen de una escena pedida desde el chat.
+
+    Una ráfaga de "¿qué hay aquí?" sobre la misma escena encola una sola regeneración: mientras
+    no pasen SCENE_SUMMARY_REFRESH_COOLDOWN_SECONDS desde la última petición no se vuelve a
+    encolar (cubre también las escenas sin fuentes, que nunca llegan a tener resumen).
+    Devuelve True si se encoló.
+    """
+    now = time.monotonic()
+    with _refresh_lock:
+        requested_at = _refresh_requested_at.get(scene_id)
+        if requested_at is not None and now - requested_at < settings.SCENE_SUMMARY_REFRESH_COOLDOWN_SECONDS:
+            return False
+        _refresh_requested_at[scene_id] = now
+
+    queued = background_runner.submit(regenerate_scene_summaries, [scene_id])
+    if not queued:
+        # Rechazada (cola llena): que la próxima petición lo vuelva a intentar
+        with _refresh_lock:
+            if _refresh_requested_at.get(scene_id) == now:
+                del _refresh_requested_at[scene_id]
+    return queued
+
+
+def get_servable_summary(db: Session, scene_id: Optional[int]) -> Optional[SceneSummary]:
+    """Resumen vigente de una escena (no marcado como desactualizado ni vencido)"""
+    if not scene_id:
+        return None
+    summary = scene_summary_crud.get_by_scene(db, scene_id)
+    if not summary or summary.is_stale:
+        return None
+    if summary.expires_at and summary.expires_at <= datetime.now():
+        return None
+    return summary
+
+
+def should_serve_scene_summary(intent_result: Dict, content: str, scene_key: Optional[str]) -> bool:
+    """El resumen sirve para preguntas de información de ubicación sobre la escena actual.
+
+    Si el mensaje menciona explícitamente otra escena ("¿qué hay en la biblioteca?") se
+    atiende por el flujo normal.
+    """
+    if not settings.SCENE_SUMMARIES_ENABLED or not scene_key:
+        return False
+    if intent_result.get("category") != "informacion_ubicacion" or intent_result.get("requires_clarification"):
+        return False
+    mentioned = SceneGraph.find_alias_targets(content)
+    return not mentioned or mentioned == {scene_key}
@@ -0,0 +1,117 @@
+"""Micro-benchmark de IntentDetector.
+
+Compara la detección anterior (8 re.search seguidos y un recorrido por categoría y prioridad)
+con la actual (una regex de navegación precompilada y una tabla plana de keywords), verifica
+que ambas den el mismo resultado y reporta microsegundos por mensaje:
+
+    python -m app.utils.benchmark_intents
+    python -m app.utils.benchmark_intents --messages mensajes.txt --number 20000
+"""
+import argparse
+import re
+import statistics
+import timeit
+from typing import Dict, List, Optional, Tuple
+
+from app.services.intent_detector import IntentDetector
+
+SAMPLE_MESSAGES = [
+    "hola",
+    "como llego a la biblioteca",
+    "donde esta el comedor?",
+    "quiero ir al laboratorio de mecatronica",
+    "que eventos hay esta semana, me interesan talleres y charlas",
+    "cuales son los requisitos de admision y cuando es el examen para postular",
+    "que carreras de ingenieria y tecnologia puedo estudiar",
+    "cual es el horario de atencion de la enfermeria los dias sabado",
+    "que es esto? cuentame para que sirve este ambiente",
+    "el gimnasio esta abierto hoy? que servicios del campus tiene disponible",
+]
+
+
+def legacy_match(message_lower: str) -> Tuple[bool, Dict, Dict]:
+    """Detección anterior: cada patrón y cada keyword por separado"""
+    for pattern in IntentDetector.NAVIGATION_PATTERNS:
+        if re.search(pattern, message_lower):
+            return True, {}, {}
+
+    category_scores, keywords_by_category = {}, {}
+    for category, priority_keywords in IntentDetector.INTENT_KEYWORDS.items():
+        score = 0.0
+        found_keywords = []
+        for priority, weight in IntentDetector.PRIORITY_WEIGHTS.items():
+            for keyword in priority_keywords[priority]:
+                if keyword in message_lower:
+                    score += weight
+                    found_keywords.append(keyword)
+        if score > 0:
+            category_scores[category] = score
+            keywords_by_category[category] = found_keywords
+    return False, category_scores, keywords_by_category
+
+
+def current_match(message_lower: str) -> Tuple[bool, Dict, Dict]:
+    """Detección actual: regex combinada y tabla plana"""
+    if IntentDetector._NAVIGATION_REGEX.search(message_lower):
+        return True, {}, {}
+
+    category_scores, keywords_by_category = {}, {}
+    for keyword, category, weight in IntentDetector._KEYWORD_TABLE:
+        if keyword in message_lower:
+            category_scores[category] = category_scores.get(category, 0.0) + weight
+            keywords_by_category.setdefault(category, []).append(keyword)
+    return False, category_scores, keywords_by_category
+
+
+def _per_message_us(fn, messages: List[str], number: int, repeat: int) -> float:
+    def run():
+        for message in messages:
+            fn(message)
+    runs = timeit.repeat(run, number=number, repeat=repeat)
+    return statistics.median(runs) / (number * len(messages)) * 1e6
+
+
+def run(messages: List[str], number: int = 5000, repeat: int = 5) -> Dict:
+    lowered = [m.lower() for m in messages]
+    mismatches = [m for m in lowered if legacy_match(m) != current_match(m)]
+    legacy_us = _per_message_us(legacy_match, lowered, number, repeat)
+    current_us = _per_message_us(current_match, lowered, number, repeat)
+    detect_us = _per_message_us(IntentDetector.detect_intent, messages, number, repeat)
+    return {
+        "messages": len(messages),
+        "keywords": len(IntentDetector._KEYWORD_TABLE),
+        "mismatches": mismatches,
+        "legacy_us": round(legacy_us, 2),
+        "current_us": round(current_us, 2),
+        "speedup": round(legacy_us / current_us, 2) if current_us else None,
+        "detect_intent_us": round(detect_us, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark de IntentDetector")
+    parser.add_argument("--messages", default=None, help="archivo con un mensaje por línea")
+    parser.add_argument("--number", type=int, default=5000, help="pasadas sobre los mensajes por medición")
+    parser.add_argument("--repeat", type=int, default=5, help="mediciones (se usa la mediana)")
+    args = parser.parse_args(argv)
+
+    messages = SAMPLE_MESSAGES
+    if args.messages:
+        with open(args.messages, encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    result = run(messages, number=args.number, repeat=args.repeat)
+    print(f"{result['messages']} mensajes, {result['keywords']} keywords")
+    print(f"- anterior: {result['legacy_us']} µs/mensaje")
+    print(f"- actual:   {result['current_us']} µs/mensaje (x{result['speedup']})")
+    print(f"- detect_intent completo: {result['detect_intent_us']} µs/mensaje")
+    if result["mismatches"]:
+        print(f"❌ {len(result['mismatches'])} mensajes con resultado distinto:")
+        for message in result["mismatches"]:
+            print(f"    {message}")
+    else:
+        print("✅ Mismo resultado en todos los mensajes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+
+class _PoolMetricsMixin:
+    """Cuenta checkouts, esperas y conexiones de overflow del pool.
+
+    Se mide alrededor de `_do_get`, que es donde QueuePool bloquea cuando no hay conexiones
+    libres: un checkout "espera" si al pedirlo el pool ya estaba lleno (sin conexiones
+    libres ni overflow disponible).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "overflow_events": 0,
+            "timeouts": 0,
+            "peak_checked_out": 0,
+        }
+
+    def _saturated(self) -> bool:
+        return self._pool.empty() and -1 < self._max_overflow <= self._overflow
+
+    def _do_get(self):
+        saturated = self._saturated()
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self._metrics["timeouts"] += 1
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics["checkouts"] += 1
+            if saturated:
+                metrics["waits"] += 1
+                metrics["wait_ms_total"] += elapsed_ms
+                metrics["wait_ms_max"] = max(metrics["wait_ms_max"], elapsed_ms)
+            if self._overflow > overflow_before and self._overflow > 0:
+                metrics["overflow_events"] += 1
+            metrics["peak_checked_out"] = max(metrics["peak_checked_out"], self.checkedout())
+        return connection
+
+    def metrics_snapshot(self) -> Dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        wait_total = metrics.pop("wait_ms_total")
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self._timeout,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **metrics,
+            "wait_ms_max": round(metrics["wait_ms_max"], 1),
+            "avg_wait_ms": round(wait_total / metrics["waits"], 1) if metrics["waits"] else None,
+        }
+
+
+class InstrumentedQueuePool(_PoolMetricsMixin, QueuePool):
+    """QueuePool del engine síncrono (psycopg2) con métricas"""
+
+
+class InstrumentedAsyncQueuePool(_PoolMetricsMixin, AsyncAdaptedQueuePool):
+    """Pool del engine async (asyncpg) con métricas"""
+
+
+def pool_options() -> Dict:
+    """Opciones comunes de create_engine/create_async_engine a partir de Settings"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def psycopg2_connect_args() -> Dict:
+    """application_name y statement_timeout para conexiones psycopg2 (libpq)"""
+    args = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return args
+
+
+def asyncpg_connect_args() -> Dict:
+    """Los mismos parámetros de sesión para asyncpg (server_settings)"""
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    return {"server_settings": server_settings}
+
+
+def pool_snapshot(pool) -> Dict:
+    if isinstance(pool, _PoolMetricsMixin):
+        return pool.metrics_snapshot()
+    return {"status": pool.status()}
@@ -0,0 +1,167 @@
+"""EXPLAIN ANALYZE de las consultas calientes del chat.
+
+Ejecuta cada consulta con valores reales de la base (la conversación con más mensajes y su
+usuario) y reporta tiempos, tipo de nodo raíz, índices usados y seq scans. Para comparar el
+antes y el después de una migración de índices:
+
+    python -m app.utils.explain_hot_queries --output antes.json
+    alembic upgrade head
+    python -m app.utils.explain_hot_queries --compare antes.json
+"""
+import argparse
+import json
+import statistics
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+from app.database import SessionLocal
+import app.models.knowledge  # noqa: F401  (registra los modelos de las relaciones)
+import app.models.note  # noqa: F401
+import app.models.scene  # noqa: F401
+from app.models.chat import Conversation, Message, MessageFeedback
+from app.models.user import User
+
+
+def sample_params(db: Session) -> Dict:
+    """Conversación con más mensajes, su usuario y la categoría de intención más común"""
+    busiest = db.query(Message.conversation_id).group_by(
+        Message.conversation_id
+    ).order_by(desc(func.count(Message.id))).limit(1).scalar()
+    conversation = db.query(Conversation.id, Conversation.user_id).filter(Conversation.id == busiest).first()
+    category = db.query(Message.intent_category).filter(
+        Message.intent_category.isnot(None)
+    ).group_by(Message.intent_category).order_by(desc(func.count(Message.id))).limit(1).scalar()
+    return {
+        "conversation_id": conversation.id if conversation else 0,
+        "user_id": conversation.user_id if conversation else 0,
+        "intent_category": category or "general",
+    }
+
+
+def hot_queries(db: Session, params: Dict) -> Dict[str, Query]:
+    """Las mismas consultas que arman los CRUD/servicios en los caminos calientes"""
+    conversation_id = params["conversation_id"]
+    user_id = params["user_id"]
+    since = datetime.utcnow() - timedelta(seconds=settings.RATE_LIMIT_WINDOW_SECONDS)
+    return {
+        "historial (últimos mensajes)": db.query(Message).filter(
+            Message.conversation_id == conversation_id
+        ).order_by(desc(Message.id)).limit(settings.CHAT_HISTORY_WINDOW),
+        "mensajes por fecha (conversación)": db.query(Message).filter(
+            Message.conversation_id == conversation_id
+        ).order_by(Message.created_at, Message.id).limit(50),
+        "límite por usuario (ventana)": db.query(Message.created_at).join(Conversation).filter(
+            Conversation.user_id == user_id,
+            Message.is_from_user == True,
+            Message.created_at >= since
+        ),
+        "listado de conversaciones": db.query(Conversation).filter(
+            Conversation.user_id == user_id
+        ).order_by(
+            desc(func.coalesce(Conversation.updated_at, Conversation.created_at)), desc(Conversation.id)
+        ).limit(100),
+        "mensajes por intención": db.query(Message).filter(
+            Message.intent_category == params["intent_category"]
+        ).order_by(desc(Message.created_at), desc(Message.id)).limit(50),
+        "mensajes con confianza mínima": db.query(Message).filter(
+            Message.intent_confidence >= 0.9
+        ).order_by(desc(Message.created_at), desc(Message.id)).limit(50),
+        "explorador admin (usuario)": db.query(Message, User.username).join(
+            Conversation, Message.conversation_id == Conversation.id
+        ).join(
+            User, Conversation.user_id == User.id
+        ).filter(
+            Message.is_from_user == True
+        ).order_by(desc(Message.created_at), desc(Message.id)).limit(50),
+        "feedback positivo": db.query(func.count(MessageFeedback.id)).filter(
+            MessageFeedback.is_positive == True
+        ),
+    }
+
+
+def _walk(node: Dict, indexes: List[str], seq_scans: List[str]):
+    if node.get("Index Name"):
+        indexes.append(node["Index Name"])
+    if node.get("Node Type") == "Seq Scan":
+        seq_scans.append(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        _walk(child, indexes, seq_scans)
+
+
+def explain(db: Session, query: Query, repeat: int) -> Dict:
+    """EXPLAIN (ANALYZE, BUFFERS) `repeat` veces; se reporta la mediana del tiempo de ejecución"""
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    runs = []
+    for _ in range(repeat):
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        runs.append(plan[0])
+    db.rollback()
+
+    last = runs[-1]
+    indexes, seq_scans = [], []
+    _walk(last["Plan"], indexes, seq_scans)
+    return {
+        "execution_ms": round(statistics.median(r["Execution Time"] for r in runs), 3),
+        "planning_ms": round(statistics.median(r["Planning Time"] for r in runs), 3),
+        "root_node": last["Plan"]["Node Type"],
+        "shared_hit_blocks": last["Plan"].get("Shared Hit Blocks"),
+        "shared_read_blocks": last["Plan"].get("Shared Read Blocks"),
+        "indexes": sorted(set(indexes)),
+        "seq_scans": sorted(set(s for s in seq_scans if s)),
+    }
+
+
+def run(repeat: int = 5, db_factory: Callable[[], Session] = SessionLocal) -> Dict:
+    db = db_factory()
+    try:
+        params = sample_params(db)
+        results = {name: explain(db, query, repeat) for name, query in hot_queries(db, params).items()}
+    finally:
+        db.close()
+    return {"params": params, "repeat": repeat, "queries": results}
+
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    print(f"Parámetros: {result['params']} (mediana de {result['repeat']} ejecuciones)")
+    for name, stats in result["queries"].items():
+        line = f"- {name}: {stats['execution_ms']} ms [{stats['root_node']}]"
+        before = (baseline or {}).get("queries", {}).get(name)
+        if before:
+            speedup = before["execution_ms"] / stats["execution_ms"] if stats["execution_ms"] else 0.0
+            line += f" (antes {before['execution_ms']} ms, x{speedup:.1f})"
+        print(line)
+        print(f"    índices: {', '.join(stats['indexes']) or '-'}   seq scans: {', '.join(stats['seq_scans']) or '-'}")
+        if before and before["seq_scans"] != stats["seq_scans"]:
+            print(f"    seq scans antes: {', '.join(before['seq_scans']) or '-'}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE de las consultas calientes del chat")
+    parser.add_argument("--repeat", type=int, default=5, help="ejecuciones por consulta (se usa la mediana)")
+    parser.add_argument("--output", default=None, help="guardar el resultado en este archivo JSON")
+    parser.add_argument("--compare", default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    result = run(repeat=args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Resultado guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
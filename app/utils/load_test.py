@@ -0,0 +1,114 @@
+"""Prueba de carga de /chatbot/message.
+
+Registra (si hace falta) varios usuarios de prueba, reparte las peticiones entre
+ellos para no chocar con el límite por usuario y reporta throughput y percentiles:
+
+    python -m app.utils.load_test --base-url http://localhost:8000 --requests 200 --concurrency 20
+    python -m app.utils.load_test --method GET --endpoint /users/me --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Inicia sesión y, si el usuario no existe, lo registra primero"""
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    if response.status_code == 401:
+        await client.post("/auth/register", json={
+            "username": username,
+            "email": f"{username}@loadtest.exploratec.pe",
+            "password": password
+        })
+        response = await client.post("/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(args) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        tokens = [
+            await get_token(client, f"{args.user_prefix}{i}", args.password)
+            for i in range(args.users)
+        ]
+
+        async def one_request(i: int):
+            payload = {"content": args.message}
+            if args.scene_context:
+                payload["scene_context"] = args.scene_context
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if args.method == "GET":
+                        response = await client.get(args.endpoint, headers=headers)
+                    else:
+                        response = await client.post(args.endpoint, json=payload, headers=headers)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "status_codes": dict(statuses),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del chatbot")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", default="/chatbot/message")
+    parser.add_argument("--method", default="POST", choices=["POST", "GET"], help="GET para endpoints de lectura (p. ej. /users/me)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10, help="usuarios de prueba entre los que se reparten las peticiones")
+    parser.add_argument("--user-prefix", default="loadtest_")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--message", default="¿Qué carreras técnicas ofrecen?")
+    parser.add_argument("--scene-context", default=None)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    print(f"Peticiones:   {result['requests']} (concurrencia {result['concurrency']})")
+    print(f"Duración:     {result['elapsed_s']} s")
+    print(f"Throughput:   {result['throughput_rps']} req/s")
+    lat = result["latency_ms"]
+    print(f"Latencia ms:  media={lat['mean']} p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    print(f"Códigos:      {result['status_codes']}")
+
+
+if __name__ == "__main__":
+    main()
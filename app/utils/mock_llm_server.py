@@ -0,0 +1,110 @@
+"""Servidor local compatible con la API de OpenAI para pruebas de carga.
+
+Expone /v1/chat/completions, /v1/embeddings y /v1/models con latencias simuladas
+según las variables MOCK_LLM_* de la configuración. Para usarlo:
+
+    python -m app.utils.mock_llm_server --port 8001
+    LLM_BACKEND=openai LLM_BASE_URL=http://localhost:8001/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional, Union
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from app.config import settings
+from app.services.llm import LatencyModel, estimate_tokens, fake_completion_text, fake_embedding
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str
+    messages: List[Dict]
+    max_tokens: Optional[int] = 512
+    temperature: Optional[float] = None
+
+
+class EmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+
+
+app = FastAPI(title="Mock LLM (OpenAI compatible)")
+latency = LatencyModel.from_settings()
+stats = {"chat_requests": 0, "embedding_requests": 0, "errors": 0, "in_flight": 0}
+
+
+@app.get("/v1/models")
+async def list_models():
+    models = {settings.LLM_CHAT_MODEL, settings.LLM_TITLE_MODEL, settings.LLM_EMBEDDING_MODEL}
+    return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "mock"} for m in sorted(models)]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    stats["chat_requests"] += 1
+    stats["in_flight"] += 1
+    try:
+        completion_tokens = latency.sample_completion_tokens(request.max_tokens or 512)
+        await asyncio.sleep(latency.completion_seconds(completion_tokens))
+        if latency.should_fail():
+            stats["errors"] += 1
+            raise HTTPException(status_code=500, detail="Error simulado del proveedor LLM")
+
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in request.messages)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": fake_completion_text(request.messages, completion_tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: EmbeddingRequest):
+    stats["embedding_requests"] += 1
+    texts = [request.input] if isinstance(request.input, str) else request.input
+    await asyncio.sleep(settings.MOCK_LLM_EMBEDDING_LATENCY_MS / 1000.0)
+    prompt_tokens = sum(estimate_tokens(t) for t in texts)
+    return {
+        "object": "list",
+        "model": request.model,
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(t, settings.LLM_EMBEDDING_DIMENSIONS)}
+            for i, t in enumerate(texts)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Contadores del simulador (útil para cruzar con los resultados de la prueba de carga)"""
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM simulado compatible con OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query, Session
+
+# Paginación por cursor (keyset): en vez de OFFSET, cada página continúa desde la clave de
+# ordenamiento de la última fila de la anterior, así la página N cuesta lo mismo que la 1.
+# El cursor es opaco para el cliente: JSON en base64 con los valores de esa clave.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Estimate"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Cursor opaco a partir de los valores de la clave de ordenamiento de una fila"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Valores de la clave de un cursor; 400 si el cursor no es válido para este listado"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("longitud inesperada")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def apply_keyset(query: Query, keys: Sequence, cursor: Optional[str], descending: bool = True) -> Query:
+    """Filtra las filas posteriores al cursor y ordena por `keys` (todas en la misma dirección).
+
+    La condición es una comparación de filas, (a, b) < (x, y), que PostgreSQL resuelve como
+    rango sobre el índice compuesto de las mismas columnas/expresiones.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        row = tuple_(*keys)
+        bound = tuple_(*[literal(v, type_=key.type) for key, v in zip(keys, values)])
+        query = query.filter(row < bound if descending else row > bound)
+    return query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+
+
+def next_cursor(rows: Sequence, limit: int, key_values: Callable[[Any], Sequence[Any]]) -> Optional[str]:
+    """Cursor de la siguiente página, o None si esta página no llegó a `limit` filas"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(key_values(rows[-1]))
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """Total estimado por el planner de PostgreSQL (EXPLAIN), sin recorrer las filas"""
+    try:
+        compiled = query.statement.compile(dialect=db.get_bind().dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        print(f"⚠️ No se pudo estimar el total: {e}")
+        return None
+
+
+def set_pagination_headers(response: Response, cursor: Optional[str], total_estimate: Optional[int] = None):
+    """Agrega X-Next-Cursor (si hay más páginas) y X-Total-Estimate a la respuesta"""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    if total_estimate is not None:
+        response.headers[TOTAL_ESTIMATE_HEADER] = str(total_estimate)
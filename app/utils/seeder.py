@@ -6,10 +6,12 @@ from app.models.scene import Scene
 from app.models.chat import Conversation, Message
 from app.crud.user import user_crud
 from app.crud.scene import scene_crud
+from app.crud.chat import conversation_crud
+from app.services.message_partitions import ensure_message_partitions
 from app.schemas.user import UserCreate
 from app.schemas.scene import SceneCreate
 from app.models.knowledge import KnowledgeBase
-from app.services.embeddings import embed_texts, get_openai_client
+from app.services.embeddings import embed_texts
 import app.models.note
 from app.crud.event import event_crud
 from app.schemas.event import EventCreate
@@ -33,6 +35,22 @@ def create_tables():
         logger.error(f"Error creando tablas: {e}")
         raise
 
+def stamp_migrations():
+    """Marca la base recién creada como actualizada a la última migración de Alembic"""
+    try:
+        from alembic import command
+        from alembic.config import Config
+        command.stamp(Config("alembic.ini"), "head", purge=True)
+        logger.info("Base de datos marcada en la última migración (alembic head)")
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la versión de migraciones: {e}")
+
+def seed_scene_summaries(db: Session):
+    """Precalcular los resúmenes de escena ("¿Qué hay aquí?")"""
+    from app.services.scene_summaries import regenerate_scene_summaries
+    result = regenerate_scene_summaries(db)
+    logger.info(f"Resúmenes de escena: {result['generated']} generados, {result['skipped']} sin contenido")
+
 def seed_basic_scenes(db: Session):
     """Crear escenas"""
     
@@ -295,9 +313,8 @@ def seed_knowledge(db: Session):
             db.rollback()
             logger.error(f"Error insertando knowledge entry: {e}")
 
-    # Si hay clave de OpenAI, intentar generar embeddings en batch y guardarlos
+    # Si hay un backend LLM configurado, intentar generar embeddings en batch y guardarlos
     try:
-        get_openai_client()
         texts = [k.content for k in created_kbs]
         if texts:
             embeddings = embed_texts(texts)
@@ -463,6 +480,9 @@ def seed_example_conversations(db: Session):
             db.commit()
             created += 1
 
+        # Los mensajes de ejemplo se insertan directo: recalcular los contadores de las conversaciones
+        conversation_crud.recount_messages(db)
+
         logger.info(f"{created} conversaciones de ejemplo creadas.")
     except Exception as e:
         db.rollback()
@@ -487,10 +507,13 @@ def run_seeder():
     except Exception as ex:
         logger.error(f"Error verificando/creando tablas: {ex}")
         raise
+    stamp_migrations()
     
     db = SessionLocal()
     
     try:
+        # messages es particionada: crear las particiones antes de insertar mensajes
+        ensure_message_partitions(db, months_back=1)
         # Agregar datos básicos
         seed_users(db)
         # Agregar escenas básicas
@@ -501,6 +524,8 @@ def run_seeder():
         seed_knowledge(db)
         # Agregar conversaciones de ejemplo
         seed_example_conversations(db)
+        # Precalcular resúmenes de escena
+        seed_scene_summaries(db)
         
         total_users = db.query(User).count()
         total_scenes = db.query(Scene).count()
@@ -0,0 +1,155 @@
+"""Esquema base (tablas existentes antes de introducir migraciones)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    op.create_table(
+        "scenes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scene_key", sa.String(100), nullable=False, unique=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("is_relevant", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_scenes_id", "scenes", ["id"])
+    op.create_index("ix_scenes_is_relevant", "scenes", ["is_relevant"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("username", sa.String(100), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("current_scene_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "conversations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("title", sa.String(255), nullable=True),
+        sa.Column("scene_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_conversations_id", "conversations", ["id"])
+
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("is_from_user", sa.Boolean(), nullable=False),
+        sa.Column("scene_context_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+        sa.Column("tokens_used", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("intent_category", sa.String(50), nullable=True),
+        sa.Column("intent_confidence", sa.Float(), nullable=True),
+        sa.Column("intent_keywords", sa.JSON(), nullable=True),
+        sa.Column("requires_clarification", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_messages_id", "messages", ["id"])
+
+    op.create_table(
+        "message_feedback",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("message_id", sa.Integer(), sa.ForeignKey("messages.id"), nullable=False, unique=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("is_positive", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_message_feedback_id", "message_feedback", ["id"])
+
+    op.create_table(
+        "knowledge_base",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=True),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("subcategory", sa.String(100), nullable=True),
+        sa.Column("scene_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("usage_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_knowledge_base_id", "knowledge_base", ["id"])
+    op.create_index("ix_knowledge_base_category", "knowledge_base", ["category"])
+    op.create_index("ix_knowledge_base_is_active", "knowledge_base", ["is_active"])
+
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("event_date", sa.DateTime(), nullable=False),
+        sa.Column("location", sa.String(200), nullable=True),
+        sa.Column("scene_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+        sa.Column("modalidad", sa.String(50), nullable=True),
+        sa.Column("link", sa.String(1000), nullable=True),
+        sa.Column("embedding", Vector(1536), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+    op.create_table(
+        "specialties",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("name", sa.String(45), nullable=False),
+    )
+    op.create_index("ix_specialties_id", "specialties", ["id"])
+
+    op.create_table(
+        "notes",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("lastname", sa.String(100), nullable=False),
+        sa.Column("dni", sa.String(9), nullable=False),
+        sa.Column("phone", sa.String(9), nullable=True),
+        sa.Column("reason", sa.Text(), nullable=True),
+        sa.Column("is_accepted", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("visit_date", sa.DateTime(), nullable=True),
+        sa.Column("family_dni", sa.String(9), nullable=True),
+        sa.Column("family_lastname", sa.String(100), nullable=True),
+        sa.Column("family_name", sa.String(100), nullable=True),
+        sa.Column("gender", sa.String(100), nullable=True),
+        sa.Column("User_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("Speciality_id", sa.BigInteger(), sa.ForeignKey("specialties.id"), nullable=True),
+    )
+    op.create_index("ix_notes_id", "notes", ["id"])
+
+
+def downgrade():
+    op.drop_table("notes")
+    op.drop_table("specialties")
+    op.drop_table("events")
+    op.drop_table("knowledge_base")
+    op.drop_table("message_feedback")
+    op.drop_table("messages")
+    op.drop_table("conversations")
+    op.drop_table("users")
+    op.drop_table("scenes")
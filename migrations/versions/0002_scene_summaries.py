@@ -0,0 +1,35 @@
+"""Resúmenes precalculados por escena
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "scene_summaries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scene_id", sa.Integer(), sa.ForeignKey("scenes.id", ondelete="CASCADE"), nullable=False, unique=True),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("source_hash", sa.String(64), nullable=True),
+        sa.Column("is_stale", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("tokens_used", sa.Integer(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("generated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_scene_summaries_id", "scene_summaries", ["id"])
+
+
+def downgrade():
+    op.drop_index("ix_scene_summaries_id", table_name="scene_summaries")
+    op.drop_table("scene_summaries")
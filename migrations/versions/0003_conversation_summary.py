@@ -0,0 +1,24 @@
+"""Resumen acumulado por conversación
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("conversations", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("conversations", sa.Column("summary_message_id", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("conversations", "summary_message_id")
+    op.drop_column("conversations", "summary")
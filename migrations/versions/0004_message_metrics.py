@@ -0,0 +1,34 @@
+"""Métricas de tokens, modelo y latencia por mensaje del asistente
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("reply_to_id", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("prompt_tokens", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("completion_tokens", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("model_name", sa.String(100), nullable=True))
+    op.add_column("messages", sa.Column("response_time_ms", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("stage_latencies", sa.JSON(), nullable=True))
+    op.add_column("messages", sa.Column("cache_hits", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("messages", "cache_hits")
+    op.drop_column("messages", "stage_latencies")
+    op.drop_column("messages", "response_time_ms")
+    op.drop_column("messages", "model_name")
+    op.drop_column("messages", "completion_tokens")
+    op.drop_column("messages", "prompt_tokens")
+    op.drop_column("messages", "reply_to_id")
@@ -0,0 +1,45 @@
+"""Contadores desnormalizados de mensajes en conversations
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "conversations",
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.add_column(
+        "conversations",
+        sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+    # Backfill desde los mensajes existentes
+    op.execute(
+        """
+        UPDATE conversations AS c
+        SET message_count = m.total,
+            last_message_at = m.last_at
+        FROM (
+            SELECT conversation_id, COUNT(*) AS total, MAX(created_at) AS last_at
+            FROM messages
+            GROUP BY conversation_id
+        ) AS m
+        WHERE m.conversation_id = c.id
+        """
+    )
+
+
+def downgrade():
+    op.drop_column("conversations", "last_message_at")
+    op.drop_column("conversations", "message_count")
@@ -0,0 +1,41 @@
+"""Índices para la paginación por cursor (keyset) de los listados
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_conversations_user_activity",
+        "conversations",
+        ["user_id", sa.text("coalesce(updated_at, created_at)"), "id"]
+    )
+    op.create_index("ix_messages_conversation_created", "messages", ["conversation_id", "created_at", "id"])
+    op.create_index("ix_messages_created_id", "messages", ["created_at", "id"])
+    op.create_index("ix_notes_user_created", "notes", ["User_id", "created_at", "id"])
+    op.create_index("ix_notes_created_id", "notes", ["created_at", "id"])
+    op.create_index(
+        "ix_events_active_date",
+        "events",
+        ["event_date", "id"],
+        postgresql_where=sa.text("is_active = true")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_events_active_date", table_name="events")
+    op.drop_index("ix_notes_created_id", table_name="notes")
+    op.drop_index("ix_notes_user_created", table_name="notes")
+    op.drop_index("ix_messages_created_id", table_name="messages")
+    op.drop_index("ix_messages_conversation_created", table_name="messages")
+    op.drop_index("ix_conversations_user_activity", table_name="conversations")
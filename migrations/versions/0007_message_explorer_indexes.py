@@ -0,0 +1,25 @@
+"""Índices para los filtros del explorador de mensajes del admin
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_messages_intent_created", "messages", ["intent_category", "created_at", "id"])
+    op.create_index("ix_messages_scene_created", "messages", ["scene_context_id", "created_at", "id"])
+    op.create_index("ix_messages_intent_confidence", "messages", ["intent_confidence"])
+
+
+def downgrade():
+    op.drop_index("ix_messages_intent_confidence", table_name="messages")
+    op.drop_index("ix_messages_scene_created", table_name="messages")
+    op.drop_index("ix_messages_intent_created", table_name="messages")
@@ -0,0 +1,28 @@
+"""Índices compuestos para las consultas calientes del chat
+
+- historial y páginas de mensajes: (conversation_id, id)
+- KPIs de feedback: (is_positive, message_id)
+
+El límite por usuario ya lo cubre ix_messages_conversation_created (0006).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_messages_conversation_id_id", "messages", ["conversation_id", "id"])
+    op.create_index("ix_message_feedback_is_positive", "message_feedback", ["is_positive", "message_id"])
+
+
+def downgrade():
+    op.drop_index("ix_message_feedback_is_positive", table_name="message_feedback")
+    op.drop_index("ix_messages_conversation_id_id", table_name="messages")
@@ -0,0 +1,125 @@
+"""messages particionada por mes (created_at) y tabla conversation_archive
+
+La PK de una tabla particionada debe incluir la clave de partición, así que pasa a ser
+(id, created_at) y message_feedback.message_id deja de tener FK (el ORM declara el join).
+Los datos se copian a la nueva tabla; en bases grandes conviene correrla en una ventana
+de mantenimiento.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+# Índices de messages creados por las migraciones anteriores (se recrean en la tabla nueva)
+MESSAGE_INDEXES = [
+    ("ix_messages_id", ["id"], None),
+    ("ix_messages_conversation_created", ["conversation_id", "created_at", "id"], None),
+    ("ix_messages_created_id", ["created_at", "id"], None),
+    ("ix_messages_intent_created", ["intent_category", "created_at", "id"], None),
+    ("ix_messages_scene_created", ["scene_context_id", "created_at", "id"], None),
+    ("ix_messages_intent_confidence", ["intent_confidence"], None),
+    ("ix_messages_conversation_id_id", ["conversation_id", "id"], None),
+]
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _create_message_indexes():
+    for name, columns, where in MESSAGE_INDEXES:
+        op.create_index(
+            name, "messages", columns,
+            postgresql_where=sa.text(where) if where else None
+        )
+
+
+def _add_message_foreign_keys():
+    op.create_foreign_key(
+        "messages_conversation_id_fkey", "messages", "conversations", ["conversation_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "messages_scene_context_id_fkey", "messages", "scenes", ["scene_context_id"], ["id"]
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    op.execute("UPDATE messages SET created_at = now() WHERE created_at IS NULL")
+    op.execute("ALTER TABLE message_feedback DROP CONSTRAINT IF EXISTS message_feedback_message_id_fkey")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+
+    op.execute("CREATE TABLE messages (LIKE messages_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL")
+
+    # Una partición por mes desde el mensaje más antiguo hasta MONTHS_AHEAD meses adelante
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM messages_legacy")).scalar()
+    current = date.today().replace(day=1)
+    month = (oldest.date() if isinstance(oldest, datetime) else current).replace(day=1)
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        name = f"messages_y{month.year:04d}m{month.month:02d}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute("INSERT INTO messages SELECT * FROM messages_legacy")
+    op.execute("DROP TABLE messages_legacy")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+
+    op.create_primary_key("messages_pkey", "messages", ["id", "created_at"])
+    _add_message_foreign_keys()
+    _create_message_indexes()
+
+    op.create_table(
+        "conversation_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("title", sa.String(255), nullable=True),
+        sa.Column("scene_id", sa.Integer(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("messages", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_conversation_archive_user_id", "conversation_archive", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_conversation_archive_user_id", table_name="conversation_archive")
+    op.drop_table("conversation_archive")
+
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("CREATE TABLE messages (LIKE messages_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at DROP NOT NULL")
+    op.execute("INSERT INTO messages SELECT * FROM messages_partitioned")
+    op.execute("DROP TABLE messages_partitioned")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+
+    op.create_primary_key("messages_pkey", "messages", ["id"])
+    _add_message_foreign_keys()
+    _create_message_indexes()
+    op.create_foreign_key(
+        "message_feedback_message_id_fkey", "message_feedback", "messages", ["message_id"], ["id"]
+    )
@@ -0,0 +1,25 @@
+"""users.token_version para revocar tokens por versión
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0")
+    )
+
+
+def downgrade():
+    op.drop_column("users", "token_version")